@@ -3,7 +3,7 @@ a = Analysis(
     pathex=['.'],
     binaries=[],
     datas=[('logo.png', '.'), ('logo.ico', '.')],   # Adiciona os arquivos dentro do executavel
-    hiddenimports=['splash_screen', 'procura_B8', '__init__'],  # Tem que incluir na marra!
+    hiddenimports=['splash_screen', 'procura_B8', 'saidas_estruturadas', 'duplicados', 'cache_texto', 'extracao', 'log_execucao', 'metricas', 'normalizacao', 'rebusca', 'indice', 'varredura', 'detetive', 'avisos', 'esteira', 'autoajuste', 'triagem', 'grade_resultados', 'historico', '__init__'],  # Tem que incluir na marra!
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
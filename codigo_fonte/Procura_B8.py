@@ -12,14 +12,96 @@ Orientações sobre a entrada:
 - O diretório informado deve conter os arquivos PDF que se queira investigar.
 - Caso nenhum diretório seja informado, será usado o diretório atual.
 - Argumentos opcionais:
-    -d ou --debug : ativa mensagens detalhadas de depuração.
-    -s ou --som   : emite um beep a cada ocorrência de item proibido encontrada.
+    -d ou --debug : ativa mensagens detalhadas de depuração, gravadas só
+                    no arquivo log_debug_<data_hora>.txt (não vão pra janela).
+    -s ou --som   : avisa (beep, janela piscando) quando aparece item
+                    proibido, sem parar a busca. Rajadas de achados viram
+                    um aviso só (ver avisos.py).
+    --sqlite      : grava também um banco SQLite com os resultados.
+    --xlsx        : grava também uma planilha Excel (xlsx) com os resultados.
+    -r ou --recursivo : processa também os subdiretórios.
+    --sem-cache   : não usa o cache de texto extraído (ver cache_texto.py).
+    --cache-dir   : diretório do cache de texto.
+    --cache-limite-mb : tamanho máximo do cache de texto, em MB.
+    -j ou --janela N : pareia norma e padrão em até N linhas seguidas da
+                    mesma página (tabelas). O padrão é 1, só a mesma linha.
+    --tempo-limite SEG : tempo máximo de extração por arquivo (padrão 900).
+    --memoria-limite-mb MB : memória máxima da extração (padrão 4096).
+    --metricas-porta PORTA : serve as métricas no formato do Prometheus em
+                    http://127.0.0.1:PORTA/metrics durante a execução.
+    --rebusca     : refaz só a busca, em lote (pandas), sobre o texto do
+                    cache. Pra quando muda a lista de normas e o arquivo
+                    morto inteiro precisa ser reavaliado.
+    --indice      : atualiza o índice de texto (ver indice.py) com cada
+                    arquivo processado, pra consultas avulsas depois.
+    --indice-dir  : diretório do índice de texto.
+    --memo-limite-mb MB : memória máxima da memória de linhas repetidas
+                    (padrão 32, 0 desliga).
+    --extratores N : arquivos extraídos ao mesmo tempo, cada um no seu
+                    processo. O padrão, 0, escolhe pelos núcleos e pela
+                    memória livre (ver autoajuste.py).
+    --fila-leitura N : arquivos lidos antes, esperando a extração (padrão
+                    2). Em rede lenta, aumente.
+    --fila-extracao N : arquivos extraídos antes, esperando a busca
+                    (padrão 2).
+    --perfil ARQUIVO.json : pesquisa também as regras desse perfil (outra
+                    especificação, a lista de um cliente), na mesma
+                    extração. Pode repetir. O formato está no
+                    carregar_perfil do varredura.py.
+    --sem-historico : não compara com a execução anterior (ver
+                    historico.py).
+    --historico-dir : diretório do histórico de resultados.
+- A extração roda num processo separado, vigiado. Arquivo que passa do
+  limite de tempo ou memória é interrompido e registrado como TIMEOUT ou
+  OOM, com as páginas lidas até ali. Com os dois limites em 0 a extração
+  roda no próprio processo, sem vigia.
+- O texto extraído fica num cache persistente. Mudou a lista de normas, a
+  próxima execução só refaz a busca, sem extrair os PDFs de novo.
+- Cópias idênticas do mesmo PDF são analisadas uma vez só e reportadas
+  apontando pro original.
+- Leitura e extração andam na frente da busca, em segundo plano (ver
+  esteira.py): o próximo arquivo já está sendo lido enquanto o atual é
+  extraído e o anterior pesquisado. No fim sai quem esperou quem, pra
+  ajustar as filas e os extratores.
+- Com a memória da máquina apertada (ou a máquina carregada) menos arquivos
+  são extraídos ao mesmo tempo, e quando folga volta a subir. Os maiores
+  arquivos são processados primeiro, o relatório sai na ordem de sempre.
+- Antes de extrair, uma triagem lê só a estrutura dos PDFs (ver
+  triagem.py), na leitura da esteira e nos bytes já lidos: arquivo quebrado
+  ou com senha falha na hora, página sem fonte não é extraída, página só
+  com imagem sai no relatório como pendência de OCR, e o progresso sai por
+  página, com previsão de término.
+- Linhas que se repetem (carimbo, notas gerais, tabela de revisões) são
+  buscadas uma vez só na execução inteira, as outras vezes usam o resultado
+  guardado (ver MemoLinhas no varredura.py).
+- Com --perfil cada arquivo é extraído uma vez e pesquisado com todos os
+  perfis numa passada só. O relatório e o CSV saem com uma seção por perfil
+  (a lista de parafusos é o perfil "parafusos"), e o CSV ganha a coluna
+  Perfil na frente. A rebusca continua só com a lista de parafusos.
+- Terminada a varredura, o botão "Ver resultados" da janela abre os achados
+  numa tabela que ordena e filtra (ver grade_resultados.py), lida do JSONL
+  da execução.
+- O resultado de cada arquivo fica guardado (ver historico.py) e cada
+  execução grava delta_<data_hora>.txt com o que mudou desde a anterior no
+  mesmo diretório: arquivos novos, que sumiram e que mudaram de status ou
+  de achados. Os que não mudaram entram só na contagem.
 
 Sobre a saída:
 - Gera três arquivos no diretório atual:
     - log_<data_hora>.txt       : log completo da execução.
+    - log_debug_<data_hora>.txt : mensagens de depuração (só com -d).
     - relatorio_<data_hora>.txt : resumo por arquivo, normas e padrões encontrados.
     - relatorio_execucao_<data_hora>.csv : planilha com status e detalhes.
+- E as saídas estruturadas (ver saidas_estruturadas.py), gravadas arquivo a
+  arquivo durante a varredura:
+    - resultado_<data_hora>.jsonl  : um registro por arquivo e por achado.
+    - resultado_<data_hora>.sqlite : tabelas 'files' e 'findings' (--sqlite).
+    - resultado_<data_hora>.xlsx   : abas 'Arquivos' e 'Achados' (--xlsx).
+- E as métricas (ver metricas.py), regravadas durante a varredura:
+    - metricas_<data_hora>.json : arquivos, páginas, achados por norma,
+      erros e tempos de extração e busca.
+- E o que mudou desde a execução anterior (ver historico.py):
+    - delta_<data_hora>.txt : arquivos novos, que sumiram e que mudaram.
 
 Melhorias em versões futuras:
 - Implementar OCR automático para PDFs não pesquisáveis.
@@ -42,26 +124,74 @@ Histórico de alterações:
 - 2025 04 17 Versão 0.0.1: Implantação.
 - 2025 09 30 Versão 0.0.2: Ajustes finos.
 - 2025 10 22 Versão 0.0.3: Ajustes para montar pacote executavel.
+- 2026 10 19 Versão 0.0.4: Saídas estruturadas JSONL e SQLite.
+- 2026 10 19 Versão 0.0.4: Planilha Excel (xlsx) nativa.
+- 2026 10 19 Versão 0.0.4: Busca recursiva e detecção de cópias idênticas.
+- 2026 10 19 Versão 0.0.4: Cache comprimido do texto extraído das páginas.
+- 2026 10 19 Versão 0.0.4: Busca em janela de linhas para tabelas.
+- 2026 10 19 Versão 0.0.4: Extração isolada com limite de tempo e memória.
+- 2026 10 19 Versão 0.0.4: Log com níveis (logging), debug em arquivo próprio.
+- 2026 10 19 Versão 0.0.4: Console da janela limitado, com filtro e busca no log.
+- 2026 10 19 Versão 0.0.4: Análise por arquivo reaproveitável (modo serviço).
+- 2026 10 19 Versão 0.0.4: Métricas (JSON e Prometheus).
+- 2026 10 19 Versão 0.0.4: Texto normalizado antes da busca, regras canônicas.
+- 2026 10 19 Versão 0.0.4: Rebusca em lote (pandas) sobre o texto do cache.
+- 2026 10 19 Versão 0.0.4: Índice invertido do texto pra consultas avulsas.
+- 2026 10 19 Versão 0.0.4: Miolo da busca separado no varredura.py, sem globais.
+- 2026 10 19 Versão 0.0.4: Memória das linhas repetidas entre páginas e arquivos.
+- 2026 10 19 Versão 0.0.4: Aviso dos achados em segundo plano, sem winsound no import.
+- 2026 10 19 Versão 0.0.4: Esteira com leitura e extração em segundo plano.
+- 2026 10 19 Versão 0.0.4: Extratores automáticos, regulados pela memória.
+- 2026 10 19 Versão 0.0.4: Triagem rápida dos PDFs, progresso por página.
+- 2026 10 19 Versão 0.0.4: Vários perfis de regras numa extração só (--perfil).
+- 2026 10 19 Versão 0.0.4: Tabela dos resultados na janela (Ver resultados).
+- 2026 10 19 Versão 0.0.4: Delta dos resultados desde a execução anterior.
+- 2026 10 19 Versão 0.0.4: pandas (rebusca) só carregado quando pedido.
+- 2026 10 19 Versão 0.0.4: Triagem na leitura da esteira, sem abrir duas vezes.
+- 2026 10 19 Versão 0.0.4: Interface e pkg_resources importados só nas funções.
 """
 
-import PyPDF2
 import argparse
+import autoajuste
+import avisos
+import collections
 import datetime
+import duplicados
+import esteira
+import extracao
+import historico
+import indice as indice_texto
+import logging
+import log_execucao
+import metricas
+import normalizacao
 import os
 import pathlib
-import pkg_resources
 import platform
 import psutil
 import re
 import socket
 import sys
 import time
-import tkinter
 import traceback
-import winsound
+import triagem
 import importlib.metadata
-from tkinter import scrolledtext
-from tkinter import messagebox
+import multiprocessing
+import saidas_estruturadas
+import cache_texto
+# A interface (tkinter, grade_resultados) e o pkg_resources são importados
+# dentro das funções: com spawn o processo de extração roda este módulo de
+# novo (ver extracao.py) e não precisa carregar nada disso.
+# O miolo da busca mora no varredura.py (sem interface gráfica). Os nomes
+# continuam valendo aqui, pra quem usava Procura_B8.analisar_pdf e cia.
+from varredura import (
+    Achado, normas, strings_especificas, formatar_norma,
+    formatar_linha_norma, buscar_parafusos, buscar_parafusos_janela,
+    buscar_parafusos_perdidos, listar_pdfs, extrair_paginas,
+    pesquisar_paginas, indexar_texto, analisar_pdf, analisar_pdf_com_limite,
+    analisar_extraido, status_arquivo, MemoLinhas, LIMITE_MEMO_MB,
+    PERFIL_PADRAO, montar_perfis,
+)
 
 
 #
@@ -74,39 +204,215 @@ from tkinter import messagebox
 #
 janela_ativa = True
 
+# Aviso dos achados (-s). Quem importa o módulo sem passar pelo main fica
+# no silêncio.
+som = False
+
+
+# Log do módulo (ver log_execucao.py). Debug só vai pro arquivo log_debug.
+log = logging.getLogger("detetive.procura_B8")
+
+# A janela guarda só as últimas linhas, quanto mais linha no widget mais
+# lento fica o Tk. O histórico completo está no arquivo de log.
+LINHAS_CONSOLE = 5000
+# Quantas linhas a busca no log mostra no máximo
+LIMITE_BUSCA = 2000
+# De quanto em quanto tempo (segundos) a janela é redesenhada
+INTERVALO_TELA = 0.1
+# Piscada da janela no aviso de achado (-s): cor e duração (ms)
+COR_PISCADA = "#ffd54f"
+DURACAO_PISCADA = 300
+# Linhas que ficam com o filtro "Só achados e erros" ligado. A linha do
+# "Processando o arquivo" vai junto, senão não dá pra saber de quem é o achado.
+FILTRO_CONSOLE = re.compile(
+    r"proibido|erro|aten[cç][aã]o|A T E N|interromp|n[aã]o é pesquis"
+    r"|Processando o arquivo",
+    re.IGNORECASE,
+)
+
 #
 class RedirectText:
     """
     Redirecionar os comandos 'print' pra uma janela e para um arquivo 
         (opcional, se informado, gravarei)
+
+    A janela mostra no máximo 'limite_linhas' linhas, as mais recentes. Dá
+    pra filtrar só achados e erros e buscar no arquivo (histórico completo).
     """
     
-    def __init__(self, text_widget, filename=None):
+    def __init__(self, text_widget, filename=None,
+                 limite_linhas=LINHAS_CONSOLE):
         self.text_widget = text_widget
         self.filename = filename
         self.file = None
+        self.limite_linhas = limite_linhas
+        # Anel com as últimas linhas, todas e só as filtradas, pra redesenhar
+        # a janela quando liga/desliga o filtro sem precisar ler o arquivo
+        self.linhas = collections.deque(maxlen=limite_linhas)
+        self.linhas_filtradas = collections.deque(maxlen=limite_linhas)
+        # Pedaço de linha que ainda não recebeu o '\n'
+        self.pendente = ""
+        self.filtrar = False
+        # Janela mostrando resultado de busca, as linhas novas só vão pro anel
+        self.buscando = False
+        self.ultima_tela = 0.0
+        # Aviso de achado esperando a thread principal piscar a janela
+        self.piscar_pendente = False
         # quer que grava em arquivo tambem ?
         if filename:
             self.file = open(filename, "w", encoding="utf-8")
 
     def write(self, string):
-        global janela_ativa
+        # Escreve o texto pro arquivo, quer dizer, se ele estiver aberto
+        if self.file and not self.file.closed:
+            self.file.write(string)
+
+        # A janela trabalha com linhas inteiras
+        *completas, self.pendente = (self.pendente + string).split("\n")
+        novas = []
+        for linha in completas:
+            self.linhas.append(linha)
+            if FILTRO_CONSOLE.search(linha):
+                self.linhas_filtradas.append(linha)
+                novas.append(linha)
+            elif not self.filtrar:
+                novas.append(linha)
+
+        if novas and not self.buscando:
+            self._inserir(novas)
+        self._atualizar_tela()
+
+    def _inserir(self, linhas):
+        """
+        Acrescenta linhas no fim da janela e tira as mais velhas se passou
+        do limite.
+        """
         #  Aqui é o pulo do gato, só da pra mandar o texto pra tela se ela
         #  estiver ativa!
-        if janela_ativa:
-            try:
+        if not janela_ativa:
+            return
+        import tkinter
+        try:
         # Insere o texto na janela se ele ainda existir (sempre bom garantir)
-                if self.text_widget.winfo_exists():
-                    self.text_widget.insert(tkinter.END, string)
-                    self.text_widget.see(tkinter.END)
-                    self.text_widget.update()
+            if not self.text_widget.winfo_exists():
+                return
+            self.text_widget.insert(tkinter.END, "\n".join(linhas) + "\n")
+            total = int(self.text_widget.index("end-1c").split(".")[0]) - 1
+            if total > self.limite_linhas:
+                self.text_widget.delete(
+                    "1.0", f"{total - self.limite_linhas + 1}.0"
+                )
+            self.text_widget.see(tkinter.END)
+        except tkinter.TclError:
+            return  # Ignora erros se o widget/janela não existir mais
+
+    def _redesenhar(self, linhas):
+        """
+        Troca todo o conteúdo da janela.
+        """
+        if not janela_ativa:
+            return
+        import tkinter
+        try:
+            if not self.text_widget.winfo_exists():
+                return
+            self.text_widget.delete("1.0", tkinter.END)
+        except tkinter.TclError:
+            return
+        if linhas:
+            self._inserir(list(linhas))
+
+    def _atualizar_tela(self):
+        """
+        Deixa o Tk redesenhar a janela (e atender os cliques), mas não a cada
+        linha, senão passa mais tempo desenhando que processando.
+        """
+        agora = time.monotonic()
+        if not janela_ativa or agora - self.ultima_tela < INTERVALO_TELA:
+            return
+        self.ultima_tela = agora
+        import tkinter
+        try:
+            if self.text_widget.winfo_exists():
+                if self.piscar_pendente:
+                    self.piscar_pendente = False
+                    self._piscar()
+                self.text_widget.update()
+        except tkinter.TclError:
+            return
+
+    def piscar(self, quantidade=1):
+        """
+        Pede uma piscada da janela (aviso de achado, ver avisos.py). Vem da
+        thread dos avisos, que não pode mexer no Tk: só marca, quem pisca é
+        a thread principal no próximo redesenho.
+
+        :param quantidade: Achados que esse aviso representa (não usado).
+        """
+        self.piscar_pendente = True
+
+    def _piscar(self):
+        import tkinter
+        cor = self.text_widget.cget("background")
+        if cor == COR_PISCADA:
+            return  # Ainda piscando
+        self.text_widget.configure(background=COR_PISCADA)
+
+        def voltar():
+            try:
+                self.text_widget.configure(background=cor)
             except tkinter.TclError:
-                return  # Ignora erros se o widget/janela não existir mais
+                return
 
-        # Escreve o texto que acabamos de colocar na janela pro arquivo, 
-        # quer dizer, se ele estiver aberto
-        if self.file and not self.file.closed:
-            self.file.write(string)
+        self.text_widget.after(DURACAO_PISCADA, voltar)
+
+    def alternar_filtro(self, ativo):
+        """
+        Liga/desliga o filtro que mostra só achados e erros.
+
+        :param ativo: True mostra só as linhas de achados e erros.
+        """
+        self.filtrar = ativo
+        if not self.buscando:
+            self._redesenhar(
+                self.linhas_filtradas if ativo else self.linhas
+            )
+
+    def buscar(self, termo):
+        """
+        Busca um texto no arquivo de log, que tem o histórico completo, e
+        mostra as linhas encontradas na janela. Termo vazio volta a mostrar o
+        andamento do processamento.
+
+        :param termo: Texto a procurar (sem diferenciar maiúsculas).
+        :return: Quantidade de linhas encontradas.
+        """
+        termo = termo.strip()
+        if not termo:
+            self.buscando = False
+            self.alternar_filtro(self.filtrar)
+            return 0
+
+        self.buscando = True
+        self.flush()
+        encontradas = []
+        total = 0
+        if self.filename:
+            termo_min = termo.casefold()
+            with open(self.filename, encoding="utf-8",
+                      errors="replace") as arquivo:
+                for linha in arquivo:
+                    if termo_min in linha.casefold():
+                        total += 1
+                        if len(encontradas) < LIMITE_BUSCA:
+                            encontradas.append(linha.rstrip("\n"))
+        cabecalho = (
+            f"*** Busca por '{termo}' em {self.filename}: {total} linha(s)"
+        )
+        if total > LIMITE_BUSCA:
+            cabecalho += f", mostrando as {LIMITE_BUSCA} primeiras"
+        self._redesenhar([cabecalho + " ***", ""] + encontradas)
+        return total
 
     def force_write(self, string):
         """
@@ -147,10 +453,17 @@ bibliotecas = [
     "PyPDF2",
     "argparse",
     "bs4",
+    "collections",
     "datetime",
     "getpass",
+    "hashlib",
     "logging",
+    "mmap",
+    "multiprocessing",
+    "numpy",
+    "openpyxl",
     "os",
+    "pandas",
     "pathlib",
     "pkg_resources",
     "platform",
@@ -158,6 +471,7 @@ bibliotecas = [
     "re",
     "requests",
     "socket",
+    "sqlite3",
     "subprocess",
     "sys",
     "time",
@@ -166,81 +480,63 @@ bibliotecas = [
     "urllib3",
     "warnings",
     "winsound",
+    "zstandard",
     "metadata",
 ]
-#
-#  Especificacao "REQUIREMENTS FOR BOLTING MATERIALS" disponivel em:
-#
-#  https://canalfornecedor.petrobras.com.br/en/regras-de-contratacao/catalogo-de-padronizacao
-#  
-#  FPSO -> Own EEP - Basic Project All Electric 225kbpd / Own EEP - Basic Project for Revitalization -> Static Equipment 
-#
-#  Download direto aqui:
-#  https://webserver-petrobrasecossistemaint-prod1.lfr.cloud/documents/10591749/32979894/I-ET-3010.00-1200-251-P4X-001_F.pdf?download=true
-#
-
-# Definição dos materiais proibidos => norma:padrao
-normas = {
-    "A193": ["B8 ", "B8N", "B8T", "B8LN", "B8SH"],
-    "A453": ["660"],
-    "A564": ["630", "631", "635", "17-4PH", "17-7PH", "17-6PH"],
-    "F593": ["F593A", "F593B", "F593C", "F593D", "1", "3", "4",
-              "5", "6", "7"],
-    "AISI": ["303", "304", "321"],
-    "3506": ["A1", "A2", "A3", "C1", "C3", "C4", "F1"],
-    "4017": ["A1", "A2", "A3"],
-    "A540": ["630", "631", "635"],
-    "A 193": ["B8 ", "B8N", "B8T", "B8LN", "B8SH"],
-    "A 453": ["660"],
-    "A 564": ["630", "631", "635", "17-4PH", "17-7PH", "17-6PH"],
-    "F 593": ["F593A", "F593B", "F593C", "F593D", "1", "3", "4",
-               "5", "6", "7"],
-    "A 540": ["630", "631", "635"],
-    "A-193": ["B8 ", "B8N", "B8T", "B8LN", "B8SH"],
-    "A-453": ["660"],
-    "A-564": ["630", "631", "635", "17-4PH", "17-7PH", "17-6PH"],
-    "F-593": ["F593A", "F593B", "F593C", "F593D", "1", "3", "4", 
-              "5", "6", "7"],
-    "A-540": ["630", "631", "635"],
-}
-# Pra dar um confere => norma nem sera usada, só o 'padrao'
-strings_especificas = {
-    "A193": ["B8 ", "B8N", "B8T", "B8LN", "B8SH", "B8 N", "B8 T", 
-             "B8 LN", "B8 SH"],
-    "A564": [
-        "17-4PH",
-        "17-7PH",
-        "17-6PH",
-        "17-4 PH",
-        "17-7 PH",
-        "17-6 PH",
-        "S17400",
-        "S17600",
-        "S17700",
-    ],
-    "F593": [
-        "F593A",
-        "F593B",
-        "F593C",
-        "F593D",
-        "F593 A",
-        "F593 B",
-        "F593 C",
-        "F593 D",
-        "F593-A",
-        "F593-B",
-        "F593-C",
-        "F593-D",
-    ],
-}
 
 def criar_janela():
     global janela_ativa
+    import tkinter
+    import tkinter.messagebox
+    import tkinter.scrolledtext
     janela = tkinter.Tk()  # Cria a janela principal do Tkinter
     janela.title("Investigador de B8")  # Define o título da janela
     janela.geometry("800x500")  # Define o tamanho da janela
     janela.aspect(16, 9, 16, 9)  # Define a proporção da janela
 
+    # Barra com o filtro e a busca no log
+    barra = tkinter.Frame(janela)
+    barra.pack(fill=tkinter.X, padx=10, pady=(10, 0))
+
+    filtro_var = tkinter.BooleanVar()
+
+    def alternar_filtro():
+        if isinstance(sys.stdout, RedirectText):
+            sys.stdout.alternar_filtro(filtro_var.get())
+
+    tkinter.Checkbutton(
+        barra, text="Só achados e erros", variable=filtro_var,
+        command=alternar_filtro,
+    ).pack(side="left")
+
+    busca_var = tkinter.StringVar()
+    entrada_busca = tkinter.Entry(barra, textvariable=busca_var, width=30)
+    entrada_busca.pack(side="right")
+    tkinter.Label(barra, text="Buscar no log:").pack(side="right")
+
+    # Busca incremental: espera o cara parar de digitar um pouquinho antes de
+    # varrer o arquivo de log
+    busca_agendada = None
+
+    def buscar():
+        nonlocal busca_agendada
+        busca_agendada = None
+        if isinstance(sys.stdout, RedirectText):
+            sys.stdout.buscar(busca_var.get())
+
+    def agendar_busca(_evento=None):
+        nonlocal busca_agendada
+        if busca_agendada is not None:
+            janela.after_cancel(busca_agendada)
+        busca_agendada = janela.after(300, buscar)
+
+    entrada_busca.bind("<KeyRelease>", agendar_busca)
+
+    # Tabela dos achados, liberada quando a varredura termina
+    botao_resultados = tkinter.Button(barra, text="Ver resultados",
+                                      state="disabled")
+    botao_resultados.pack(side="left", padx=(10, 0))
+
     # Cria um widget ScrolledText para exibir texto com barra de rolagem
     texto_saida = tkinter.scrolledtext.ScrolledText(
         janela, wrap=tkinter.WORD, width=120, height=30, font=("Courier", 10)
@@ -294,24 +590,51 @@ def criar_janela():
     janela.protocol(
         "WM_DELETE_WINDOW", on_closing
     )  # Usuario clicou no x pra fechar a janela ? MALDITO!!!!!
-    return janela, texto_saida
+    return janela, texto_saida, botao_resultados
 
 
-def parse_arguments():
+def parse_arguments(argv=None):
     """
     Processa os argumentos da linha de comando.
 
     Argumentos:
-    Nenhum
+    argv (list): Lista de argumentos, se None usa os da linha de comando
 
     Retorna:
     Um objeto Namespace contendo os seguintes atributos:
     - debug (bool): Se o modo de depuração está ativado
     - som (bool): Se os avisos sonoros estão ativados
+    - sqlite (bool): Se deve gravar também o banco SQLite
+    - xlsx (bool): Se deve gravar também a planilha Excel
+    - recursivo (bool): Se deve processar também os subdiretórios
+    - sem_cache (bool): Se deve ignorar o cache de texto extraído
+    - cache_dir (str): Diretório do cache de texto
+    - cache_limite_mb (float): Tamanho máximo do cache de texto, em MB
+    - janela (int): Quantas linhas seguidas entram na busca norma + padrão
+    - tempo_limite (float): Tempo máximo de extração por arquivo, segundos
+    - memoria_limite_mb (float): Memória máxima da extração, em MB
+    - metricas_porta (int): Porta pra servir as métricas, 0 não serve
+    - rebusca (bool): Refaz só a busca, em lote, sobre o texto do cache
+    - indice (bool): Atualiza o índice de texto com os arquivos processados
+    - indice_dir (str): Diretório do índice de texto
+    - memo_limite_mb (float): Memória máxima da memória de linhas, em MB
+    - extratores (int): Arquivos extraídos ao mesmo tempo, 0 automático
+    - fila_leitura (int): Arquivos lidos esperando a extração
+    - fila_extracao (int): Arquivos extraídos esperando a busca
+    - perfil (list): Arquivos JSON dos perfis de regras extras
+    - sem_historico (bool): Se não deve comparar com a execução anterior
+    - historico_dir (str): Diretório do histórico de resultados
     - diretorio (str): O diretório a ser processado (padrão é o atual)
 
     Uso na linha de comando:
-    python script.py [-d] [-s] [diretorio]
+    python script.py [-d] [-s] [-r] [-j N] [--sqlite] [--xlsx] [--sem-cache]
+                     [--cache-dir DIR] [--cache-limite-mb MB]
+                     [--tempo-limite SEG] [--memoria-limite-mb MB]
+                     [--metricas-porta PORTA] [--rebusca]
+                     [--indice] [--indice-dir DIR] [--memo-limite-mb MB]
+                     [--extratores N] [--fila-leitura N] [--fila-extracao N]
+                     [--perfil ARQUIVO.json ...] [--sem-historico]
+                     [--historico-dir DIR] [diretorio]
     """
     parser = argparse.ArgumentParser(
         description="Processador de PDFs para busca de materiais proibidos"
@@ -322,11 +645,94 @@ def parse_arguments():
     parser.add_argument(
         "-s", "--som", action="store_true", help="Ativar avisos sonoros"
     )
+    parser.add_argument(
+        "-r", "--recursivo", action="store_true",
+        help="Processar também os subdiretórios"
+    )
+    parser.add_argument(
+        "-j", "--janela", type=int, default=1,
+        help="Linhas seguidas em que norma e padrão são pareados (tabelas)"
+    )
+    parser.add_argument(
+        "--sqlite", action="store_true",
+        help="Gravar também os resultados num banco SQLite"
+    )
+    parser.add_argument(
+        "--xlsx", action="store_true",
+        help="Gravar também os resultados numa planilha Excel"
+    )
+    parser.add_argument(
+        "--sem-cache", action="store_true",
+        help="Não usar o cache de texto extraído"
+    )
+    parser.add_argument(
+        "--cache-dir", default=cache_texto.DIRETORIO_PADRAO,
+        help="Diretório do cache de texto extraído"
+    )
+    parser.add_argument(
+        "--cache-limite-mb", type=float, default=cache_texto.LIMITE_PADRAO_MB,
+        help="Tamanho máximo do cache de texto extraído, em MB"
+    )
+    parser.add_argument(
+        "--tempo-limite", type=float, default=900,
+        help="Tempo máximo de extração por arquivo, em segundos (0 desliga)"
+    )
+    parser.add_argument(
+        "--memoria-limite-mb", type=float, default=4096,
+        help="Memória máxima da extração de um arquivo, em MB (0 desliga)"
+    )
+    parser.add_argument(
+        "--metricas-porta", type=int, default=0,
+        help="Servir as métricas (Prometheus) em http://127.0.0.1:PORTA/metrics"
+    )
+    parser.add_argument(
+        "--rebusca", action="store_true",
+        help="Refazer só a busca, em lote (pandas), sobre o texto do cache"
+    )
+    parser.add_argument(
+        "--indice", action="store_true",
+        help="Atualizar o índice de texto com os arquivos processados"
+    )
+    parser.add_argument(
+        "--indice-dir", default=indice_texto.DIRETORIO_PADRAO,
+        help="Diretório do índice de texto"
+    )
+    parser.add_argument(
+        "--memo-limite-mb", type=float, default=LIMITE_MEMO_MB,
+        help="Memória máxima da memória de linhas repetidas, em MB "
+             "(0 desliga)"
+    )
+    parser.add_argument(
+        "--extratores", type=int, default=0,
+        help="Arquivos extraídos ao mesmo tempo (um processo cada), 0 "
+             "escolhe pela máquina"
+    )
+    parser.add_argument(
+        "--fila-leitura", type=int, default=esteira.FILA_LEITURA,
+        help="Arquivos lidos antes, esperando a extração"
+    )
+    parser.add_argument(
+        "--fila-extracao", type=int, default=esteira.FILA_EXTRACAO,
+        help="Arquivos extraídos antes, esperando a busca"
+    )
+    parser.add_argument(
+        "--perfil", action="append", default=[], metavar="ARQUIVO.json",
+        help="Perfil de regras (especificação) pesquisado junto com a lista "
+             "de parafusos, pode repetir"
+    )
+    parser.add_argument(
+        "--sem-historico", action="store_true",
+        help="Não comparar os resultados com os da execução anterior"
+    )
+    parser.add_argument(
+        "--historico-dir", default=historico.DIRETORIO_PADRAO,
+        help="Diretório do histórico de resultados"
+    )
     parser.add_argument(
         "diretorio", nargs="?", default=".", help="Diretório a ser processado"
     )
 
-    return parser.parse_args()
+    return parser.parse_args(argv)
 
 
 def exibir_versoes_bibliotecas(bibliotecas):
@@ -339,6 +745,7 @@ def exibir_versoes_bibliotecas(bibliotecas):
 
     :param bibliotecas: Lista de nomes de bibliotecas a serem verificadas.
     """    
+    import pkg_resources
     # Lista para armazenar bibliotecas não encontradas    
     nao_encontradas = []
 
@@ -420,109 +827,187 @@ def dados_sistema():
     print()
     return
 
-def buscar_parafusos(texto, page_num, linha_num):
+def relatar_arquivo(nome_arquivo, status, resultados,
+                    paginas_em_branco_ou_nao_pesquisaveis, total_paginas,
+                    interrupcao=None, original=None, paginas_imagem=()):
     """
-    Busca por normas e padrões específicos em um texto e retorna os resultados 
-    encontrados.
-
-    :param texto: O texto onde a busca será realizada.
-    :param page_num: O número da página onde o texto está localizado.
-    :param linha_num: O número da linha onde o texto está localizado.
-    :return: Um dicionário com as normas encontradas e seus respectivos
-      padrões, páginas e linhas.
+    Monta a linha da tabela CSV e o trecho do relatório de um arquivo.
+
+    :param nome_arquivo: Nome do arquivo PDF.
+    :param status: "SIM", "NAO", "TIMEOUT" ou "OOM" (ver status_arquivo).
+    :param resultados: Dicionário de resultados da busca.
+    :param paginas_em_branco_ou_nao_pesquisaveis: Lista de páginas.
+    :param total_paginas: Quantidade de páginas do PDF.
+    :param interrupcao: (motivo, paginas lidas) ou None.
+    :param original: Caminho do original, se o arquivo for uma cópia.
+    :param paginas_imagem: Páginas só com imagem (ver triagem.py), pra OCR
+    ou validação manual.
+    :return: 'Tuple' com a linha CSV e a lista de linhas do relatório.
     """
-    # Dicionário para armazenar os resultados da busca
-    resultados = {}
+    relatorio = []
+    # Prepara as informações para o CSV
+
+    # Verifica se há páginas em branco ou não pesquisáveis
+    if paginas_em_branco_ou_nao_pesquisaveis:
+        # Converte cada número de página em uma string e 
+        # converte o resultado do map em uma lista.
+        paginas_str_list = list(
+            map(str, paginas_em_branco_ou_nao_pesquisaveis)
+        )
+        # Junta as strings em uma única, separadas por ", "
+        paginas_str = ", ".join(paginas_str_list)
+    # Se não houver páginas em branco ou não pesquisáveis, 
+    # define a string como vazia
+    else:
+        paginas_str = ""
+
+    # Só a página 1 sem texto, na planilha vira documento
+    # não pesquisável
+    paginas_csv = paginas_str
+    if paginas_csv == "1":
+        paginas_csv = "Documento não pesquisável"
+
+    # Prepara a linha CSV com o status do arquivo (SIM se contém
+    # materiais proibidos)
+    linha_csv = f"{nome_arquivo};{status};{paginas_csv};"
+    # Lista para armazenar os detalhes dos resultados 
+    # encontrados
+    detalhes = []
+    if interrupcao:
+        detalhes.append(
+            f"Interrompido: lidas {interrupcao[1]} de "
+            f"{total_paginas} páginas"
+        )
+    # Deixa bonitinho a norma seguido do que nao pode
+    for norma, padroes in resultados.items():
+        norma_str = formatar_norma(norma)
+
+        for padrao in padroes:
+            detalhes.append(
+                f"{norma_str} - {padrao[0]} (Página"
+                 f"{padrao[1]}, Linha {padrao[2]}"
+                 f"{formatar_linha_norma(padrao)})"
+            )
+
+    # Junta todos os detalhes em uma única string separada
+    #  por ponto e vírgula e adiciona à linha CSV
+    linha_csv += ";".join(detalhes)
+
+    # Adiciona informações ao relatório
+    relatorio.append("")
+    relatorio.append(
+    "/////////////////////////////////////////////////////////"
+    )
+    relatorio.append(f"Processado.....: {nome_arquivo}")
+    if original:
+        relatorio.append(f"Cópia idêntica de: {original}")
+
+    if resultados:
+        for norma, padroes in resultados.items():
+            # Se for norma ASTM prefixa com "ASTM"
+            norma_str = formatar_norma(norma)
+
+            relatorio.append(f"{norma_str}:")
 
-    # Roda tudo, tem que procurar se nao nao acha!
-    for norma, padroes in normas.items():
-        # Verifica se a norma está presente no texto (busca case-insensitive)
-        if re.search(r"\b" + re.escape(norma) + r"\b", texto, re.IGNORECASE):
             for padrao in padroes:
-                # Verifica se o padrão está presente no texto
-                if re.search(r"\b" + re.escape(padrao) + r"\b", texto,
-                              re.IGNORECASE):
-                    # Se não estiver nos resultados, adiciona
-                    if norma not in resultados:
-                        resultados[norma] = []
-                    # Adiciona o padrão, número da página e número da linha
-                    #  aos resultados
-                    resultados[norma].append((padrao, page_num, linha_num))
-    return resultados  # Retorna o dicionário de resultados
-
-
-def buscar_parafusos_perdidos(texto, page_num, linha_num, 
-                              resultados_existentes):
-    """
-    Busca por strings específicas em um texto e retorna os resultados 
-    encontrados, evitando duplicatas.
-    Deve ser sempre executada após a execucao da buscar_parafusos
-    :param texto: O texto onde a busca será realizada.
-    :param page_num: O número da página onde o texto está localizado.
-    :param linha_num: O número da linha onde o texto está localizado.
-    :param resultados_existentes: Dicionário com resultados já existentes 
-    para evitar duplicatas.
-    :return: Um dicionário com as normas encontradas e suas respectivas 
-    strings, páginas e linhas.
-    """
-    # Dicionário para armazenar os resultados da busca
-    resultados = {}
-    # Conjunto para rastrear combinações já adicionadas
-    combinacoes_ja_adicionadas = set()
-
-    for norma, strings in strings_especificas.items():
-        for string in strings:
-            # Cria um padrão de busca que permite espaços opcionais entre
-            #  as palavras
-            pattern = r"\b" + re.escape(string).replace(r"\ ", r"\s*") + r"\b"
-            # Verifica se a string está presente no texto
-            if re.search(pattern, texto, re.IGNORECASE):
-                duplicado = False
-                # Verifica se a string já foi encontrada nos resultados 
-                # existentes
-                for norma_existente, padroes in resultados_existentes.items():
-                    for padrao in padroes:
-                        if (
-                            string == padrao[0]
-                            and page_num == padrao[1]
-                            and linha_num == padrao[2]
-                        ):
-                            if d_on:
-                                print(
-                                    f"Opa, aqui eu já tinha achado..."
-                                    f" Padrão: {padrao[0]}, Página: "
-                                    f"{padrao[1]}, Linha: {padrao[2]}"
-                                )
-                            duplicado = True
-                            break
-                    if duplicado:
-                        break
-                # Se a string não for duplicada, adiciona aos resultados
-                if not duplicado:
-                    if norma not in resultados:
-                        resultados[norma] = []
-                    resultados[norma].append((string, page_num, linha_num))
-                    combinacoes_ja_adicionadas.add((string, page_num, 
-                                                    linha_num))
-                    print(
-                        f"** Localizado proibido !** Norma: {norma}, "
-                        f"Padrão: {string}, Página: {page_num}, Linha: "
-                        f"{linha_num}"
-                    )
-                    print(f"**Conteudo da linha** {texto}")
-                    if som:
-                        winsound.Beep(1000, 500)
-    return resultados  # Retorna o dicionário de resultados
+                relatorio.append(
+                    f" - {padrao[0]} (Página {padrao[1]},"
+                     f" Linha {padrao[2]}"
+                     f"{formatar_linha_norma(padrao)})"
+                )
+    else:
+        relatorio.append(
+            "Não localizado nenhum BOLTING MATERIALS proibido "
+            "no documento."
+        )
+
+    if paginas_em_branco_ou_nao_pesquisaveis:
+        relatorio.append(f"A T E N Ç Ã O")
+        relatorio.append(
+             "Páginas em branco ou não pesquisáveis: "
+            f"{paginas_str}"
+        )
+    if paginas_imagem:
+        relatorio.append(
+            "Páginas só com imagem (OCR ou validação manual): "
+            f"{', '.join(map(str, paginas_imagem))}"
+        )
+
+    if interrupcao:
+        relatorio.append(f"A T E N Ç Ã O")
+        relatorio.append(
+            f"Processamento interrompido ({interrupcao[0]}) depois "
+            f"de {interrupcao[1]} de {total_paginas} páginas. "
+            "Valide o restante manualmente."
+        )
 
+    return linha_csv, relatorio
 
-def processar_pdfs_no_diretorio(diretorio):
+
+def processar_pdfs_no_diretorio(diretorio, saidas=(), recursivo=False,
+                                cache=None, janela=1, extrator=None,
+                                indice=None, avisar=None, memo=None,
+                                extratores=None,
+                                fila_leitura=esteira.FILA_LEITURA,
+                                fila_extracao=esteira.FILA_EXTRACAO,
+                                regulador=None, maiores_primeiro=True,
+                                triar=True, perfis=None):
     """
     Processa todos os arquivos PDF no diretório especificado, buscando por 
     normas e padrões específicos, gera um relatório e uma tabela CSV com os
       resultados.
 
+    Cópias idênticas do mesmo PDF (mesmo conteúdo, byte a byte) são
+    analisadas uma vez só, as demais reaproveitam o resultado e aparecem
+    no relatório apontando pro original.
+
+    Leitura e extração andam na frente, em segundo plano (ver esteira.py):
+    enquanto um arquivo é pesquisado os próximos já estão sendo lidos e
+    extraídos. A busca, o relatório e as saídas continuam aqui, na ordem.
+
+    Os arquivos são processados dos maiores pros menores (ver
+    autoajuste.py), mas o relatório e o CSV saem na ordem da listagem, como
+    sempre.
+
+    Na leitura de cada arquivo, a esteira faz uma triagem rápida (ver
+    triagem.py) que lê só a estrutura do PDF, nos bytes já lidos: arquivo
+    ilegível sai com erro sem passar pela extração, página sem fonte não é
+    extraída, página só com imagem vai pro relatório como pendência de OCR,
+    e as páginas dão o progresso e a previsão de término.
+
+    Com vários perfis de regras (especificações), cada página é extraída e
+    normalizada uma vez e pesquisada com todos; o relatório e o CSV saem com
+    uma seção por perfil.
+
     :param diretorio: Caminho do diretório onde os arquivos PDF estão 
     localizados.
+    :param saidas: Saídas estruturadas (ver saidas_estruturadas.py) que
+    recebem o resultado de cada arquivo assim que ele termina.
+    :param recursivo: Se True, processa também os subdiretórios.
+    :param cache: Objeto CacheTexto com o texto já extraído em execuções
+    anteriores, ou None pra extrair tudo de novo.
+    :param janela: Quantas linhas seguidas são consideradas juntas na busca
+    da norma + padrão. 1 é só a mesma linha.
+    :param extrator: Objeto extracao.ExtratorIsolado pra extrair cada PDF
+    num processo vigiado, com limite de tempo e memória. Arquivo que passa
+    do limite vai pro relatório como TIMEOUT ou OOM com as páginas lidas.
+    :param indice: Objeto indice.IndiceInvertido pra atualizar com o texto
+    de cada arquivo (consultas avulsas depois), ou None.
+    :param avisar: Chamada a cada item proibido encontrado (o
+    avisos.Avisador com -s), ou None. Não pode demorar, roda no meio da
+    busca.
+    :param memo: Objeto MemoLinhas compartilhado pela execução inteira, ou
+    None pra buscar toda linha de novo.
+    :param extratores: Lista de extratores (uma thread de extração pra
+    cada), no lugar do 'extrator' sozinho.
+    :param fila_leitura: Arquivos lidos esperando a extração.
+    :param fila_extracao: Arquivos extraídos esperando a busca.
+    :param regulador: Objeto autoajuste.Regulador que segura os extratores
+    com a memória apertada, ou None.
+    :param maiores_primeiro: Se True, processa os maiores arquivos antes.
+    :param triar: Se True, faz a triagem de cada arquivo antes de extrair.
+    :param perfis: Lista de objetos varredura.Perfil (ver montar_perfis), ou
+    None pra só a lista de parafusos de sempre.
     :return: 'Tuple' contendo o relatório, a tabela CSV e o contador de 
     PDFs processados.
     """
@@ -536,242 +1021,453 @@ def processar_pdfs_no_diretorio(diretorio):
     contador_pdfs = 0
 
     # Lista todos os arquivos PDF no diretório
-    arquivos_pdf = [
-        nome_arquivo
-        for nome_arquivo in os.listdir(diretorio)
-        if nome_arquivo.lower().endswith(".pdf")
-    ]
+    arquivos_pdf = listar_pdfs(diretorio, recursivo)
     total_arquivos = len(arquivos_pdf)  # Total de arquivos PDF encontrados
-
-    for nome_arquivo in arquivos_pdf:
-        # Obtém o caminho completo do arquivo PDF
-        caminho_completo = os.path.normpath(os.path.join(diretorio,
-                                                          nome_arquivo))
-
-        # Aquele confere só pra garantir
-        if nome_arquivo.lower().endswith(".pdf"):
+    # Ordem em que são processados. O relatório volta pra ordem da listagem
+    # no fim.
+    ordem = arquivos_pdf
+    if maiores_primeiro:
+        ordem = autoajuste.maiores_primeiro(arquivos_pdf)
+    # Linha do CSV e trecho do relatório de cada arquivo, por caminho
+    trechos = {}
+
+    # Procura cópias do mesmo documento antes de começar. Só calcula hash
+    # de quem tem tamanho repetido, o resto nem é lido aqui. O original é o
+    # primeiro a ser processado.
+    duplicatas = duplicados.mapear_duplicados(
+        [caminho for _, caminho in ordem]
+    )
+    if duplicatas:
+        log.info("**Encontradas %s cópias de arquivos, serão analisadas uma"
+                 " vez só.**", len(duplicatas))
+    # Resultado dos originais que têm cópia, pra reaproveitar
+    originais = set(duplicatas.values())
+    resultados_originais = {}
+    # Hash do conteúdo de cada arquivo, quando a esteira calculou (cópia usa
+    # o do original)
+    hashes = {}
+
+    # Só quem não é cópia vai pra esteira, na ordem de processamento
+    a_extrair = [(nome, caminho) for nome, caminho in ordem
+                 if caminho not in duplicatas]
+
+    # Triagem de cada arquivo, feita pela esteira na leitura (a cópia usa a
+    # do original)
+    triagens = {}
+    # O total de páginas cresce conforme a esteira faz a triagem
+    progresso = triagem.Progresso(0)
+    # Pendências de OCR (páginas só com imagem), por arquivo
+    pendencias_ocr = []
+
+    fila = esteira.Esteira(
+        a_extrair, cache, extratores or [extrator], fila_leitura,
+        fila_extracao, regulador=regulador, triar=triar,
+    )
+    proximo = iter(fila)
+    try:
+        for nome_arquivo, caminho_completo in ordem:
             # Indica que pelo menos um arquivo PDF foi encontrado
             encontrou_pdf = True
             # Incrementa o contador de arquivos PDF processados
             contador_pdfs += 1
-            # Marca o tempo de início do processamento
-            start_time = time.time()
-            # Calcula o tamanho do arquivo em MB
-            tamanho_arquivo_bytes = os.path.getsize(caminho_completo)
-            tamanho_arquivo_mb = tamanho_arquivo_bytes / (1024 * 1024)
-            print(
-                f"**Processando o arquivo: {contador_pdfs} de {total_arquivos}"
-                 f" ** {nome_arquivo}"
-            )
+            log.info("**Processando o arquivo: %s de %s ** %s", contador_pdfs,
+                     total_arquivos, nome_arquivo)
             # força envio da mensagem pra tela, pro usuario saber que mudou 
             # de arquivo e nao ficar desesperado achando que travou
+            import tkinter
             tkinter.Tk.update(tkinter._default_root)
+            # Marca o tempo de início do processamento
+            start_time = time.time()
+            tamanho_arquivo_bytes = 0
+            # Tempo da leitura e da extração, feitas antes na esteira
+            tempo_esteira = 0.0
 
-            # Flag para indicar se o PDF é pesquisável
-            pdf_pesquisavel = False
-            # Lista para páginas em branco ou não pesquisáveis
-            paginas_em_branco_ou_nao_pesquisaveis = []
+            original = duplicatas.get(caminho_completo)
+            if original is not None:
+                hashes[caminho_completo] = hashes.get(original)
 
             try:
-                # Abre o arquivo PDF para leitura
-                with open(caminho_completo, "rb") as pdf_file:
-                    # Aqui a verdadeira magia acontece! Cria o leitor de PDF
-                    pdf_reader = PyPDF2.PdfReader(pdf_file)
-                    # Obtém o total de páginas no PDF
-                    total_paginas = len(pdf_reader.pages)
-
-                    if d_on:
-                        print(f"Arquivo possui {total_paginas} paginas.")
-
-                    # Dicionário para armazenar os resultados da busca
-                    resultados = {}
-
-                    # Roda o pdf todo
-                    for page_num in range(len(pdf_reader.pages)):
-                        # Obtém o objeto da página corrente
-                        page_obj = pdf_reader.pages[page_num]
-                        if d_on:
-                            print(f"** Lendo página {page_num+1} de "
-                                  f"{total_paginas} **")
-                        try:
-                            # Extrai o texto da página
-                            text = page_obj.extract_text()
-                            # tinha texto ? Marca que o PDF é pesquisável
-                            if text:
-                                pdf_pesquisavel = True
-                                # Divide o texto da pagina em linhas
-                                linhas = text.splitlines()
-                                # Roda cada linha dessa pagina
-                                for linha_num, linha in enumerate(linhas, start=1):
-                                    if d_on:
-                                        print(f"**Linha {linha_num}:** {linha}")
-                                    # print(f"Texto da linha: {repr(linha)}")
-                                    # if "B8 " in linha:
-                                    #    print(f"'B8' encontrado em: {linha}")
-
-                                    # Vamos procurar pra ver se acha alguma coisa
-                                    resultados_paragrafo = buscar_parafusos(
-                                        linha, page_num + 1, linha_num
-                                    )
-                                    # Bateu preguiça aqui, vai ultrapassar a coluna 79
-                                    for norma, padroes in resultados_paragrafo.items():
-                                        for padrao in padroes:
-                                            print(
-                                                f"**Achei um proibido!** Página {padrao[1]}, Linha {padrao[2]}: {norma} - {padrao[0]}"
-                                            )
-                                            print(f"**Conteudo da linha** {linha}")
-                                            if som:
-                                                winsound.Beep(1000, 500)
-                                            if norma not in resultados:
-                                                resultados[norma] = []
-                                            resultados[norma].append(padrao)
-
-                                    # Vai la e da um confere antes, vai que passou algo
-                                    resultados_especificas = buscar_parafusos_perdidos(
-                                        linha, page_num + 1, linha_num, resultados
-                                    )
-
-                                    for (
-                                        norma,
-                                        padroes,
-                                    ) in resultados_especificas.items():
-                                        if norma not in resultados:
-                                            resultados[norma] = []
-                                        # pulo do gato, afinal aqui é a repescagem
-                                        resultados[norma].extend(padroes)
-                            # Nao tinha texto na pagina
-                            else:
-                                paginas_em_branco_ou_nao_pesquisaveis.append(
-                                    page_num + 1
-                                )
-                                if d_on:
-                                    print(f"** Pagina não pesquisavel ou em branco.**")
-                        except Exception as e:
-                            print(f"**Erro ao ler o PDF:** {e}")
-                            # Exibe o traceback do erro, seila, vai que...
-                            traceback.print_exc()
-
-                    # Prepara as informações para o CSV
-
-                    # Verifica se há páginas em branco ou não pesquisáveis
-                    if paginas_em_branco_ou_nao_pesquisaveis:
-                        # Converte cada número de página em uma string e 
-                        # converte o resultado do map em uma lista.
-                        paginas_str_list = list(
-                            map(str, paginas_em_branco_ou_nao_pesquisaveis)
-                        )
-                        # Junta as strings em uma única, separadas por ", "
-                        paginas_str = ", ".join(paginas_str_list)
-                    # Se não houver páginas em branco ou não pesquisáveis, 
-                    # define a string como vazia
-                    else:
-                        paginas_str = ""
-
-                    # Se houver resultados, prepara a linha CSV indicando que 
-                    # o arquivo contém materiais proibidos
-                    if resultados:
-                        linha_csv = f"{nome_arquivo};SIM;{paginas_str};"
-                        # Lista para armazenar os detalhes dos resultados 
-                        # encontrados
-                        detalhes = []
-                        # Deixa bonitinho a norma seguido do que nao pode
-                        for norma, padroes in resultados.items():
-                            norma_str = (
-                                f"ASTM {norma}"
-                                if norma in ["A193", "A453", "A564", "F593", 
-                                             "A540"]
-                                else norma
-                            )
-
-                            for padrao in padroes:
-                                detalhes.append(
-                                    f"{norma_str} - {padrao[0]} (Página"
-                                     f"{padrao[1]}, Linha {padrao[2]})"
-                                )
-
-                        # Junta todos os detalhes em uma única string separada
-                        #  por ponto e vírgula e adiciona à linha CSV
-                        linha_csv += ";".join(detalhes)
-
-                    # Se não houver resultados, prepara a linha CSV indicando 
-                    # que o arquivo não contém materiais proibidos
-                    else:
-                        linha_csv = f"{nome_arquivo};NAO;{paginas_str};"
-
-                    # Adiciona a linha à tabela
-                    tabela_csv.append(linha_csv)
-
-                    # Adiciona informações ao relatório
-                    relatorio.append("")
-                    relatorio.append(
-                    "/////////////////////////////////////////////////////////"
+                if original is not None:
+                    # Cópia de um arquivo que já foi analisado, nem abre
+                    tamanho_arquivo_bytes = os.path.getsize(caminho_completo)
+                    resultado_original = resultados_originais[original]
+                    if isinstance(resultado_original, Exception):
+                        # Mesmo conteúdo, mesmo erro do original
+                        raise resultado_original
+                    log.info("**Cópia idêntica de %s, reaproveitando o "
+                             "resultado.**", original)
+                    (resultados, paginas_em_branco_ou_nao_pesquisaveis,
+                     total_paginas, pdf_pesquisavel, interrupcao) = (
+                        resultado_original
                     )
-                    relatorio.append(f"Processado.....: {nome_arquivo}")
-
-                    if resultados:
-                        for norma, padroes in resultados.items():
-                            #
-                            # Se a norma estiver na lista abaixo prefixe com
-                            #  "ASTM"
-                            #
-                            if norma in ["A193", "A453", "A564", "F593", 
-                                         "A540"]:
-                                norma_str = f"ASTM {norma}"
-                            else:
-                                # Caso contrário, usa a norma como está
-                                norma_str = norma
-
-                            relatorio.append(f"{norma_str}:")
-
-                            for padrao in padroes:
-                                relatorio.append(
-                                    f" - {padrao[0]} (Página {padrao[1]},"
-                                     f" Linha {padrao[2]})"
-                                )
-                    else:
-                        relatorio.append(
-                            "Não localizado nenhum BOLTING MATERIALS proibido "
-                            "no documento."
+                    if indice is not None:
+                        indice.vincular(caminho_completo, original)
+                else:
+                    # Pega o próximo da esteira, já lido e extraído (ou
+                    # espera ficar pronto)
+                    extraido = next(proximo)
+                    start_time = time.time()
+                    tamanho_arquivo_bytes = extraido.tamanho
+                    tempo_esteira = extraido.tempo_s
+                    hashes[caminho_completo] = extraido.hash_arquivo
+                    if extraido.triagem is not None:
+                        triagens[caminho_completo] = extraido.triagem
+                    if extraido.erro is not None:
+                        raise extraido.erro
+                    # interrupcao é (motivo, paginas lidas) se a extração
+                    # foi interrompida
+                    (resultados, paginas_em_branco_ou_nao_pesquisaveis,
+                     total_paginas, pdf_pesquisavel, interrupcao) = (
+                        analisar_extraido(caminho_completo, extraido.extraido,
+                                          janela, indice, avisar, memo,
+                                          extraido.hash_arquivo, perfis)
+                    )
+                    if caminho_completo in originais:
+                        resultados_originais[caminho_completo] = (
+                            resultados, paginas_em_branco_ou_nao_pesquisaveis,
+                            total_paginas, pdf_pesquisavel, interrupcao,
                         )
 
-                    if paginas_em_branco_ou_nao_pesquisaveis:
-                        relatorio.append(f"A T E N Ç Ã O")
-                        relatorio.append(
-                             "Páginas em branco ou não pesquisáveis: "
-                            f"{paginas_str}"
-                        )
+                # Com perfis os resultados vêm por perfil; sem, é um só
+                # (None), sem seção no relatório
+                resultados_perfis = (
+                    {None: resultados} if perfis is None else resultados
+                )
+                # SIM (em qualquer perfil), NAO ou o motivo da interrupção
+                # (TIMEOUT, OOM)
+                status = status_arquivo(any(resultados_perfis.values()),
+                                        interrupcao)
+
+                # Páginas digitalizadas que a triagem achou
+                avaliacao = triagens.get(original or caminho_completo)
+                paginas_imagem = [
+                    numero + 1 for numero in (avaliacao.so_imagem
+                                              if avaliacao else ())
+                ]
+                if paginas_imagem:
+                    pendencias_ocr.append((nome_arquivo, paginas_imagem))
+
+                # Linha do CSV e trecho do relatório desse arquivo, um de
+                # cada perfil
+                trechos[caminho_completo] = {}
+                for nome_perfil, resultados_perfil in (
+                        resultados_perfis.items()):
+                    linha_csv, linhas_relatorio = relatar_arquivo(
+                        nome_arquivo,
+                        status_arquivo(resultados_perfil, interrupcao),
+                        resultados_perfil,
+                        paginas_em_branco_ou_nao_pesquisaveis, total_paginas,
+                        interrupcao, original, paginas_imagem,
+                    )
+                    if nome_perfil is not None:
+                        linha_csv = f"{nome_perfil};{linha_csv}"
+                    trechos[caminho_completo][nome_perfil] = (
+                        linha_csv, linhas_relatorio
+                    )
 
                 end_time = time.time()
-                elapsed_time = end_time - start_time
+                elapsed_time = end_time - start_time + tempo_esteira
+                tamanho_arquivo_mb = tamanho_arquivo_bytes / (1024 * 1024)
+                paginas_analisadas = (
+                    interrupcao[1] if interrupcao else total_paginas
+                )
                 msg_analisado = (
-                    f"Analisadas {total_paginas} paginas, arquivo com "
+                    f"Analisadas {paginas_analisadas} paginas, arquivo com "
                     f"{tamanho_arquivo_mb:.3f} MB decorridos "
                     f"{elapsed_time:.2f} segundos." )
-                print(f"**{msg_analisado}")
-                relatorio.append(msg_analisado)
-                print()
+                log.info("**%s", msg_analisado)
+                for _, linhas_relatorio in trechos[caminho_completo].values():
+                    linhas_relatorio.append(msg_analisado)
+                if original is None and triar:
+                    log.info("%s", progresso.avancar(
+                        total_paginas, fila.paginas_previstas()
+                    ))
+                log.info("")
+
+                # Manda o resultado desse arquivo pras saídas estruturadas
+                registro = saidas_estruturadas.registro_arquivo(
+                    nome_arquivo, caminho_completo,
+                    status, total_paginas,
+                    paginas_em_branco_ou_nao_pesquisaveis,
+                    tamanho_arquivo_bytes, elapsed_time, duplicata_de=original,
+                    hash_arquivo=hashes.get(caminho_completo),
+                )
+                achados = []
+                for nome_perfil, resultados_perfil in (
+                        resultados_perfis.items()):
+                    achados.extend(saidas_estruturadas.registros_achados(
+                        nome_arquivo, caminho_completo, resultados_perfil,
+                        formatar_norma, nome_perfil or PERFIL_PADRAO.nome,
+                    ))
+                for saida in saidas:
+                    saida.gravar_arquivo(registro, achados)
+                metricas.METRICAS.registrar_arquivo(registro, achados)
 
             except Exception as e:
-                print(f"**Erro ao abrir o arquivo:** {e}")
+                log.error("**Erro ao abrir o arquivo:** %s", e)
+                log.debug("%s", traceback.format_exc())
+                if caminho_completo in originais:
+                    resultados_originais[caminho_completo] = e
+                # Arquivo com erro tambem fica registrado, pra ninguem achar
+                # que ele passou limpo
+                registro = saidas_estruturadas.registro_arquivo(
+                    nome_arquivo, caminho_completo, "ERRO",
+                    tamanho_bytes=tamanho_arquivo_bytes,
+                    tempo_s=time.time() - start_time + tempo_esteira,
+                    erro=str(e), hash_arquivo=hashes.get(caminho_completo),
+                )
+                for saida in saidas:
+                    saida.gravar_arquivo(registro, [])
+                metricas.METRICAS.registrar_arquivo(registro, [])
+                if original is None and caminho_completo in triagens:
+                    progresso.avancar(
+                        triagens[caminho_completo].total_paginas,
+                        fila.paginas_previstas(),
+                    )
                 continue
 
-            if not pdf_pesquisavel:
-                print(f"A T E N Ç Ã O")
-                print(
-                    f"O arquivo '{nome_arquivo}' não é pesquisável. Por favor,"
-                     " realize a validação manualmente."
+            if not pdf_pesquisavel and not interrupcao:
+                log.warning("A T E N Ç Ã O")
+                log.warning("O arquivo '%s' não é pesquisável. Por favor, "
+                            "realize a validação manualmente.", nome_arquivo)
+                log.info("")
+    finally:
+        fila.close()
+    # Relatório e CSV na ordem da listagem, uma seção por perfil
+    secoes = [None] if perfis is None else [perfil.nome for perfil in perfis]
+    for nome_perfil in secoes:
+        if nome_perfil is not None:
+            relatorio.extend([
+                "",
+                "=========================================================",
+                f"Perfil: {nome_perfil}",
+                "=========================================================",
+            ])
+        for _, caminho_completo in arquivos_pdf:
+            if caminho_completo in trechos:
+                linha_csv, linhas_relatorio = (
+                    trechos[caminho_completo][nome_perfil]
                 )
-                print()
+                tabela_csv.append(linha_csv)
+                relatorio.extend(linhas_relatorio)
+    if pendencias_ocr:
+        log.warning("Páginas só com imagem, pra OCR ou validação manual:")
+        for nome_arquivo, paginas_imagem in pendencias_ocr:
+            log.warning("  %s: páginas %s", nome_arquivo,
+                        ", ".join(map(str, paginas_imagem)))
+        log.info("")
+    if encontrou_pdf:
+        if triagens:
+            for linha in triagem.resumo(triagens):
+                log.info("%s", linha)
+        for linha in fila.relatorio():
+            log.info("%s", linha)
+        log.info("")
 
     if not encontrou_pdf:
-        print(f"**Diretorio nao contem arquivos pdf**")
-        print()
+        log.info("**Diretorio nao contem arquivos pdf**")
+        log.info("")
 
     return relatorio, tabela_csv, contador_pdfs
 
 
+def rebuscar_pdfs_no_diretorio(diretorio, saidas=(), recursivo=False,
+                               cache=None, janela=1, extrator=None,
+                               indice=None,
+                               tamanho_bloco=None):
+    """
+    Refaz a busca em todos os PDFs do diretório com o texto que já está no
+    cache, usando a busca vetorizada do rebusca.py (pandas). É pra quando
+    muda a lista de normas: o arquivo morto inteiro é reavaliado sem extrair
+    nada de novo e sem a busca linha a linha.
+
+    Arquivo que ainda não está no cache é extraído normalmente (e entra no
+    cache). O resultado sai no mesmo formato do processar_pdfs_no_diretorio.
+
+    :param diretorio: Caminho do diretório onde os arquivos PDF estão.
+    :param saidas: Saídas estruturadas que recebem o resultado de cada
+    arquivo.
+    :param recursivo: Se True, processa também os subdiretórios.
+    :param cache: Objeto CacheTexto com o texto já extraído.
+    :param janela: Quantas linhas seguidas são consideradas juntas na busca
+    da norma + padrão. 1 é só a mesma linha.
+    :param extrator: Objeto extracao.ExtratorIsolado pros arquivos que não
+    estão no cache, ou None.
+    :param indice: Objeto indice.IndiceInvertido pra atualizar com o texto
+    de cada arquivo, ou None.
+    :param tamanho_bloco: Quantas linhas de texto vão pra cada bloco da
+    busca vetorizada, None usa o rebusca.TAMANHO_BLOCO.
+    :return: 'Tuple' contendo o relatório, a tabela CSV e o contador de
+    PDFs processados.
+    """
+    # Só carrega o pandas (rebusca.py) se alguém pediu a rebusca: o
+    # Procura_B8 é reimportado em cada processo de extração (spawn) e o
+    # pandas pesaria na memória de todos
+    import rebusca
+
+    if tamanho_bloco is None:
+        tamanho_bloco = rebusca.TAMANHO_BLOCO
+    relatorio = []
+    tabela_csv = []
+    arquivos_pdf = listar_pdfs(diretorio, recursivo)
+    total_arquivos = len(arquivos_pdf)
+    duplicatas = duplicados.mapear_duplicados(
+        [caminho for _, caminho in arquivos_pdf]
+    )
+    regras = rebusca.Regras(normas, strings_especificas)
+
+    def relatar_bloco(bloco):
+        achados_bloco, paginas_com_norma = rebusca.buscar_no_quadro(
+            rebusca.montar_quadro(
+                (numero, item["paginas"]) for numero, item in bloco.items()
+            ),
+            regras,
+        )
+        achados_por_arquivo = dict(tuple(achados_bloco.groupby("arquivo")))
+
+        for numero, item in bloco.items():
+            nome_arquivo = item["nome"]
+            paginas = item["paginas"]
+            resultados = {}
+            achados_por_pagina = {}
+            if numero in achados_por_arquivo:
+                achados_por_pagina = dict(
+                    tuple(achados_por_arquivo[numero].groupby("pagina"))
+                )
+            # Página a página, pra busca em janela ver o que a página ja
+            # deu, do mesmo jeito que na busca normal
+            for pagina in range(1, len(paginas) + 1):
+                if pagina in achados_por_pagina:
+                    for norma, padrao, linha in zip(
+                        achados_por_pagina[pagina]["norma"],
+                        achados_por_pagina[pagina]["padrao"],
+                        achados_por_pagina[pagina]["linha"],
+                    ):
+                        if norma not in resultados:
+                            resultados[norma] = []
+                        resultados[norma].append(
+                            Achado(padrao, pagina, int(linha))
+                        )
+                if janela > 1 and (numero, pagina) in paginas_com_norma:
+                    linhas = normalizacao.normalizar(
+                        paginas[pagina - 1]
+                    ).texto.splitlines()
+                    for norma, padroes in buscar_parafusos_janela(
+                        linhas, pagina, janela, resultados
+                    ).items():
+                        if norma not in resultados:
+                            resultados[norma] = []
+                        resultados[norma].extend(padroes)
+
+            paginas_em_branco_ou_nao_pesquisaveis = [
+                pagina for pagina, texto in enumerate(paginas, start=1)
+                if texto == ""
+            ]
+            interrupcao = item["interrupcao"]
+            total_paginas = item["total_paginas"]
+            status = status_arquivo(resultados, interrupcao)
+            log.info("**%s: %s item(ns) proibido(s)**", nome_arquivo,
+                     sum(len(padroes) for padroes in resultados.values()))
+
+            linha_csv, linhas_relatorio = relatar_arquivo(
+                nome_arquivo, status, resultados,
+                paginas_em_branco_ou_nao_pesquisaveis, total_paginas,
+                interrupcao, item["original"],
+            )
+            tabela_csv.append(linha_csv)
+            relatorio.extend(linhas_relatorio)
+            relatorio.append(
+                f"Rebusca sobre {len(paginas)} paginas, extração em "
+                f"{item['tempo_s']:.2f} segundos."
+            )
+
+            registro = saidas_estruturadas.registro_arquivo(
+                nome_arquivo, item["caminho"], status, total_paginas,
+                paginas_em_branco_ou_nao_pesquisaveis, item["tamanho_bytes"],
+                item["tempo_s"], duplicata_de=item["original"],
+                hash_arquivo=item["hash"],
+            )
+            achados = saidas_estruturadas.registros_achados(
+                nome_arquivo, item["caminho"], resultados, formatar_norma,
+                PERFIL_PADRAO.nome,
+            )
+            for saida in saidas:
+                saida.gravar_arquivo(registro, achados)
+            metricas.METRICAS.registrar_arquivo(registro, achados)
+
+    # Junta os arquivos em blocos de 'tamanho_bloco' linhas
+    bloco = {}
+    linhas_bloco = 0
+    for numero, (nome_arquivo, caminho_completo) in enumerate(arquivos_pdf):
+        log.info("**Lendo o arquivo: %s de %s ** %s", numero + 1,
+                 total_arquivos, nome_arquivo)
+        start_time = time.time()
+        tamanho_arquivo_bytes = os.path.getsize(caminho_completo)
+        interrupcao = None
+        hash_arquivo = None
+        try:
+            # O hash serve pro cache e pras saídas (histórico), calcula uma
+            # vez só
+            if cache:
+                hash_arquivo = duplicados.calcular_hash(caminho_completo)
+            paginas = extrair_paginas(caminho_completo, cache, extrator,
+                                      hash_arquivo=hash_arquivo)
+            total_paginas = len(paginas)
+            indexar_texto(indice, caminho_completo, paginas)
+        except extracao.LimiteExcedido as e:
+            log.warning(
+                "**Processamento interrompido (%s):** %s Lidas %s de %s "
+                "paginas.", e.motivo, e, len(e.paginas), e.total_paginas,
+            )
+            paginas = e.paginas
+            total_paginas = e.total_paginas
+            interrupcao = (e.motivo, len(e.paginas))
+        except Exception as e:
+            log.error("**Erro ao abrir o arquivo:** %s", e)
+            log.debug("%s", traceback.format_exc())
+            registro = saidas_estruturadas.registro_arquivo(
+                nome_arquivo, caminho_completo, "ERRO",
+                tamanho_bytes=tamanho_arquivo_bytes,
+                tempo_s=time.time() - start_time, erro=str(e),
+                hash_arquivo=hash_arquivo,
+            )
+            for saida in saidas:
+                saida.gravar_arquivo(registro, [])
+            metricas.METRICAS.registrar_arquivo(registro, [])
+            continue
+
+        bloco[numero] = {
+            "nome": nome_arquivo,
+            "caminho": caminho_completo,
+            "paginas": paginas,
+            "total_paginas": total_paginas,
+            "interrupcao": interrupcao,
+            "original": duplicatas.get(caminho_completo),
+            "tamanho_bytes": tamanho_arquivo_bytes,
+            "tempo_s": time.time() - start_time,
+            "hash": hash_arquivo,
+        }
+        linhas_bloco += sum(texto.count("\n") + 1 for texto in paginas
+                            if texto)
+        if linhas_bloco >= tamanho_bloco:
+            relatar_bloco(bloco)
+            bloco = {}
+            linhas_bloco = 0
+    if bloco:
+        relatar_bloco(bloco)
+
+    if not arquivos_pdf:
+        log.info("**Diretorio nao contem arquivos pdf**")
+        log.info("")
+
+    return relatorio, tabela_csv, total_arquivos
+
+
 def main(args_str=None, selected_folder=None):
-    global d_on, som, janela_ativa
+    global som, janela_ativa
+    import tkinter
+    import tkinter.messagebox
+    import grade_resultados
     janela_ativa = True
     janela = None  # Inicialize aqui
 
@@ -780,23 +1476,30 @@ def main(args_str=None, selected_folder=None):
         # Se os argumentos não forem fornecidos, use parse_arguments()
         if args_str is None or selected_folder is None:
             args = parse_arguments()
-            d_on = args.debug
-            som = args.som
             diretorio_processamento = args.diretorio
         else:
-            # Parse os argumentos manualmente
-            d_on = "-d" in args_str
-            som = "-s" in args_str
+            # Argumentos vindos da tela principal, passa pelo mesmo parser
+            args = parse_arguments(args_str.split())
             diretorio_processamento = selected_folder
+        som = args.som
 
         # Crie a janela e o widget de texto
-        janela, texto_saida = criar_janela()
+        janela, texto_saida, botao_resultados = criar_janela()
 
         # Redirecione os displays pra janela e grave em arquivo
         log_filename = (
             f"log_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
         )
         sys.stdout = RedirectText(texto_saida, log_filename)
+        # INFO pra cima na janela (e no log); DEBUG só no arquivo próprio,
+        # gravado em segundo plano, pra não arrastar a janela junto
+        log_debug_filename = (
+            log_filename.replace("log_", "log_debug_", 1)
+            if args.debug else None
+        )
+        log_execucao.configurar_log(
+            console=sys.stdout, arquivo_debug=log_debug_filename
+        )
 
         janela.update()
 
@@ -808,8 +1511,26 @@ def main(args_str=None, selected_folder=None):
         # Exibir os argumentos recebidos
         print("Argumentos recebidos:")
         print()
-        print(f"Modo de depuração (debug): {'Ativado' if d_on else 'Desativado'}")
+        print(f"Modo de depuração (debug): {'Ativado' if args.debug else 'Desativado'}")
         print(f"Aviso sonoro: {'Ativado' if som else 'Desativado'}")
+        print(f"Busca em subdiretórios: "
+              f"{'Ativado' if args.recursivo else 'Desativado'}")
+        print(f"Janela de busca: {args.janela} linha(s)")
+        print(f"Limite por arquivo: {args.tempo_limite:.0f} segundos, "
+              f"{args.memoria_limite_mb:.0f} MB (0 = sem limite)")
+        print(f"Banco SQLite: {'Ativado' if args.sqlite else 'Desativado'}")
+        print(f"Planilha Excel: {'Ativado' if args.xlsx else 'Desativado'}")
+        print(f"Cache de texto: "
+              f"{'Desativado' if args.sem_cache else args.cache_dir}")
+        print(f"Rebusca em lote: {'Ativado' if args.rebusca else 'Desativado'}")
+        print(f"Índice de texto: "
+              f"{args.indice_dir if args.indice else 'Desativado'}")
+        print(f"Memória de linhas: "
+              f"{args.memo_limite_mb:.0f} MB (0 = desativada)")
+        print(f"Esteira: "
+              f"{args.extratores if args.extratores > 0 else 'automático'} "
+              f"extrator(es), filas de leitura {args.fila_leitura} e de "
+              f"extração {args.fila_extracao}")
         print()
         print(f"Diretório atual:", os.getcwd())
         print(f"Diretório a ser processado: {diretorio_processamento}")
@@ -824,6 +1545,25 @@ def main(args_str=None, selected_folder=None):
             tkinter.messagebox.showerror("Erro no processamento...", mensagem_erro)
             return
 
+        # Perfis de regras extras: a lista de parafusos e mais esses, tudo
+        # numa extração só
+        perfis = None
+        if args.perfil:
+            try:
+                perfis = montar_perfis(args.perfil)
+            except (OSError, ValueError) as e:
+                mensagem_erro = f"002 - Erro: Perfil de regras inválido. {e}"
+                print(mensagem_erro)
+                tkinter.messagebox.showerror("Erro no processamento...",
+                                             mensagem_erro)
+                return
+            print(f"Perfis de regras: "
+                  f"{', '.join(perfil.nome for perfil in perfis)}")
+            if args.rebusca:
+                print("Atenção: a rebusca usa só o perfil "
+                      f"'{PERFIL_PADRAO.nome}', os outros ficam de fora.")
+                perfis = None
+
         dados_sistema()
 
         print("Iniciando o processamento...")
@@ -835,10 +1575,149 @@ def main(args_str=None, selected_folder=None):
             return
         print(f"O diretório a ser processado é: {diretorio_processamento}")
 
-        # Executa o programa propriamente dito.
-        relatorio_final, linhas_csv, contador_pdfs = processar_pdfs_no_diretorio(
-            diretorio_processamento
+        # Saídas estruturadas, gravadas arquivo a arquivo durante a varredura
+        carimbo = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        saidas = [saidas_estruturadas.SaidaJSONL(f"resultado_{carimbo}.jsonl")]
+        if args.sqlite:
+            saidas.append(
+                saidas_estruturadas.SaidaSQLite(f"resultado_{carimbo}.sqlite")
+            )
+        if args.xlsx:
+            saidas.append(
+                saidas_estruturadas.SaidaExcel(f"resultado_{carimbo}.xlsx")
+            )
+        # O que mudou desde a execução anterior, se não der segue sem
+        historico_resultados = None
+        if not args.sem_historico:
+            try:
+                historico_resultados = historico.SaidaHistorico(
+                    f"delta_{carimbo}.txt", diretorio_processamento,
+                    args.recursivo, args.historico_dir,
+                    [perfil.nome for perfil in perfis] if perfis else None
+                )
+                saidas.append(historico_resultados)
+            except Exception as e:
+                print(f"Atenção: histórico de resultados indisponível, "
+                      f"seguindo sem ele. {e}")
+
+        # Métricas pra acompanhar execução longa sem ler o log
+        gravador_metricas = metricas.GravadorMetricas(
+            f"metricas_{carimbo}.json"
         )
+        servidor_metricas = None
+        if args.metricas_porta:
+            try:
+                servidor_metricas = metricas.servir_prometheus(
+                    args.metricas_porta
+                )
+                print(f"Métricas em http://127.0.0.1:{args.metricas_porta}"
+                      "/metrics")
+            except OSError as e:
+                print(f"Atenção: não deu pra servir as métricas na porta "
+                      f"{args.metricas_porta}. {e}")
+
+        # Cache do texto extraído, se não der pra abrir segue sem ele
+        cache = None
+        if not args.sem_cache:
+            try:
+                cache = cache_texto.CacheTexto(args.cache_dir,
+                                               args.cache_limite_mb)
+            except Exception as e:
+                print(f"Atenção: cache de texto indisponível, seguindo sem "
+                      f"ele. {e}")
+
+        # Índice de texto, se não der pra abrir segue sem ele
+        indice = None
+        if args.indice:
+            try:
+                indice = indice_texto.IndiceInvertido(args.indice_dir)
+            except Exception as e:
+                print(f"Atenção: índice de texto indisponível, seguindo sem "
+                      f"ele. {e}")
+
+        # Memória das linhas repetidas, uma pra execução inteira
+        memo = None
+        if args.memo_limite_mb > 0:
+            memo = MemoLinhas(args.memo_limite_mb)
+
+        # Extração vigiada num processo separado, se tiver algum limite.
+        # Um por thread de extração da esteira, quantos a máquina aguenta
+        # se não foi pedido um número.
+        quantidade = args.extratores
+        if quantidade <= 0:
+            estimativa = autoajuste.ESTIMATIVA_TRABALHADOR_MB
+            if args.memoria_limite_mb > 0:
+                estimativa = min(estimativa, args.memoria_limite_mb)
+            quantidade = autoajuste.trabalhadores_iniciais(estimativa)
+        extratores = [None] * quantidade
+        if args.tempo_limite > 0 or args.memoria_limite_mb > 0:
+            extratores = [
+                extracao.ExtratorIsolado(args.tempo_limite,
+                                         args.memoria_limite_mb)
+                for _ in extratores
+            ]
+
+        # Aviso dos achados numa thread separada, a busca não espera
+        avisador = None
+        if som:
+            avisador = avisos.criar_avisador(
+                sys.stdout.piscar if isinstance(sys.stdout, RedirectText)
+                else None
+            )
+
+        # Executa o programa propriamente dito.
+        try:
+            # Rebusca: mesma saída, busca em lote sobre o texto do cache
+            if args.rebusca:
+                relatorio_final, linhas_csv, contador_pdfs = (
+                    rebuscar_pdfs_no_diretorio(
+                        diretorio_processamento, saidas, args.recursivo,
+                        cache, max(args.janela, 1), extratores[0], indice
+                    )
+                )
+            else:
+                relatorio_final, linhas_csv, contador_pdfs = (
+                    processar_pdfs_no_diretorio(
+                        diretorio_processamento, saidas, args.recursivo,
+                        cache, max(args.janela, 1), None, indice,
+                        avisador, memo, extratores, args.fila_leitura,
+                        args.fila_extracao,
+                        autoajuste.Regulador(len(extratores)),
+                        perfis=perfis,
+                    )
+                )
+            if historico_resultados:
+                historico_resultados.concluir()
+        finally:
+            if avisador:
+                avisador.close()
+            for extrator in extratores:
+                if extrator:
+                    extrator.close()
+            for saida in saidas:
+                saida.close()
+            gravador_metricas.close()
+            if servidor_metricas:
+                servidor_metricas.shutdown()
+            if cache:
+                print()
+                for linha in cache.relatorio():
+                    print(linha)
+                cache.close()
+            if indice:
+                indice.remover_ausentes()
+                print()
+                for linha in indice.relatorio():
+                    print(linha)
+                indice.close()
+            if memo:
+                print()
+                for linha in memo.relatorio():
+                    print(linha)
+            if historico_resultados and historico_resultados.concluido:
+                print()
+                for linha in historico_resultados.resumo():
+                    print(linha)
 
         print(f"Foram processados {contador_pdfs} arquivos pdf nessa execução.")
 
@@ -861,23 +1740,34 @@ def main(args_str=None, selected_folder=None):
         else:
             nome_arquivo_csv = f"relatorio_execucao_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
             cabecalho = "Nome Arquivo;Localizado item proibido;Páginas em branco ou não pesquisáveis;Detalhes"
+            if perfis:
+                cabecalho = "Perfil;" + cabecalho
 
             with open(nome_arquivo_csv, "w", encoding="utf-8-sig") as planilha:
                 planilha.write(cabecalho + "\n")
                 for linha in linhas_csv:
-                    columns = linha.split(";")
-                    if columns[2] == "1":
-                        columns[2] = "Documento não pesquisável"
-                    linha_atualizada = ";".join(columns)
-                    planilha.write(linha_atualizada + "\n")
+                    planilha.write(linha + "\n")
 
             print()
             print("Relatorios de processamento gerados com sucesso!")
             print(f"{log_filename}")
+            if log_debug_filename:
+                print(f"{log_debug_filename}")
             print(f"{nome_relatorio}")
             print(f"{nome_arquivo_csv}")
+            for saida in saidas:
+                print(f"{saida.filename}")
+            print(f"{gravador_metricas.filename}")
             print()
 
+        # Os achados numa tabela, lida do JSONL que acabou de ser gravado
+        botao_resultados.config(
+            state="normal",
+            command=lambda: grade_resultados.abrir_grade(
+                janela, saidas[0].filename
+            ),
+        )
+
         if not janela_ativa:
             break
 
@@ -895,6 +1785,9 @@ def main(args_str=None, selected_folder=None):
             "Processo finalizado", "Verifique os arquivos gerados."
         )
 
+    # Descarrega o que sobrou na fila do log de debug
+    log_execucao.encerrar_log()
+
     if isinstance(sys.stdout, RedirectText):
         sys.stdout.close()
 
@@ -903,4 +1796,7 @@ def main(args_str=None, selected_folder=None):
 
 
 if __name__ == "__main__":
+    # Precisa pro executavel do PyInstaller conseguir criar o processo de
+    # extração
+    multiprocessing.freeze_support()
     main()
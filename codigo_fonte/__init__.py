@@ -1,10 +1,36 @@
 # versao do pacote
 __version__ = "0.0.2" 
 
+import importlib
+import os
+import sys
+
 # Indica quais módulos exportar com "from meu_pacote import *"
-__all__ = ['splash_screen', 'tela_principal', 'procura_B8']
+__all__ = ['splash_screen', 'tela_principal', 'procura_B8',
+           'scan_file', 'scan_bytes', 'scan_directory', 'Opcoes',
+           'Ocorrencia', 'ResultadoArquivo']
+
+# Os módulos se importam pelo nome, sem o pacote (import extracao), então o
+# diretório do pacote tem que estar no caminho de busca
+_DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+if _DIRETORIO not in sys.path:
+    sys.path.insert(0, _DIRETORIO)
+
+# A API de busca, leve, sem interface gráfica (ver detetive.py)
+from detetive import (scan_file, scan_bytes, scan_directory, Opcoes,
+                      Ocorrencia, ResultadoArquivo)
+
+# A parte gráfica (tkinter, PIL) só é carregada se alguém pedir
+_MODULOS_GRAFICOS = {
+    'splash_screen': 'splash_screen',
+    'tela_principal': 'tela_principal',
+    'procura_B8': 'Procura_B8',
+}
+
 
-# Importações dos módulos
-from . import tela_principal as _core    
-from . import splash_screen as _splash
-from . import tela_principal as _gui
\ No newline at end of file
+def __getattr__(nome):
+    if nome in _MODULOS_GRAFICOS:
+        modulo = importlib.import_module(_MODULOS_GRAFICOS[nome])
+        globals()[nome] = modulo
+        return modulo
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
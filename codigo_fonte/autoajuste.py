@@ -0,0 +1,291 @@
+"""
+autoajuste.py
+
+Descrição:
+Quantos extratores usar, e quando segurar. Escolher na mão erra pros dois
+lados: extrator demais numa estação com pouca memória e os processos do
+PyPDF2 disputam a RAM (a máquina vai pro swap, ou o vigia derruba arquivo
+bom por OOM); extrator de menos numa máquina folgada e os núcleos ficam à
+toa olhando a esteira passar.
+
+Agora o programa chuta o número de extratores pela máquina e vai ajustando
+durante a execução, olhando a memória e a carga.
+
+Orientações:
+- trabalhadores_iniciais(): quantos extratores pelos núcleos (um fica pra
+  busca, que roda na thread principal) e pela memória livre (no máximo
+  FRACAO_MEMORIA dela, contando ESTIMATIVA_TRABALHADOR_MB por extrator),
+  até MAXIMO_TRABALHADORES. É o --extratores 0 (automático) do programa.
+- Regulador: a esteira pede a vez (entrar) antes de começar cada arquivo e
+  devolve (sair) quando termina. A cada INTERVALO_AJUSTE segundos ele olha
+  a memória da máquina, o RSS do programa (com os processos de extração) e
+  a carga por núcleo. Memória apertada ou máquina carregada: um arquivo a
+  menos extraído ao mesmo tempo. Folgou: um a mais, até o máximo. Quem já
+  está extraindo não é interrompido, só não começa arquivo novo.
+- maiores_primeiro(): ordem da varredura, os maiores antes. Assim o último
+  arquivo grande não fica extraindo sozinho no fim enquanto os outros
+  extratores estão parados.
+- As decisões vão pro log "detetive.autoajuste", e relatorio() resume o
+  que aconteceu.
+
+Sobre a saída:
+- Não gera arquivos.
+
+Histórico de alterações:
+- 2026 10 19 Versão 0.0.4: Implantação.
+"""
+
+import logging
+import os
+import threading
+import time
+
+import psutil
+
+log = logging.getLogger("detetive.autoajuste")
+
+MB = 1024 * 1024
+
+# Memória que um extrator costuma usar (PDF grande passa disso, o vigia do
+# extracao.py é quem segura o exagero)
+ESTIMATIVA_TRABALHADOR_MB = 512
+# Fração da memória livre que os extratores podem ocupar
+FRACAO_MEMORIA = 0.5
+# Mais que isso não ajuda, a busca (uma thread só) não acompanha
+MAXIMO_TRABALHADORES = 8
+# De quanto em quanto tempo o regulador olha a máquina (segundos)
+INTERVALO_AJUSTE = 2.0
+# Memória da máquina usada (%) a partir da qual segura, e abaixo da qual
+# solta de novo
+MEMORIA_APERTADA = 90
+MEMORIA_FOLGADA = 75
+# Carga média (1 minuto) por núcleo a partir da qual segura
+CARGA_ALTA = 2.0
+# De quanto em quanto tempo quem está esperando a vez confere se é pra parar
+INTERVALO_ESPERA = 0.2
+
+
+def trabalhadores_iniciais(estimativa_mb=ESTIMATIVA_TRABALHADOR_MB,
+                           maximo=MAXIMO_TRABALHADORES):
+    """
+    Quantos extratores usar nessa máquina, agora.
+
+    :param estimativa_mb: Memória que cada extrator deve usar, em MB.
+    :param maximo: Número máximo de extratores.
+    :return: Número de extratores, pelo menos 1.
+    """
+    nucleos = psutil.cpu_count(logical=False) or os.cpu_count() or 1
+    # Um núcleo fica pra busca
+    por_nucleos = nucleos - 1 if nucleos > 1 else 1
+    livre = psutil.virtual_memory().available
+    por_memoria = int(livre * FRACAO_MEMORIA
+                      / (max(estimativa_mb, 1) * MB))
+    quantidade = max(1, min(por_nucleos, por_memoria, maximo))
+    log.info("Extratores automáticos: %s (%s núcleo(s), %.0f MB livres, "
+             "%.0f MB por extrator).", quantidade, nucleos, livre / MB,
+             estimativa_mb)
+    return quantidade
+
+
+def maiores_primeiro(arquivos):
+    """
+    Ordena os arquivos do maior pro menor. Tamanhos iguais ficam na ordem
+    da listagem, e arquivo que não dá pra ler o tamanho vai pro fim (o erro
+    aparece na hora de processar).
+
+    :param arquivos: Lista de (nome, caminho).
+    :return: Nova lista de (nome, caminho), maiores primeiro.
+    """
+    tamanhos = {}
+    for _, caminho in arquivos:
+        try:
+            tamanhos[caminho] = os.path.getsize(caminho)
+        except OSError:
+            tamanhos[caminho] = -1
+    ordenados = sorted(arquivos, key=lambda arquivo: -tamanhos[arquivo[1]])
+    if ordenados:
+        log.debug("Ordem da varredura: maiores primeiro, de %.1f MB a "
+                  "%.1f MB.", max(tamanhos[ordenados[0][1]], 0) / MB,
+                  max(tamanhos[ordenados[-1][1]], 0) / MB)
+    return ordenados
+
+
+def _carga_por_nucleo():
+    """
+    :return: Carga média do último minuto dividida pelos núcleos, ou None
+    se não dá pra saber.
+    """
+    try:
+        return psutil.getloadavg()[0] / (psutil.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return None
+
+
+class Regulador:
+    """
+    Decide quantos arquivos são extraídos ao mesmo tempo, entre 1 e
+    'maximo', pela memória e pela carga da máquina. Pode ser usado de
+    várias threads.
+    """
+
+    def __init__(self, maximo, intervalo=INTERVALO_AJUSTE):
+        """
+        :param maximo: Número de extratores (o máximo ao mesmo tempo).
+        :param intervalo: De quanto em quanto tempo olha a máquina
+        (segundos).
+        """
+        self.maximo = max(maximo, 1)
+        self.intervalo = intervalo
+        self.permitidos = self.maximo
+        self.ativos = 0
+
+        # Estatísticas
+        self.menor_permitidos = self.maximo
+        self.reducoes = 0
+        self.aumentos = 0
+        self.tempo_espera = 0.0
+        self.pico_rss = 0
+        self.pico_extrator = 0
+        self.pico_memoria = 0.0
+
+        self._ultima_olhada = None
+        self._condicao = threading.Condition()
+        try:
+            self._processo = psutil.Process()
+        except psutil.Error:
+            self._processo = None
+
+    def entrar(self, parar=None):
+        """
+        Espera a vez de começar um arquivo.
+
+        :param parar: threading.Event que cancela a espera, ou None.
+        :return: True se pode começar, False se foi cancelado.
+        """
+        inicio = time.perf_counter()
+        with self._condicao:
+            while True:
+                self._olhar()
+                if self.ativos < self.permitidos:
+                    self.ativos += 1
+                    self.tempo_espera += time.perf_counter() - inicio
+                    return True
+                if parar is not None and parar.is_set():
+                    return False
+                self._condicao.wait(INTERVALO_ESPERA)
+
+    def sair(self):
+        """
+        Terminou um arquivo, libera a vez.
+        """
+        with self._condicao:
+            self.ativos -= 1
+            self._condicao.notify_all()
+
+    def _medir_rss(self):
+        """
+        :return: (RSS do programa com os processos filhos, RSS do maior
+        filho), em bytes.
+        """
+        if self._processo is None:
+            return 0, 0
+        try:
+            total = self._processo.memory_info().rss
+            filhos = self._processo.children(recursive=True)
+        except psutil.Error:
+            return 0, 0
+        maior = 0
+        for filho in filhos:
+            try:
+                rss = filho.memory_info().rss
+            except psutil.Error:
+                # Terminou no meio da conta
+                continue
+            total += rss
+            maior = max(maior, rss)
+        return total, maior
+
+    def _olhar(self):
+        """
+        Olha a máquina e ajusta os permitidos, no máximo uma vez a cada
+        'intervalo'. Chamado com a trava pega.
+        """
+        agora = time.monotonic()
+        if (self._ultima_olhada is not None
+                and agora - self._ultima_olhada < self.intervalo):
+            return
+        self._ultima_olhada = agora
+
+        memoria = psutil.virtual_memory()
+        rss, maior_filho = self._medir_rss()
+        carga = _carga_por_nucleo()
+        self.pico_rss = max(self.pico_rss, rss)
+        self.pico_extrator = max(self.pico_extrator, maior_filho)
+        self.pico_memoria = max(self.pico_memoria, memoria.percent)
+        log.debug("Máquina: memória %.0f%% usada (%.0f MB livres), programa "
+                  "%.0f MB, carga %s por núcleo, %s de %s extraindo.",
+                  memoria.percent, memoria.available / MB, rss / MB,
+                  "?" if carga is None else f"{carga:.1f}", self.ativos,
+                  self.permitidos)
+
+        if memoria.percent >= MEMORIA_APERTADA:
+            if self.permitidos > 1:
+                self._mudar(-1, f"memória apertada ({memoria.percent:.0f}% "
+                                f"usada, programa com {rss / MB:.0f} MB)")
+        elif carga is not None and carga >= CARGA_ALTA:
+            if self.permitidos > 1:
+                self._mudar(-1, f"máquina carregada (carga {carga:.1f} por "
+                                "núcleo)")
+        elif (self.permitidos < self.maximo
+              and memoria.percent < MEMORIA_FOLGADA
+              # Cabe mais um extrator do tamanho do maior que já rodou
+              and memoria.available > 2 * max(self.pico_extrator,
+                                              ESTIMATIVA_TRABALHADOR_MB * MB)):
+            self._mudar(+1, f"memória folgou ({memoria.percent:.0f}% usada)")
+
+    def _mudar(self, passo, motivo):
+        self.permitidos += passo
+        self.menor_permitidos = min(self.menor_permitidos, self.permitidos)
+        if passo < 0:
+            self.reducoes += 1
+            log.warning("Autoajuste: %s, até %s arquivo(s) extraído(s) ao "
+                        "mesmo tempo.", motivo, self.permitidos)
+        else:
+            self.aumentos += 1
+            log.info("Autoajuste: %s, até %s arquivo(s) extraído(s) ao "
+                     "mesmo tempo.", motivo, self.permitidos)
+            self._condicao.notify_all()
+
+    def estatisticas(self):
+        """
+        :return: Dicionário com as estatísticas do regulador.
+        """
+        with self._condicao:
+            return {
+                "maximo": self.maximo,
+                "permitidos": self.permitidos,
+                "menor_permitidos": self.menor_permitidos,
+                "reducoes": self.reducoes,
+                "aumentos": self.aumentos,
+                "tempo_espera_s": self.tempo_espera,
+                "pico_rss_mb": self.pico_rss / MB,
+                "pico_extrator_mb": self.pico_extrator / MB,
+                "pico_memoria_pct": self.pico_memoria,
+            }
+
+    def relatorio(self):
+        """
+        Estatísticas formatadas pra exibir.
+
+        :return: Lista de linhas de texto.
+        """
+        est = self.estatisticas()
+        return [
+            f"Autoajuste: até {est['maximo']} extrator(es), mínimo usado "
+            f"{est['menor_permitidos']}, {est['reducoes']} redução(ões) e "
+            f"{est['aumentos']} aumento(s); esperaram a vez "
+            f"{est['tempo_espera_s']:.1f} s",
+            f"  Pico de memória do programa {est['pico_rss_mb']:.0f} MB "
+            f"(maior extrator {est['pico_extrator_mb']:.0f} MB), máquina "
+            f"com até {est['pico_memoria_pct']:.0f}% da memória usada",
+        ]
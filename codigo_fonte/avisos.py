@@ -0,0 +1,196 @@
+"""
+avisos.py
+
+Descrição:
+Aviso de item proibido encontrado (opção -s) sem segurar a varredura. Antes
+era um winsound.Beep(1000, 500) a cada achado, na mesma thread da busca:
+meio segundo parado por achado, um documento com 400 chamadas de B8 ficava
+mais de três minutos só apitando. E no Linux o programa nem abria, o
+winsound só existe no Windows.
+
+Agora a busca só conta o achado (uma trava e uma soma) e quem avisa é uma
+thread separada, que junta as rajadas: no máximo um aviso a cada
+INTERVALO_AVISO segundos, por mais achados que tenham aparecido nesse meio
+tempo.
+
+Orientações:
+- criar_avisador(piscar) escolhe as saídas que existem na máquina: a
+  função 'piscar' da janela (se tiver janela), o beep do Windows (se tiver
+  winsound) ou, sem janela e sem winsound, a campainha do terminal (se
+  tiver terminal). Sem nenhuma, o avisador não faz nada.
+- O Avisador é chamado sem argumentos, igual ao aviso_sonoro antigo, e pode
+  ser chamado de qualquer thread. Cada saída recebe quantos achados o aviso
+  representa.
+- As saídas rodam na thread dos avisos. Quem mexe em interface (Tk) não
+  pode mexer nela dali: só marca o pedido e deixa a thread principal
+  desenhar (ver RedirectText.piscar no Procura_B8.py).
+- close() no fim da execução, avisa o que ficou pendente e para a thread.
+
+Sobre a saída:
+- Não gera arquivos.
+
+Histórico de alterações:
+- 2026 10 19 Versão 0.0.4: Implantação.
+"""
+
+import logging
+import sys
+import threading
+import time
+
+try:
+    import winsound
+except ImportError:
+    winsound = None
+
+log = logging.getLogger("detetive.avisos")
+
+# Intervalo mínimo entre dois avisos (segundos). Achados nesse meio tempo
+# viram um aviso só.
+INTERVALO_AVISO = 2.0
+# Tempo máximo esperando o último aviso no close (segundos)
+ESPERA_FECHAR = 2.0
+
+
+def bip_windows(quantidade):
+    """
+    Beep do Windows, o mesmo de sempre.
+
+    :param quantidade: Achados que esse aviso representa (não usado).
+    """
+    winsound.Beep(1000, 500)
+
+
+def campainha_terminal(quantidade):
+    """
+    Campainha do terminal (o caractere BEL), pra quem roda sem janela.
+
+    :param quantidade: Achados que esse aviso representa (não usado).
+    """
+    sys.__stdout__.write("\a")
+    sys.__stdout__.flush()
+
+
+def _tem_terminal():
+    try:
+        return sys.__stdout__ is not None and sys.__stdout__.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
+class Avisador:
+    """
+    Recebe os achados de qualquer thread e avisa numa thread separada, no
+    máximo um aviso a cada 'intervalo' segundos.
+    """
+
+    def __init__(self, saidas=(), intervalo=INTERVALO_AVISO):
+        """
+        :param saidas: Funções chamadas a cada aviso, recebendo quantos
+        achados ele representa. Vazio não avisa nada.
+        :param intervalo: Intervalo mínimo entre dois avisos (segundos).
+        """
+        self.saidas = list(saidas)
+        self.intervalo = intervalo
+        self.achados = 0
+        self.avisos = 0
+        self._pendentes = 0
+        self._parar = False
+        self._trava = threading.Lock()
+        self._evento = threading.Event()
+        self._thread = None
+        if self.saidas:
+            self._thread = threading.Thread(target=self._rodar, daemon=True,
+                                            name="avisos")
+            self._thread.start()
+
+    def __call__(self):
+        """
+        Um item proibido encontrado. Não espera nada, volta na hora.
+        """
+        if self._thread is None:
+            return
+        with self._trava:
+            self.achados += 1
+            self._pendentes += 1
+        self._evento.set()
+
+    def _rodar(self):
+        ultimo_aviso = None
+        espera = None
+        while True:
+            self._evento.wait(espera)
+            self._evento.clear()
+            with self._trava:
+                parar = self._parar
+                agora = time.monotonic()
+                liberado = (parar or ultimo_aviso is None
+                            or agora - ultimo_aviso >= self.intervalo)
+                quantidade = self._pendentes if liberado else 0
+                if quantidade:
+                    self._pendentes = 0
+                pendentes = self._pendentes
+            if quantidade:
+                ultimo_aviso = agora
+                self._avisar(quantidade)
+            if parar:
+                return
+            # Ficou achado pra trás por causa do intervalo: acorda quando
+            # puder avisar
+            espera = None
+            if pendentes:
+                espera = max(self.intervalo - (time.monotonic()
+                                               - ultimo_aviso), 0)
+
+    def _avisar(self, quantidade):
+        self.avisos += 1
+        for saida in list(self.saidas):
+            try:
+                saida(quantidade)
+            except Exception:
+                # Saída que não funciona nessa máquina sai da lista, as
+                # outras continuam
+                log.debug("Aviso %s falhou, desligado.", saida,
+                          exc_info=True)
+                self.saidas.remove(saida)
+
+    def close(self):
+        """
+        Avisa o que ficou pendente e para a thread.
+        """
+        if self._thread is None:
+            return
+        with self._trava:
+            self._parar = True
+        self._evento.set()
+        self._thread.join(ESPERA_FECHAR)
+        self._thread = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+        return False
+
+
+def criar_avisador(piscar=None, intervalo=INTERVALO_AVISO):
+    """
+    Monta o avisador com as saídas que funcionam nessa máquina.
+
+    :param piscar: Função da janela que pisca a tela (recebe a quantidade),
+    ou None se não tem janela.
+    :param intervalo: Intervalo mínimo entre dois avisos (segundos).
+    :return: Objeto Avisador (que não faz nada se não achou saída).
+    """
+    saidas = []
+    if piscar:
+        saidas.append(piscar)
+    if winsound:
+        saidas.append(bip_windows)
+    elif not piscar and _tem_terminal():
+        saidas.append(campainha_terminal)
+    if not saidas:
+        log.info("Sem saída pra avisar os achados nessa máquina, seguindo "
+                 "em silêncio.")
+    return Avisador(saidas, intervalo)
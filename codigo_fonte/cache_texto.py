@@ -0,0 +1,239 @@
+"""
+cache_texto.py
+
+Descrição:
+Cache persistente do texto extraído das páginas dos PDFs.
+A extração é a parte mais cara do processamento e não depende das regras
+(normas e padrões). Com o texto guardado, quando entra um padrão novo na
+lista só a busca precisa rodar de novo, a extração sai do cache.
+
+Orientações:
+- A chave é o hash do conteúdo do arquivo mais o "backend" de extração
+  (biblioteca e versão). Renomear ou mover o arquivo não perde o cache;
+  trocar a versão do PyPDF2 invalida, porque o texto pode sair diferente.
+- O texto é gravado comprimido com zstandard (ou zlib, se o zstandard não
+  estiver instalado) num banco SQLite dentro do diretório do cache.
+- Tem limite de tamanho. Passou do limite, sai quem foi usado há mais tempo
+  (LRU).
+- Pode ser usado por várias threads ao mesmo tempo (modo serviço), o acesso
+  ao banco passa por uma trava.
+
+Sobre a saída:
+- <diretorio_cache>/cache_texto.sqlite
+- Rodando direto (python cache_texto.py [diretorio]) exibe as estatísticas.
+
+Histórico de alterações:
+- 2026 10 19 Versão 0.0.4: Implantação.
+- 2026 10 19 Versão 0.0.4: Acesso seguro entre threads.
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Onde fica o cache se ninguém disser nada
+DIRETORIO_PADRAO = os.path.join(os.path.expanduser("~"), ".detetive_b8",
+                                "cache")
+# 2 Gibas de texto comprimido da e sobra
+LIMITE_PADRAO_MB = 2048
+
+
+class CacheTexto:
+    """
+    Guarda e recupera o texto das páginas de um PDF, comprimido.
+    """
+
+    ESQUEMA = """
+        CREATE TABLE IF NOT EXISTS paginas (
+            hash TEXT NOT NULL,
+            backend TEXT NOT NULL,
+            compressao TEXT NOT NULL,
+            dados BLOB NOT NULL,
+            tamanho INTEGER NOT NULL,
+            ultimo_acesso REAL NOT NULL,
+            PRIMARY KEY (hash, backend)
+        );
+        CREATE INDEX IF NOT EXISTS idx_paginas_acesso
+            ON paginas(ultimo_acesso);
+    """
+
+    def __init__(self, diretorio=DIRETORIO_PADRAO,
+                 limite_mb=LIMITE_PADRAO_MB):
+        os.makedirs(diretorio, exist_ok=True)
+        self.diretorio = diretorio
+        self.limite_bytes = int(limite_mb * 1024 * 1024)
+        self.conexao = sqlite3.connect(
+            os.path.join(diretorio, "cache_texto.sqlite"),
+            check_same_thread=False,
+        )
+        # Uma thread de cada vez no banco (e nos contadores)
+        self._trava = threading.Lock()
+        self.conexao.executescript(self.ESQUEMA)
+        self.conexao.commit()
+        # Contadores dessa execução
+        self.acertos = 0
+        self.faltas = 0
+        self.gravados = 0
+        self.removidos = 0
+        if zstandard:
+            self.compressao = "zstd"
+            self._compressor = zstandard.ZstdCompressor(level=3)
+            self._descompressor = zstandard.ZstdDecompressor()
+        else:
+            self.compressao = "zlib"
+
+    def _comprimir(self, dados):
+        if self.compressao == "zstd":
+            return self._compressor.compress(dados)
+        return zlib.compress(dados, 6)
+
+    def _descomprimir(self, dados, compressao):
+        if compressao == "zstd":
+            if not zstandard:
+                return None
+            return self._descompressor.decompress(dados)
+        return zlib.decompress(dados)
+
+    def obter(self, hash_arquivo, backend):
+        """
+        Recupera o texto das páginas de um arquivo.
+
+        :param hash_arquivo: Hash do conteúdo do arquivo.
+        :param backend: Identificação de quem extraiu o texto.
+        :return: Lista com o texto de cada página ou None se não tiver no
+        cache.
+        """
+        with self._trava:
+            linha = self.conexao.execute(
+                "SELECT dados, compressao FROM paginas "
+                "WHERE hash = ? AND backend = ?",
+                (hash_arquivo, backend),
+            ).fetchone()
+            texto = self._descomprimir(*linha) if linha else None
+            if texto is None:
+                self.faltas += 1
+                return None
+            self.acertos += 1
+            with self.conexao:
+                self.conexao.execute(
+                    "UPDATE paginas SET ultimo_acesso = ? "
+                    "WHERE hash = ? AND backend = ?",
+                    (time.time(), hash_arquivo, backend),
+                )
+        return json.loads(texto.decode("utf-8"))
+
+    def guardar(self, hash_arquivo, backend, paginas):
+        """
+        Guarda o texto das páginas de um arquivo e, se passou do limite,
+        remove as entradas usadas há mais tempo.
+
+        :param hash_arquivo: Hash do conteúdo do arquivo.
+        :param backend: Identificação de quem extraiu o texto.
+        :param paginas: Lista com o texto de cada página.
+        """
+        dados = self._comprimir(
+            json.dumps(paginas, ensure_ascii=False).encode("utf-8")
+        )
+        # Entrada maior que o cache inteiro nem adianta guardar
+        if len(dados) > self.limite_bytes:
+            return
+        with self._trava, self.conexao:
+            self.conexao.execute(
+                "INSERT OR REPLACE INTO paginas (hash, backend, compressao, "
+                "dados, tamanho, ultimo_acesso) VALUES (?, ?, ?, ?, ?, ?)",
+                (hash_arquivo, backend, self.compressao, dados, len(dados),
+                 time.time()),
+            )
+            self.gravados += 1
+            self._aplicar_limite()
+
+    def _aplicar_limite(self):
+        """
+        Remove as entradas menos usadas recentemente até caber no limite.
+        """
+        total = self.conexao.execute(
+            "SELECT COALESCE(SUM(tamanho), 0) FROM paginas"
+        ).fetchone()[0]
+        if total <= self.limite_bytes:
+            return
+        remover = []
+        for hash_arquivo, backend, tamanho in self.conexao.execute(
+            "SELECT hash, backend, tamanho FROM paginas "
+            "ORDER BY ultimo_acesso"
+        ):
+            if total <= self.limite_bytes:
+                break
+            remover.append((hash_arquivo, backend))
+            total -= tamanho
+        self.conexao.executemany(
+            "DELETE FROM paginas WHERE hash = ? AND backend = ?", remover
+        )
+        self.removidos += len(remover)
+
+    def estatisticas(self):
+        """
+        Estatísticas do cache: o que tem guardado e o que aconteceu nessa
+        execução.
+
+        :return: Dicionário com as estatísticas.
+        """
+        with self._trava:
+            entradas, tamanho = self.conexao.execute(
+                "SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM paginas"
+            ).fetchone()
+        consultas = self.acertos + self.faltas
+        return {
+            "diretorio": self.diretorio,
+            "compressao": self.compressao,
+            "entradas": entradas,
+            "tamanho_mb": tamanho / (1024 * 1024),
+            "limite_mb": self.limite_bytes / (1024 * 1024),
+            "acertos": self.acertos,
+            "faltas": self.faltas,
+            "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+            "gravados": self.gravados,
+            "removidos": self.removidos,
+        }
+
+    def relatorio(self):
+        """
+        Estatísticas do cache formatadas pra exibir.
+
+        :return: Lista de linhas de texto.
+        """
+        est = self.estatisticas()
+        return [
+            f"Cache de texto: {est['diretorio']} ({est['compressao']})",
+            f"  Entradas: {est['entradas']}  Tamanho: "
+            f"{est['tamanho_mb']:.2f} MB de {est['limite_mb']:.0f} MB",
+            f"  Nessa execução: {est['acertos']} acertos, {est['faltas']} "
+            f"faltas ({est['taxa_acerto']:.0%}), {est['gravados']} "
+            f"gravados, {est['removidos']} removidos por falta de espaço",
+        ]
+
+    def close(self):
+        """
+        Fecha a conexão com o banco.
+        """
+        with self._trava:
+            if self.conexao:
+                self.conexao.close()
+                self.conexao = None
+
+
+######################## Main ################################
+if __name__ == "__main__":
+    cache = CacheTexto(sys.argv[1] if len(sys.argv) > 1
+                       else DIRETORIO_PADRAO)
+    for linha in cache.relatorio()[:2]:
+        print(linha)
+    cache.close()
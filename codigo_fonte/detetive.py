@@ -0,0 +1,253 @@
+"""
+detetive.py
+
+Descrição:
+API pra usar o Detetive B8 de dentro de outros programas (o sistema de
+gestão de documentos, scripts, o que for), sem abrir janela, sem Tk e sem
+winsound:
+
+    import detetive
+    resultado = detetive.scan_file("C:/pdfs/lista_materiais.pdf")
+    if resultado.status == "SIM":
+        for ocorrencia in resultado.ocorrencias:
+            print(ocorrencia.norma, ocorrencia.padrao, ocorrencia.pagina)
+
+Orientações:
+- scan_file(caminho), scan_bytes(dados) e scan_directory(caminho,
+  workers=N) devolvem objetos ResultadoArquivo, nada de texto formatado.
+- A configuração vem num objeto Opcoes (janela, recursivo, limites da
+  extração, cache), nada de variável global. Cada chamada usa só o que
+  recebeu, então pode chamar de várias threads ao mesmo tempo.
+- Com limite de tempo ou memória (o padrão, igual ao do programa) a
+  extração roda em processo separado. No Windows o programa que chama tem
+  que ter o "if __name__ == '__main__':", como todo uso de multiprocessing.
+  Pra muitos arquivos prefira scan_directory, que sobe um processo por
+  trabalhador e reaproveita; o scan_file sobe um a cada chamada.
+- Por padrão não usa o cache de texto (nada gravado em disco); passe
+  Opcoes(cache_dir=...) pra usar.
+- O log vai pros loggers "detetive.*" (módulo logging), quem chama decide
+  se e onde mostrar.
+
+Sobre a saída:
+- Não gera arquivos, além do cache de texto, se pedido.
+
+Histórico de alterações:
+- 2026 10 19 Versão 0.0.4: Implantação.
+- 2026 10 19 Versão 0.0.4: Memória das linhas repetidas (memo_limite_mb).
+- 2026 10 19 Versão 0.0.4: Trabalhadores do scan_directory pela máquina.
+"""
+
+import collections
+import concurrent.futures
+import logging
+import os
+import queue
+import tempfile
+import time
+
+import autoajuste
+import cache_texto
+import duplicados
+import extracao
+import varredura
+
+log = logging.getLogger("detetive.api")
+
+# Configuração de uma varredura. Imutável, pode ser compartilhada entre
+# threads à vontade.
+# - janela: linhas seguidas em que norma e padrão são pareados (1 = mesma)
+# - recursivo: scan_directory desce nos subdiretórios
+# - tempo_limite, memoria_limite_mb: limites da extração (0 e 0 extrai no
+#   próprio processo, sem vigia)
+# - cache_dir: diretório do cache de texto, None não usa cache
+# - cache_limite_mb: tamanho máximo do cache
+# - memo_limite_mb: memória das linhas repetidas (ver varredura.MemoLinhas),
+#   uma por chamada, 0 desliga
+Opcoes = collections.namedtuple(
+    "Opcoes",
+    ["janela", "recursivo", "tempo_limite", "memoria_limite_mb", "cache_dir",
+     "cache_limite_mb", "memo_limite_mb"],
+    defaults=[1, False, 900, 4096, None, cache_texto.LIMITE_PADRAO_MB,
+              varredura.LIMITE_MEMO_MB],
+)
+
+# Um item proibido encontrado. linha_norma é a linha da norma quando ela
+# está numa linha vizinha (janela > 1), senão None.
+Ocorrencia = collections.namedtuple(
+    "Ocorrencia", ["norma", "padrao", "pagina", "linha", "linha_norma"]
+)
+
+# Resultado de um arquivo.
+# - status: "SIM" (tem item proibido), "NAO", "TIMEOUT", "OOM" ou "ERRO"
+# - paginas_nao_pesquisaveis: páginas em branco ou sem texto
+# - ocorrencias: lista de Ocorrencia, na ordem em que foram achadas
+# - interrupcao: (motivo, paginas lidas) se a extração passou do limite
+# - erro: mensagem, se o status é "ERRO"
+# - duplicata_de: caminho do original, se o arquivo é cópia idêntica
+ResultadoArquivo = collections.namedtuple(
+    "ResultadoArquivo",
+    ["nome", "caminho", "status", "total_paginas",
+     "paginas_nao_pesquisaveis", "ocorrencias", "interrupcao", "erro",
+     "tempo_s", "duplicata_de"],
+    defaults=[None, None, 0.0, None],
+)
+
+
+class _Recursos:
+    """
+    Cache, memória de linhas e extratores de uma chamada, fechados no fim
+    dela. Um extrator por trabalhador, emprestado arquivo a arquivo.
+    """
+
+    def __init__(self, opcoes, trabalhadores=1):
+        self.opcoes = opcoes
+        self.cache = None
+        if opcoes.cache_dir:
+            self.cache = cache_texto.CacheTexto(opcoes.cache_dir,
+                                                opcoes.cache_limite_mb)
+        self.memo = None
+        if opcoes.memo_limite_mb > 0:
+            self.memo = varredura.MemoLinhas(opcoes.memo_limite_mb)
+        self._extratores = queue.Queue()
+        for _ in range(trabalhadores):
+            extrator = None
+            if opcoes.tempo_limite or opcoes.memoria_limite_mb:
+                extrator = extracao.ExtratorIsolado(
+                    opcoes.tempo_limite, opcoes.memoria_limite_mb
+                )
+            self._extratores.put(extrator)
+
+    def analisar(self, nome, caminho):
+        """
+        Analisa um PDF com um dos extratores livres.
+
+        :param nome: Nome do arquivo pro resultado.
+        :param caminho: Caminho do arquivo.
+        :return: Objeto ResultadoArquivo.
+        """
+        inicio = time.time()
+        extrator = self._extratores.get()
+        try:
+            (resultados, paginas_nao_pesquisaveis, total_paginas, _,
+             interrupcao) = varredura.analisar_pdf_com_limite(
+                caminho, self.cache, max(self.opcoes.janela, 1), extrator,
+                memo=self.memo,
+            )
+        except Exception as e:
+            log.debug("Erro em %s", caminho, exc_info=True)
+            return ResultadoArquivo(nome, caminho, "ERRO", 0, [], [],
+                                    erro=str(e),
+                                    tempo_s=time.time() - inicio)
+        finally:
+            self._extratores.put(extrator)
+
+        ocorrencias = [
+            Ocorrencia(norma, achado[0], achado[1], achado[2],
+                       achado[3] if len(achado) > 3 else None)
+            for norma, achados in resultados.items() for achado in achados
+        ]
+        return ResultadoArquivo(
+            nome, caminho, varredura.status_arquivo(resultados, interrupcao),
+            total_paginas, paginas_nao_pesquisaveis, ocorrencias,
+            interrupcao=interrupcao, tempo_s=time.time() - inicio,
+        )
+
+    def close(self):
+        while not self._extratores.empty():
+            extrator = self._extratores.get()
+            if extrator:
+                extrator.close()
+        if self.cache:
+            self.cache.close()
+            self.cache = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+        return False
+
+
+def scan_file(caminho, opcoes=None):
+    """
+    Procura os materiais proibidos num PDF.
+
+    :param caminho: Caminho do arquivo PDF.
+    :param opcoes: Objeto Opcoes, None usa o padrão.
+    :return: Objeto ResultadoArquivo.
+    """
+    opcoes = opcoes or Opcoes()
+    with _Recursos(opcoes) as recursos:
+        return recursos.analisar(os.path.basename(caminho), caminho)
+
+
+def scan_bytes(dados, nome="documento.pdf", opcoes=None):
+    """
+    Procura os materiais proibidos num PDF que está na memória (veio do
+    banco, de um upload...).
+
+    :param dados: Conteúdo do PDF (bytes).
+    :param nome: Nome que vai no resultado.
+    :param opcoes: Objeto Opcoes, None usa o padrão.
+    :return: Objeto ResultadoArquivo, com caminho None.
+    """
+    # A extração trabalha com arquivo, vai pra um temporário e tchau
+    with tempfile.NamedTemporaryFile(suffix=".pdf",
+                                     delete=False) as temporario:
+        temporario.write(dados)
+    try:
+        opcoes = opcoes or Opcoes()
+        with _Recursos(opcoes) as recursos:
+            resultado = recursos.analisar(nome, temporario.name)
+    finally:
+        os.remove(temporario.name)
+    return resultado._replace(caminho=None)
+
+
+def scan_directory(caminho, workers=None, opcoes=None):
+    """
+    Procura os materiais proibidos em todos os PDFs de um diretório, vários
+    arquivos ao mesmo tempo. Cópias idênticas são analisadas uma vez só.
+
+    :param caminho: Diretório com os PDFs.
+    :param workers: Quantos arquivos são analisados em paralelo. None
+    escolhe pelos núcleos e pela memória livre (ver autoajuste.py).
+    :param opcoes: Objeto Opcoes, None usa o padrão (recursivo vem daqui).
+    :return: Lista de ResultadoArquivo, na ordem da listagem (a mesma do
+    programa). Na busca recursiva o nome é o caminho relativo ao diretório.
+    """
+    opcoes = opcoes or Opcoes()
+    if not workers:
+        estimativa = autoajuste.ESTIMATIVA_TRABALHADOR_MB
+        if opcoes.memoria_limite_mb:
+            estimativa = min(estimativa, opcoes.memoria_limite_mb)
+        workers = autoajuste.trabalhadores_iniciais(estimativa)
+    workers = max(workers, 1)
+    arquivos = varredura.listar_pdfs(caminho, opcoes.recursivo)
+    duplicatas = duplicados.mapear_duplicados(
+        [caminho_arquivo for _, caminho_arquivo in arquivos]
+    )
+
+    resultados = []
+    with _Recursos(opcoes, workers) as recursos:
+        with concurrent.futures.ThreadPoolExecutor(
+            workers, thread_name_prefix="detetive"
+        ) as executor:
+            futuros = {
+                caminho_arquivo: executor.submit(recursos.analisar, nome,
+                                                 caminho_arquivo)
+                for nome, caminho_arquivo in arquivos
+                if caminho_arquivo not in duplicatas
+            }
+            for nome, caminho_arquivo in arquivos:
+                original = duplicatas.get(caminho_arquivo)
+                if original:
+                    # Cópia: mesmo resultado do original, apontando pra ele
+                    resultados.append(futuros[original].result()._replace(
+                        nome=nome, caminho=caminho_arquivo, tempo_s=0.0,
+                        duplicata_de=original,
+                    ))
+                else:
+                    resultados.append(futuros[caminho_arquivo].result())
+    return resultados
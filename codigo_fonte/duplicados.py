@@ -0,0 +1,114 @@
+"""
+duplicados.py
+
+Descrição:
+Localiza cópias idênticas do mesmo PDF dentro da árvore de diretórios.
+O mesmo documento costuma aparecer em "emitidos", "recebidos" e nas pastas
+de cada disciplina, e não faz sentido extrair e pesquisar tudo de novo.
+
+Orientações:
+- Primeiro agrupa os arquivos por tamanho, que sai de graça do sistema de
+  arquivos. Só quem tem tamanho repetido tem o conteúdo lido pra calcular
+  o hash, arquivo com tamanho único não tem como ter cópia.
+- O hash é calculado com o arquivo mapeado em memória (mmap). Se o mmap não
+  for possível (compartilhamento de rede que não deixa, por exemplo), lê em
+  blocos.
+
+Sobre a saída:
+- Não gera arquivos, devolve o mapa cópia -> original.
+
+Histórico de alterações:
+- 2026 10 19 Versão 0.0.4: Implantação.
+- 2026 10 19 Versão 0.0.4: Hash de conteúdo já lido (calcular_hash_dados).
+- 2026 10 19 Versão 0.0.4: Hash de arquivo já aberto (calcular_hash_aberto).
+"""
+
+import hashlib
+import mmap
+import os
+
+# Tamanho do bloco de leitura quando não der pra usar mmap
+TAMANHO_BLOCO = 1024 * 1024
+
+
+def calcular_hash(caminho):
+    """
+    Calcula o hash SHA-256 do conteúdo de um arquivo.
+
+    :param caminho: Caminho do arquivo.
+    :return: O hash em hexadecimal.
+    """
+    with open(caminho, "rb") as arquivo:
+        return calcular_hash_aberto(arquivo)
+
+
+def calcular_hash_aberto(arquivo):
+    """
+    O mesmo hash do calcular_hash, pra um arquivo que já está aberto (sem
+    trazer o conteúdo todo pra memória).
+
+    :param arquivo: Arquivo aberto em modo binário.
+    :return: O hash em hexadecimal.
+    """
+    resumo = hashlib.sha256()
+    # mmap de arquivo vazio da erro, e o hash do vazio ja ta pronto
+    if os.fstat(arquivo.fileno()).st_size == 0:
+        return resumo.hexdigest()
+    try:
+        with mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+            resumo.update(mapa)
+    except (OSError, ValueError):
+        # Plano B, lê em blocos
+        arquivo.seek(0)
+        for bloco in iter(lambda: arquivo.read(TAMANHO_BLOCO), b""):
+            resumo.update(bloco)
+    return resumo.hexdigest()
+
+
+def calcular_hash_dados(dados):
+    """
+    O mesmo hash do calcular_hash, pra um conteúdo que já está na memória.
+
+    :param dados: Conteúdo do arquivo (bytes).
+    :return: O hash em hexadecimal.
+    """
+    return hashlib.sha256(dados).hexdigest()
+
+
+def mapear_duplicados(caminhos):
+    """
+    Descobre quais arquivos são cópias idênticas de outros.
+
+    O original de cada grupo é o primeiro que aparece em 'caminhos', então
+    na ordem de processamento ele sempre vem antes das cópias.
+
+    :param caminhos: Lista de caminhos dos arquivos.
+    :return: Dicionário {caminho_da_copia: caminho_do_original}. Arquivos
+    sem cópia não aparecem.
+    """
+    # Passo 1: agrupa por tamanho, sem ler nada
+    por_tamanho = {}
+    for caminho in caminhos:
+        try:
+            tamanho = os.path.getsize(caminho)
+        except OSError:
+            continue
+        por_tamanho.setdefault(tamanho, []).append(caminho)
+
+    # Passo 2: hash só de quem divide o tamanho com alguém
+    duplicatas = {}
+    for grupo in por_tamanho.values():
+        if len(grupo) < 2:
+            continue
+        primeiro_por_hash = {}
+        for caminho in grupo:
+            try:
+                resumo = calcular_hash(caminho)
+            except OSError:
+                # Nao deu pra ler, deixa o processamento normal reclamar
+                continue
+            if resumo in primeiro_por_hash:
+                duplicatas[caminho] = primeiro_por_hash[resumo]
+            else:
+                primeiro_por_hash[resumo] = caminho
+    return duplicatas
@@ -0,0 +1,444 @@
+"""
+esteira.py
+
+Descrição:
+Esteira (pipeline) da varredura de um diretório. Antes cada arquivo passava
+por tudo em sequência: abre, lê o PDF inteiro, extrai, pesquisa, grava. Com
+os PDFs vindo de um compartilhamento de rede lento, enquanto os bytes
+chegavam a CPU ficava parada, e enquanto o PyPDF2 trabalhava a rede ficava
+parada.
+
+Agora cada etapa anda no seu ritmo, com uma fila limitada entre elas:
+
+    descoberta -> leitura -> extração -> busca -> gravação
+
+e a leitura do arquivo N+1 acontece enquanto o N é extraído e o N-1 é
+pesquisado.
+
+Orientações:
+- Descoberta (listar_pdfs e as cópias idênticas) continua no Procura_B8,
+  a esteira recebe a lista dos arquivos que precisam ser analisados.
+- Leitura: uma thread lê cada arquivo inteiro (até LIMITE_LEITURA_MB, os
+  maiores ficam pra extração ler do disco) e já calcula o hash do conteúdo
+  (cache de texto, histórico, saídas), sem ler de novo. Dos maiores o hash
+  sai do arquivo aberto, sem trazer tudo pra memória.
+- Extração: uma thread por extrator. O trabalho pesado é no processo do
+  ExtratorIsolado (extracao.py), que recebe os bytes já lidos. Mais
+  extratores, mais arquivos extraídos ao mesmo tempo.
+- Busca e gravação: na thread de quem percorre a esteira (a principal, dona
+  do Tk e das conexões do SQLite), na ordem da listagem.
+- Filas limitadas: 'fila_leitura' arquivos lidos esperando extração e
+  'fila_extracao' arquivos extraídos esperando a busca. Encheu, a etapa de
+  trás espera, então a memória não cresce com o tamanho do diretório.
+- O log feito nas threads da esteira é segurado e solto na thread principal
+  junto com o arquivo dele, pra não sair fora de ordem nem mexer no Tk de
+  outra thread.
+- relatorio() conta quem esperou quem, pra ajustar filas e extratores (em
+  rede lenta, fila de leitura maior).
+- Com triar, a leitura faz a triagem de cada arquivo (ver triagem.py) nos
+  bytes que acabou de ler, sem abrir o arquivo de novo: arquivo ilegível
+  sai com erro sem ocupar extrator, e as páginas sem fonte não passam pela
+  extração. paginas_previstas() dá o total de páginas que se sabe até ali,
+  pro progresso.
+- Com um autoajuste.Regulador, cada thread de extração pede a vez antes de
+  começar um arquivo: com a memória apertada nem todos os extratores
+  trabalham ao mesmo tempo.
+
+Sobre a saída:
+- Não gera arquivos.
+
+Histórico de alterações:
+- 2026 10 19 Versão 0.0.4: Implantação.
+- 2026 10 19 Versão 0.0.4: Regulador do autoajuste (memória e carga).
+- 2026 10 19 Versão 0.0.4: Triagem antes da leitura e da extração.
+- 2026 10 19 Versão 0.0.4: Triagem na etapa de leitura, nos bytes já lidos.
+- 2026 10 19 Versão 0.0.4: Hash também dos arquivos acima do LIMITE_LEITURA_MB.
+"""
+
+import collections
+import logging
+import os
+import queue
+import threading
+import time
+
+import duplicados
+import extracao
+import triagem
+import varredura
+
+log = logging.getLogger("detetive.esteira")
+
+# Arquivos lidos esperando a extração
+FILA_LEITURA = 2
+# Arquivos extraídos esperando a busca
+FILA_EXTRACAO = 2
+# Arquivo maior que isso não é lido antes, a extração lê do disco
+LIMITE_LEITURA_MB = 256
+# De quanto em quanto tempo quem está esperando confere se é pra parar
+INTERVALO_PARADA = 0.2
+# Tempo máximo esperando as threads no close (segundos)
+ESPERA_FECHAR = 5
+
+# Um arquivo que passou pela leitura e pela extração.
+# - tamanho: em bytes
+# - hash_arquivo: hash do conteúdo, None se não deu pra ler o arquivo
+# - extraido: lista com o texto das páginas ou extracao.LimiteExcedido com
+#   as páginas lidas até o limite; None se deu erro
+# - erro: a exceção, se deu erro na leitura ou na extração
+# - tempo_s: tempo gasto na leitura e na extração
+# - triagem: objeto triagem.Triagem do arquivo, None sem triagem (ou se nem
+#   deu pra abrir o arquivo)
+Extraido = collections.namedtuple(
+    "Extraido",
+    ["nome", "caminho", "tamanho", "hash_arquivo", "extraido", "erro",
+     "tempo_s", "triagem"],
+    defaults=[None],
+)
+
+
+class _SeguraLog(logging.Filter):
+    """
+    Segura os registros de log feitos nas threads da esteira que estão
+    trabalhando num arquivo, pra thread principal soltar depois.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._local = threading.local()
+
+    def iniciar(self):
+        self._local.registros = []
+
+    def terminar(self):
+        registros = self._local.registros
+        self._local.registros = None
+        return registros
+
+    def filter(self, record):
+        registros = getattr(self._local, "registros", None)
+        if registros is None:
+            return True
+        # O mesmo registro passa pelo filtro de cada handler, guarda uma vez
+        if not registros or registros[-1] is not record:
+            registros.append(record)
+        return False
+
+
+def _handlers_do_log():
+    """
+    :return: Os handlers por onde passa o log do programa, do logger
+    "detetive" pra cima (igual o logging faz).
+    """
+    handlers = []
+    logger = logging.getLogger("detetive")
+    while logger:
+        handlers.extend(logger.handlers)
+        if not logger.propagate:
+            break
+        logger = logger.parent
+    return handlers
+
+
+class Esteira:
+    """
+    Lê e extrai os arquivos em segundo plano. Percorrendo a esteira, vêm os
+    objetos Extraido na ordem da lista.
+    """
+
+    def __init__(self, arquivos, cache=None, extratores=(None,),
+                 fila_leitura=FILA_LEITURA, fila_extracao=FILA_EXTRACAO,
+                 limite_leitura_mb=LIMITE_LEITURA_MB, regulador=None,
+                 triar=False):
+        """
+        :param arquivos: Lista de (nome, caminho) dos arquivos.
+        :param cache: Objeto CacheTexto ou None.
+        :param extratores: Lista de extracao.ExtratorIsolado (None extrai na
+        própria thread), um por thread de extração.
+        :param fila_leitura: Arquivos lidos esperando a extração.
+        :param fila_extracao: Arquivos extraídos esperando a busca.
+        :param limite_leitura_mb: Tamanho máximo de arquivo lido antes.
+        :param regulador: Objeto autoajuste.Regulador que decide quantos
+        extratores trabalham ao mesmo tempo, ou None (todos).
+        :param triar: Se True, faz a triagem de cada arquivo na leitura.
+        """
+        self.arquivos = list(arquivos)
+        self.cache = cache
+        self.extratores = list(extratores) or [None]
+        self.fila_leitura = max(fila_leitura, 1)
+        self.fila_extracao = max(fila_extracao, 0)
+        self.limite_leitura_bytes = limite_leitura_mb * 1024 * 1024
+        self.regulador = regulador
+        self.triar = triar
+        # caminho -> triagem.Triagem, preenchido pela leitura
+        self.triagens = {}
+
+        self._lidos = queue.Queue(self.fila_leitura)
+        # Vagas pra extrair: uma por extrator trabalhando mais os extraídos
+        # esperando a busca
+        self._vagas = threading.Semaphore(len(self.extratores)
+                                          + self.fila_extracao)
+        self._prontos = {}
+        self._condicao = threading.Condition()
+        self._parar = threading.Event()
+        self._trava = threading.Lock()
+
+        # Estatísticas
+        self.entregues = 0
+        self.bytes_lidos = 0
+        self.tempo_leitura = 0.0
+        self.tempo_extracao = 0.0
+        self.espera_extracao = 0.0
+        self.espera_busca = 0.0
+        self._ocupacao_leitura = 0
+        self._ocupacao_extracao = 0
+
+        self._sobras = []
+        self._segura_log = _SeguraLog()
+        self._handlers = _handlers_do_log()
+        for handler in self._handlers:
+            handler.addFilter(self._segura_log)
+
+        self._threads = [threading.Thread(target=self._ler, daemon=True,
+                                          name="esteira-leitura")]
+        for numero, extrator in enumerate(self.extratores, start=1):
+            self._threads.append(threading.Thread(
+                target=self._extrair, args=(extrator,), daemon=True,
+                name=f"esteira-extracao-{numero}",
+            ))
+        for thread in self._threads:
+            thread.start()
+
+    def _colocar(self, item):
+        while not self._parar.is_set():
+            try:
+                self._lidos.put(item, timeout=INTERVALO_PARADA)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _tirar(self):
+        while not self._parar.is_set():
+            try:
+                return self._lidos.get(timeout=INTERVALO_PARADA)
+            except queue.Empty:
+                continue
+        return None
+
+    def _ler(self):
+        for numero, (nome, caminho) in enumerate(self.arquivos):
+            inicio = time.perf_counter()
+            tamanho = 0
+            dados = hash_arquivo = erro = avaliacao = None
+            pular = ()
+            try:
+                with open(caminho, "rb") as arquivo:
+                    tamanho = os.fstat(arquivo.fileno()).st_size
+                    if tamanho <= self.limite_leitura_bytes:
+                        dados = arquivo.read()
+                        hash_arquivo = duplicados.calcular_hash_dados(dados)
+                    else:
+                        hash_arquivo = duplicados.calcular_hash_aberto(
+                            arquivo
+                        )
+                if self.triar:
+                    # Nos bytes que já estão aqui (arquivo grande demais
+                    # pra ler antes, a triagem lê do disco)
+                    avaliacao = triagem.classificar(caminho, dados)
+                    with self._trava:
+                        self.triagens[caminho] = avaliacao
+                    if avaliacao.erro is not None:
+                        # Falha logo, nem extrai
+                        raise triagem.ArquivoIlegivel(avaliacao.erro)
+                    pular = avaliacao.sem_fonte
+            except Exception as e:
+                erro = e
+            tempo = time.perf_counter() - inicio
+            with self._trava:
+                self.tempo_leitura += tempo
+                self.bytes_lidos += len(dados or b"")
+            if erro is not None:
+                # Não vai pra extração, não precisa segurar os bytes na fila
+                dados = None
+            if not self._colocar((numero, nome, caminho, tamanho, dados,
+                                  hash_arquivo, pular, erro, tempo,
+                                  avaliacao)):
+                return
+        # Acabou: um aviso pra cada thread de extração
+        for _ in self.extratores:
+            if not self._colocar(None):
+                return
+
+    def _extrair(self, extrator):
+        while True:
+            # Pega a vaga antes do arquivo. Os arquivos saem da fila em
+            # ordem, então o próximo que a busca espera sempre está com
+            # alguém que tem vaga.
+            while not self._vagas.acquire(timeout=INTERVALO_PARADA):
+                if self._parar.is_set():
+                    return
+            # O log do regulador (que roda aqui) sai junto com o arquivo
+            self._segura_log.iniciar()
+            if self.regulador and not self.regulador.entrar(self._parar):
+                self._sobrou(self._segura_log.terminar())
+                return
+            inicio = time.perf_counter()
+            item = self._tirar()
+            with self._trava:
+                self.espera_extracao += time.perf_counter() - inicio
+            if item is None:
+                if self.regulador:
+                    self.regulador.sair()
+                self._sobrou(self._segura_log.terminar())
+                self._vagas.release()
+                return
+            (numero, nome, caminho, tamanho, dados, hash_arquivo, pular, erro,
+             tempo_leitura, avaliacao) = item
+
+            inicio = time.perf_counter()
+            extraido = None
+            try:
+                if erro is None:
+                    extraido = varredura.extrair_paginas(
+                        caminho, self.cache, extrator, dados, hash_arquivo,
+                        pular,
+                    )
+            except extracao.LimiteExcedido as e:
+                extraido = e
+            except Exception as e:
+                erro = e
+            finally:
+                if self.regulador:
+                    self.regulador.sair()
+                registros = self._segura_log.terminar()
+            tempo = time.perf_counter() - inicio
+            with self._trava:
+                self.tempo_extracao += tempo
+
+            pronto = Extraido(nome, caminho, tamanho, hash_arquivo, extraido,
+                              erro, tempo_leitura + tempo, avaliacao)
+            with self._condicao:
+                self._prontos[numero] = (pronto, registros)
+                self._condicao.notify_all()
+
+    def _sobrou(self, registros):
+        # Log segurado sem arquivo pra acompanhar, sai no close
+        with self._trava:
+            self._sobras.extend(registros)
+
+    def _soltar(self, registros):
+        for registro in registros:
+            logging.getLogger(registro.name).handle(registro)
+
+    def __iter__(self):
+        for numero in range(len(self.arquivos)):
+            inicio = time.perf_counter()
+            with self._condicao:
+                self._ocupacao_leitura += self._lidos.qsize()
+                self._ocupacao_extracao += len(self._prontos)
+                log.debug("Filas da esteira: leitura %s, extração %s",
+                          self._lidos.qsize(), len(self._prontos))
+                while numero not in self._prontos:
+                    if not any(thread.is_alive()
+                               for thread in self._threads[1:]):
+                        raise RuntimeError("A esteira parou antes do fim.")
+                    self._condicao.wait(INTERVALO_PARADA)
+                pronto, registros = self._prontos.pop(numero)
+            self._vagas.release()
+            self.espera_busca += time.perf_counter() - inicio
+            self.entregues += 1
+            # Solta o log das threads da esteira, na hora certa
+            self._soltar(registros)
+            yield pronto
+
+    def paginas_previstas(self):
+        """
+        Total de páginas previsto, pro progresso: as dos arquivos que já
+        passaram pela triagem e, pros que faltam, a média deles.
+
+        :return: Número de páginas, 0 se nenhum passou ainda.
+        """
+        with self._trava:
+            triadas = [avaliacao.total_paginas
+                       for avaliacao in self.triagens.values()
+                       if avaliacao.erro is None]
+            faltam = len(self.arquivos) - len(self.triagens)
+        if not triadas:
+            return 0
+        return sum(triadas) + round(faltam * sum(triadas) / len(triadas))
+
+    def estatisticas(self):
+        """
+        :return: Dicionário com as estatísticas da esteira.
+        """
+        with self._trava:
+            entregues = max(self.entregues, 1)
+            return {
+                "arquivos": self.entregues,
+                "extratores": len(self.extratores),
+                "fila_leitura": self.fila_leitura,
+                "fila_extracao": self.fila_extracao,
+                "lidos_mb": self.bytes_lidos / (1024 * 1024),
+                "tempo_leitura_s": self.tempo_leitura,
+                "tempo_extracao_s": self.tempo_extracao,
+                "espera_extracao_s": self.espera_extracao,
+                "espera_busca_s": self.espera_busca,
+                "ocupacao_leitura": self._ocupacao_leitura / entregues,
+                "ocupacao_extracao": self._ocupacao_extracao / entregues,
+            }
+
+    def relatorio(self):
+        """
+        Estatísticas formatadas pra exibir, com o palpite de quem segurou a
+        esteira.
+
+        :return: Lista de linhas de texto.
+        """
+        est = self.estatisticas()
+        # Fila de extraídos quase sempre cheia: a busca não dá conta. Os
+        # extratores esperando leitura boa parte do tempo: a rede (ou o
+        # disco) não dá conta. Senão é a extração.
+        if (est["fila_extracao"]
+                and est["ocupacao_extracao"] >= 0.8 * est["fila_extracao"]):
+            gargalo = "busca"
+        elif est["espera_extracao_s"] > est["tempo_extracao_s"]:
+            gargalo = "leitura (rede/disco), aumente a fila de leitura"
+        elif self.regulador and self.regulador.reducoes:
+            gargalo = "extração, segurada pelo autoajuste (memória ou carga)"
+        else:
+            gargalo = "extração, aumente os extratores"
+        return [
+            f"Esteira: {est['arquivos']} arquivos, {est['extratores']} "
+            f"extrator(es), filas de leitura {est['fila_leitura']} e de "
+            f"extração {est['fila_extracao']}",
+            f"  Leitura {est['lidos_mb']:.1f} MB em "
+            f"{est['tempo_leitura_s']:.1f} s, extração "
+            f"{est['tempo_extracao_s']:.1f} s; ocupação média das filas: "
+            f"leitura {est['ocupacao_leitura']:.1f}, extração "
+            f"{est['ocupacao_extracao']:.1f}",
+            f"  A busca esperou a extração {est['espera_busca_s']:.1f} s, a "
+            f"extração esperou a leitura {est['espera_extracao_s']:.1f} s. "
+            f"Gargalo: {gargalo}",
+        ] + (self.regulador.relatorio() if self.regulador else [])
+
+    def close(self):
+        """
+        Para as threads, tira o filtro do log e solta o log que ficou
+        segurado sem arquivo.
+        """
+        self._parar.set()
+        for thread in self._threads:
+            thread.join(ESPERA_FECHAR)
+        for handler in self._handlers:
+            handler.removeFilter(self._segura_log)
+        with self._trava:
+            sobras, self._sobras = self._sobras, []
+        self._soltar(sobras)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+        return False
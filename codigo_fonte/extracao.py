@@ -0,0 +1,280 @@
+"""
+extracao.py
+
+Descrição:
+Extração do texto das páginas dos PDFs, com opção de rodar isolada num
+processo separado vigiado por um "cão de guarda" (watchdog).
+
+De tempos em tempos aparece um PDF malformado que deixa o extract_text do
+PyPDF2 rodando por uma hora ou comendo memória sem parar. Rodando no mesmo
+processo, trava a pasta inteira. Isolado, quando passa do limite de tempo ou
+de memória o processo é morto, o arquivo é marcado como TIMEOUT ou OOM e a
+execução segue pro próximo.
+
+Orientações:
+- iterar_paginas é a extração "pura", sem processo separado.
+- ExtratorIsolado mantém um processo filho que é reaproveitado de arquivo
+  em arquivo, só é recriado quando precisa ser morto. Assim não se paga o
+  custo de criar processo pra cada PDF.
+- O filho manda o texto página a página, então quando estoura o limite já
+  se sabe até onde chegou.
+- Não importa nada de interface gráfica. Só que com spawn o processo filho
+  roda de novo o módulo principal do pai antes de tudo, então os módulos
+  de entrada (tela_principal.py, Procura_B8.py) só carregam a interface
+  dentro do main / do if __name__ == "__main__", que o filho não roda.
+- Quem já leu o arquivo (a esteira, ver esteira.py) pode mandar o conteúdo
+  em 'dados' e o PDF não é lido do disco (ou da rede) de novo.
+- Páginas em 'pular' (sem fonte, ver triagem.py) nem passam pelo
+  extract_text, vêm como "".
+
+Sobre a saída:
+- Não gera arquivos.
+
+Histórico de alterações:
+- 2026 10 19 Versão 0.0.4: Implantação.
+- 2026 10 19 Versão 0.0.4: aquecer() pra subir o processo filho antes.
+- 2026 10 19 Versão 0.0.4: PyPDF2 carregado só na hora de extrair.
+- 2026 10 19 Versão 0.0.4: Extração do conteúdo já lido (dados).
+- 2026 10 19 Versão 0.0.4: Páginas sem fonte puladas (pular, ver triagem.py).
+- 2026 10 19 Versão 0.0.4: Filho não carrega a interface do módulo principal.
+"""
+
+import importlib
+import io
+import multiprocessing
+import time
+import traceback
+
+import psutil
+
+# O PyPDF2 leva dezenas de milissegundos pra carregar e só é usado na hora de
+# extrair, então é importado lá (e no __getattr__ abaixo). Quem só importa o
+# módulo (a API do detetive.py, por exemplo) não paga.
+
+# De quanto em quanto tempo o cão de guarda olha o processo filho (segundos)
+INTERVALO_VIGIA = 0.2
+# Quanto tempo esperar o processo filho subir (segundos)
+TEMPO_INICIO = 60
+
+
+def __getattr__(nome):
+    # BACKEND_EXTRACAO: quem extrai o texto das páginas, entra na chave do
+    # cache de texto porque outra biblioteca (ou outra versão) pode extrair
+    # diferente. Calculado no primeiro uso.
+    if nome == "BACKEND_EXTRACAO":
+        import PyPDF2
+        globals()[nome] = f"PyPDF2-{PyPDF2.__version__}"
+        return globals()[nome]
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+
+
+class LimiteExcedido(Exception):
+    """
+    O processamento de um arquivo passou do limite de tempo ("TIMEOUT") ou
+    de memória ("OOM") e foi interrompido.
+    Quem chama preenche 'paginas' com o que foi extraído até ali.
+    """
+
+    def __init__(self, motivo, mensagem):
+        super().__init__(mensagem)
+        self.motivo = motivo
+        self.paginas = []
+        self.total_paginas = 0
+
+
+def iterar_paginas(caminho_completo, dados=None, pular=()):
+    """
+    Extrai o texto das páginas de um PDF, uma de cada vez.
+
+    :param caminho_completo: Caminho do arquivo PDF.
+    :param dados: Conteúdo do arquivo, se já foi lido, ou None pra ler do
+    caminho.
+    :param pular: Índices (a partir de 0) das páginas que não têm texto pra
+    extrair, vêm como "" sem chamar o extract_text.
+    :return: Gerador de mensagens:
+        ("total", total_paginas) logo depois de abrir o arquivo;
+        ("pagina", indice, texto) pra cada página ("" se não tiver texto);
+        ("erro_pagina", indice, mensagem, traceback) se a página deu erro.
+    """
+    import PyPDF2
+
+    # Abre o arquivo PDF para leitura (ou usa o que já veio lido)
+    if dados is not None:
+        arquivo = io.BytesIO(dados)
+    else:
+        arquivo = open(caminho_completo, "rb")
+    with arquivo as pdf_file:
+        # Aqui a verdadeira magia acontece! Cria o leitor de PDF
+        pdf_reader = PyPDF2.PdfReader(pdf_file)
+        # Obtém o total de páginas no PDF
+        total_paginas = len(pdf_reader.pages)
+        yield ("total", total_paginas)
+
+        pular = set(pular)
+        # Roda o pdf todo
+        for page_num in range(total_paginas):
+            if page_num in pular:
+                yield ("pagina", page_num, "")
+                continue
+            try:
+                # Extrai o texto da página
+                texto = pdf_reader.pages[page_num].extract_text() or ""
+                yield ("pagina", page_num, texto)
+            except Exception as e:
+                yield ("erro_pagina", page_num, str(e),
+                       traceback.format_exc())
+
+
+def _trabalhador(conexao):
+    """
+    Laço do processo filho: recebe (caminho, dados, pular), devolve as
+    páginas.
+    None encerra o processo.
+    """
+    # Carrega o PyPDF2 antes de avisar que está pronto, o relógio do cão de
+    # guarda só começa a contar depois disso
+    importlib.import_module("PyPDF2")
+    conexao.send(("pronto",))
+    while True:
+        pedido = conexao.recv()
+        if pedido is None:
+            break
+        try:
+            for mensagem in iterar_paginas(*pedido):
+                conexao.send(mensagem)
+            conexao.send(("fim",))
+        except Exception as e:
+            conexao.send(("erro", f"{type(e).__name__}: {e}"))
+
+
+class ExtratorIsolado:
+    """
+    Extrai o texto dos PDFs num processo filho vigiado. Passou do tempo
+    limite ou da memória limite, o filho é morto e LimiteExcedido é
+    levantada.
+    """
+
+    def __init__(self, tempo_limite=0, memoria_limite_mb=0):
+        """
+        :param tempo_limite: Tempo máximo por arquivo, em segundos (0 não
+        limita).
+        :param memoria_limite_mb: Memória máxima do processo filho, em MB
+        (0 não limita).
+        """
+        self.tempo_limite = tempo_limite
+        self.memoria_limite_bytes = memoria_limite_mb * 1024 * 1024
+        # spawn em todo sistema, fork com o Tk aberto no pai da problema
+        self._contexto = multiprocessing.get_context("spawn")
+        self._processo = None
+        self._conexao = None
+
+    def _iniciar(self):
+        self._conexao, conexao_filho = self._contexto.Pipe()
+        self._processo = self._contexto.Process(
+            target=_trabalhador, args=(conexao_filho,), daemon=True
+        )
+        self._processo.start()
+        conexao_filho.close()
+        # Espera o filho terminar de carregar, se não vier é porque nem
+        # conseguiu subir
+        if not self._conexao.poll(TEMPO_INICIO):
+            self._matar()
+            raise RuntimeError("Processo de extração não iniciou.")
+        self._conexao.recv()
+
+    def aquecer(self):
+        """
+        Sobe o processo filho agora, pra primeira extração não pagar a
+        espera (modo serviço).
+        """
+        if self._processo is None or not self._processo.is_alive():
+            self._iniciar()
+
+    def _matar(self):
+        if self._processo is not None:
+            if self._processo.pid is not None:
+                self._processo.kill()
+                self._processo.join()
+            self._conexao.close()
+        self._processo = None
+        self._conexao = None
+
+    def _memoria(self):
+        try:
+            return psutil.Process(self._processo.pid).memory_info().rss
+        except psutil.Error:
+            return 0
+
+    def extrair(self, caminho_completo, dados=None, pular=()):
+        """
+        Extrai o texto das páginas de um PDF no processo filho.
+
+        :param caminho_completo: Caminho do arquivo PDF.
+        :param dados: Conteúdo do arquivo, se já foi lido, ou None pro filho
+        ler do caminho.
+        :param pular: Índices das páginas que não precisam ser extraídas.
+        :return: Gerador com as mesmas mensagens de iterar_paginas.
+        """
+        self.aquecer()
+        self._conexao.send((caminho_completo, dados, tuple(pular)))
+        inicio = time.monotonic()
+        proxima_vigia = inicio + INTERVALO_VIGIA
+        # Se quem está lendo desistir no meio, o filho fica mandando página
+        # de um arquivo que ninguém quer mais, aí tem que matar
+        terminou = False
+
+        try:
+            while True:
+                if self._conexao.poll(INTERVALO_VIGIA):
+                    try:
+                        mensagem = self._conexao.recv()
+                    except EOFError:
+                        raise RuntimeError(
+                            "Processo de extração terminou inesperadamente."
+                        )
+                    if mensagem[0] == "fim":
+                        terminou = True
+                        return
+                    if mensagem[0] == "erro":
+                        terminou = True
+                        raise RuntimeError(mensagem[1])
+                    yield mensagem
+                elif not self._processo.is_alive():
+                    raise RuntimeError(
+                        "Processo de extração terminou inesperadamente."
+                    )
+
+                # Hora do cão de guarda dar uma olhada
+                agora = time.monotonic()
+                if agora < proxima_vigia:
+                    continue
+                proxima_vigia = agora + INTERVALO_VIGIA
+                if self.tempo_limite and agora - inicio > self.tempo_limite:
+                    raise LimiteExcedido(
+                        "TIMEOUT",
+                        f"Passou do limite de {self.tempo_limite:.0f} "
+                        "segundos.",
+                    )
+                if (self.memoria_limite_bytes
+                        and self._memoria() > self.memoria_limite_bytes):
+                    raise LimiteExcedido(
+                        "OOM",
+                        f"Passou do limite de "
+                        f"{self.memoria_limite_bytes / (1024 * 1024):.0f} MB "
+                        "de memória.",
+                    )
+        finally:
+            if not terminou:
+                self._matar()
+
+    def close(self):
+        """
+        Encerra o processo filho.
+        """
+        if self._processo is not None and self._processo.is_alive():
+            try:
+                self._conexao.send(None)
+                self._processo.join(timeout=5)
+            except (OSError, BrokenPipeError):
+                pass
+        self._matar()
@@ -0,0 +1,427 @@
+"""
+grade_resultados.py
+
+Descrição:
+Tabela com os resultados de uma execução, dentro do programa. Até aqui, pra
+conferir os achados depois da varredura, era rolar o console da janela (que
+só guarda as últimas linhas) ou abrir o CSV no Excel, onde cada achado é uma
+coluna a mais na linha do arquivo.
+
+A tabela lê o resultado_<data_hora>.jsonl da execução (ver
+saidas_estruturadas.py), uma linha por achado, e dá pra ordenar por qualquer
+coluna e filtrar por arquivo, norma, padrão, só arquivos com item proibido
+(SIM) ou só páginas não pesquisáveis.
+
+Orientações:
+- abrir_grade(pai, caminho) abre a tabela numa janela (Toplevel) por cima
+  da janela 'pai'. É o botão "Ver resultados" da janela de execução e o
+  "Resultados..." da tela principal.
+- O Treeview do Tk cria um item por linha, e com 100 mil achados ele leva
+  um tempão pra abrir e se arrasta pra rolar. Aqui a tabela é virtual: o
+  Treeview só tem as linhas que cabem na tela, e rolar troca os valores
+  delas. Ordenar e filtrar mexem numa lista de índices (Resultados), nunca
+  nos widgets.
+- O JSONL é lido aos pedaços, LINHAS_POR_VEZ de cada vez, entre um evento
+  e outro da janela: a tabela abre na hora e vai enchendo.
+- Clicar no cabeçalho ordena pela coluna, clicar de novo inverte.
+- Linhas da tabela:
+    - um achado: norma, padrão, página e linha;
+    - uma página não pesquisável (em branco ou sem texto), com o padrão
+      "(não pesquisável)";
+    - um arquivo sem achado e sem página não pesquisável (NAO, ERRO,
+      TIMEOUT...), só com o status e, se teve, o erro.
+
+Sobre a saída:
+- Não gera arquivos.
+
+Histórico de alterações:
+- 2026 10 19 Versão 0.0.4: Implantação.
+"""
+
+import json
+import logging
+import os
+import tkinter
+from tkinter import ttk
+
+log = logging.getLogger("detetive.grade")
+
+# Linhas do JSONL lidas a cada vez que a janela respira
+LINHAS_POR_VEZ = 20000
+# Espera depois da última tecla antes de filtrar (ms)
+ESPERA_FILTRO = 300
+# Linhas roladas por clique da rodinha do mouse
+LINHAS_RODINHA = 3
+
+# Colunas: (título, largura)
+COLUNAS = [
+    ("Arquivo", 260), ("Status", 70), ("Norma", 90), ("Padrão", 160),
+    ("Página", 60), ("Linha", 60), ("Perfil", 90),
+]
+# Posição das colunas na linha da tabela
+ARQUIVO, STATUS, NORMA, PADRAO, PAGINA, LINHA, PERFIL, TIPO = range(8)
+# Tipos de linha
+TIPO_ACHADO = "achado"
+TIPO_PAGINA = "pagina"
+TIPO_ARQUIVO = "arquivo"
+
+NAO_PESQUISAVEL = "(não pesquisável)"
+
+
+def _chave(valor):
+    """
+    Chave de ordenação de um valor da tabela: texto sem diferenciar
+    maiúsculas.
+    """
+    if isinstance(valor, str):
+        return valor.casefold()
+    return valor
+
+
+class Resultados:
+    """
+    As linhas da tabela, com filtro e ordem. Não tem nada de Tk, dá pra usar
+    (e testar) sem janela.
+    """
+
+    def __init__(self):
+        # Tuplas (arquivo, status, norma, padrao, pagina, linha, perfil,
+        # tipo), na ordem do JSONL
+        self.linhas = []
+        # Arquivo, norma, padrão e perfil de cada linha, juntos e em
+        # minúsculas, pro filtro por texto não ter que montar de novo
+        self._busca = []
+        # Índices das linhas que passam no filtro, na ordem pedida
+        self.visiveis = []
+        self.arquivos = 0
+        self.coluna = None
+        self.decrescente = False
+        self._texto = ""
+        self._so_sim = False
+        self._so_nao_pesquisaveis = False
+        # Arquivo do último registro "arquivo" lido, os achados vêm logo
+        # depois dele
+        self._arquivo = None
+
+    def acrescentar(self, registros):
+        """
+        Acrescenta registros do JSONL (dicionários) e refaz filtro e ordem.
+
+        :param registros: Registros "arquivo" e "achado", na ordem gravada.
+        """
+        for registro in registros:
+            tipo = registro.get("tipo")
+            if tipo == "arquivo":
+                self._acrescentar_arquivo(registro)
+            elif tipo == "achado":
+                arquivo = self._arquivo or {}
+                self._guardar((
+                    registro.get("arquivo"), arquivo.get("status", "SIM"),
+                    registro.get("norma"), registro.get("padrao"),
+                    registro.get("pagina"), registro.get("linha"),
+                    registro.get("perfil") or "", TIPO_ACHADO,
+                ))
+        self._refazer()
+
+    def _acrescentar_arquivo(self, registro):
+        self._arquivo = registro
+        self.arquivos += 1
+        nome = registro.get("arquivo")
+        status = registro.get("status")
+        paginas = registro.get("paginas_nao_pesquisaveis") or []
+        for pagina in paginas:
+            self._guardar((nome, status, "", NAO_PESQUISAVEL, pagina, None,
+                           "", TIPO_PAGINA))
+        if not paginas and status != "SIM":
+            erro = registro.get("erro")
+            self._guardar((nome, status, "", f"({erro})" if erro else "",
+                           None, None, "", TIPO_ARQUIVO))
+
+    def _guardar(self, linha):
+        self.linhas.append(linha)
+        self._busca.append("\0".join(
+            valor or "" for valor in (linha[ARQUIVO], linha[NORMA],
+                                      linha[PADRAO], linha[PERFIL])
+        ).casefold())
+
+    def filtrar(self, texto="", so_sim=False, so_nao_pesquisaveis=False):
+        """
+        Troca o filtro.
+
+        :param texto: Pedaço do arquivo, norma, padrão ou perfil (sem
+        diferenciar maiúsculas), vazio mostra tudo.
+        :param so_sim: Só linhas de arquivos com item proibido.
+        :param so_nao_pesquisaveis: Só páginas não pesquisáveis.
+        """
+        self._texto = texto.strip().casefold()
+        self._so_sim = so_sim
+        self._so_nao_pesquisaveis = so_nao_pesquisaveis
+        self._refazer()
+
+    def ordenar(self, coluna):
+        """
+        Ordena por uma coluna. Se já estava ordenado por ela, inverte.
+
+        :param coluna: Posição da coluna (ARQUIVO, STATUS...).
+        """
+        if self.coluna == coluna:
+            self.decrescente = not self.decrescente
+        else:
+            self.coluna = coluna
+            self.decrescente = False
+        self._refazer()
+
+    def _refazer(self):
+        linhas = self.linhas
+        visiveis = range(len(linhas))
+        if self._texto:
+            texto = self._texto
+            busca = self._busca
+            visiveis = [indice for indice in visiveis
+                        if texto in busca[indice]]
+        if self._so_sim:
+            visiveis = [indice for indice in visiveis
+                        if linhas[indice][STATUS] == "SIM"]
+        if self._so_nao_pesquisaveis:
+            visiveis = [indice for indice in visiveis
+                        if linhas[indice][TIPO] == TIPO_PAGINA]
+        visiveis = list(visiveis)
+        if self.coluna is not None:
+            coluna = self.coluna
+            # Vazios sempre no fim, nas duas ordens
+            vazios = [indice for indice in visiveis
+                      if linhas[indice][coluna] in (None, "")]
+            visiveis = [indice for indice in visiveis
+                        if linhas[indice][coluna] not in (None, "")]
+            # Estável: empate fica na ordem do JSONL (arquivo, página)
+            visiveis.sort(key=lambda indice: _chave(linhas[indice][coluna]),
+                          reverse=self.decrescente)
+            visiveis.extend(vazios)
+        self.visiveis = visiveis
+
+    def linha(self, posicao):
+        """
+        :param posicao: Posição entre as linhas visíveis.
+        :return: Valores das colunas pra exibir.
+        """
+        linha = self.linhas[self.visiveis[posicao]]
+        return tuple("" if valor is None else valor
+                     for valor in linha[:len(COLUNAS)])
+
+
+def ler_jsonl(caminho, por_vez=LINHAS_POR_VEZ):
+    """
+    Lê o JSONL de uma execução aos pedaços.
+
+    :param caminho: Caminho do resultado_<data_hora>.jsonl.
+    :param por_vez: Registros por pedaço.
+    :return: Gerador de listas de registros (dicionários).
+    """
+    pedaco = []
+    with open(caminho, encoding="utf-8") as arquivo:
+        for numero, texto in enumerate(arquivo, 1):
+            if not texto.strip():
+                continue
+            try:
+                pedaco.append(json.loads(texto))
+            except ValueError:
+                # Linha cortada (execução derrubada no meio), segue
+                log.debug("Linha %s de %s ilegível.", numero, caminho)
+                continue
+            if len(pedaco) >= por_vez:
+                yield pedaco
+                pedaco = []
+    if pedaco:
+        yield pedaco
+
+
+class GradeVirtual(tkinter.Frame):
+    """
+    Tabela que só desenha as linhas visíveis de um objeto Resultados.
+    """
+
+    def __init__(self, pai, resultados):
+        super().__init__(pai)
+        self.resultados = resultados
+        # Primeira linha (entre as visíveis) no topo da tabela
+        self.inicio = 0
+
+        colunas = [titulo for titulo, _ in COLUNAS]
+        self.tabela = ttk.Treeview(self, columns=colunas, show="headings",
+                                   selectmode="browse")
+        for posicao, (titulo, largura) in enumerate(COLUNAS):
+            self.tabela.heading(
+                titulo, text=titulo,
+                command=lambda coluna=posicao: self.ordenar(coluna),
+            )
+            self.tabela.column(titulo, width=largura,
+                               anchor="e" if posicao in (PAGINA, LINHA)
+                               else "w")
+        self.rolagem = ttk.Scrollbar(self, orient="vertical",
+                                     command=self._rolar)
+        self.rolagem.pack(side="right", fill="y")
+        self.tabela.pack(side="left", fill="both", expand=True)
+
+        # A rolagem é nossa, não do Treeview (que só tem as linhas da tela)
+        for evento in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.tabela.bind(evento, self._rodinha)
+        self.tabela.bind("<Prior>", lambda _: self._rolar("scroll", -1,
+                                                          "pages"))
+        self.tabela.bind("<Next>", lambda _: self._rolar("scroll", 1,
+                                                         "pages"))
+        self.tabela.bind("<Configure>", lambda _: self.desenhar())
+
+    def _cabem(self):
+        """
+        :return: Quantas linhas cabem na tabela agora.
+        """
+        altura_linha = int(ttk.Style().lookup("Treeview", "rowheight")
+                           or 20)
+        # Desconta o cabeçalho (mais ou menos uma linha)
+        return max(self.tabela.winfo_height() // altura_linha - 1, 1)
+
+    def desenhar(self):
+        """
+        Põe nos itens do Treeview os valores das linhas a partir de
+        'inicio'.
+        """
+        total = len(self.resultados.visiveis)
+        cabem = self._cabem()
+        self.inicio = max(min(self.inicio, total - cabem), 0)
+        quantidade = min(cabem, total - self.inicio)
+
+        itens = self.tabela.get_children()
+        for item in itens[quantidade:]:
+            self.tabela.delete(item)
+        for posicao in range(quantidade):
+            valores = self.resultados.linha(self.inicio + posicao)
+            if posicao < len(itens):
+                self.tabela.item(itens[posicao], values=valores)
+            else:
+                self.tabela.insert("", "end", values=valores)
+
+        if total:
+            self.rolagem.set(self.inicio / total,
+                             (self.inicio + quantidade) / total)
+        else:
+            self.rolagem.set(0, 1)
+
+    def _rolar(self, acao, quanto, unidade=None):
+        """
+        Comando da barra de rolagem ("moveto", fração) ou ("scroll", n,
+        "units"/"pages").
+        """
+        if acao == "moveto":
+            self.inicio = int(float(quanto) * len(self.resultados.visiveis))
+        elif unidade == "pages":
+            self.inicio += int(quanto) * self._cabem()
+        else:
+            self.inicio += int(quanto)
+        self.desenhar()
+
+    def _rodinha(self, evento):
+        # Windows e Mac mandam delta; Linux manda botão 4 (sobe) e 5 (desce)
+        if evento.num == 4 or getattr(evento, "delta", 0) > 0:
+            passo = -LINHAS_RODINHA
+        else:
+            passo = LINHAS_RODINHA
+        self._rolar("scroll", passo, "units")
+        return "break"
+
+    def ordenar(self, coluna):
+        """
+        Ordena pela coluna e marca o cabeçalho.
+
+        :param coluna: Posição da coluna.
+        """
+        self.resultados.ordenar(coluna)
+        for posicao, (titulo, _) in enumerate(COLUNAS):
+            seta = ""
+            if posicao == self.resultados.coluna:
+                seta = " ▼" if self.resultados.decrescente else " ▲"
+            self.tabela.heading(titulo, text=titulo + seta)
+        self.inicio = 0
+        self.desenhar()
+
+
+def abrir_grade(pai, caminho):
+    """
+    Abre a tabela de resultados de uma execução numa janela nova.
+
+    :param pai: Janela do Tk por cima da qual abre.
+    :param caminho: Caminho do resultado_<data_hora>.jsonl.
+    :return: A janela (Toplevel).
+    """
+    janela = tkinter.Toplevel(pai)
+    janela.title(f"Resultados - {os.path.basename(caminho)}")
+    janela.geometry("900x500")
+
+    resultados = Resultados()
+
+    barra = tkinter.Frame(janela)
+    barra.pack(fill="x", padx=10, pady=(10, 0))
+    tkinter.Label(barra, text="Filtrar:").pack(side="left")
+    texto_var = tkinter.StringVar()
+    entrada = tkinter.Entry(barra, textvariable=texto_var, width=30)
+    entrada.pack(side="left")
+    so_sim_var = tkinter.BooleanVar()
+    so_paginas_var = tkinter.BooleanVar()
+    contagem_var = tkinter.StringVar(value="Lendo...")
+    tkinter.Label(barra, textvariable=contagem_var).pack(side="right")
+
+    grade = GradeVirtual(janela, resultados)
+    grade.pack(fill="both", expand=True, padx=10, pady=10)
+
+    lendo = True
+
+    def contar():
+        texto = (f"{len(resultados.visiveis)} de {len(resultados.linhas)} "
+                 f"linha(s), {resultados.arquivos} arquivo(s)")
+        contagem_var.set(texto + (" (lendo...)" if lendo else ""))
+
+    def filtrar():
+        nonlocal filtro_agendado
+        filtro_agendado = None
+        resultados.filtrar(texto_var.get(), so_sim_var.get(),
+                           so_paginas_var.get())
+        grade.inicio = 0
+        grade.desenhar()
+        contar()
+
+    # Mesmo esquema da busca no log: espera parar de digitar
+    filtro_agendado = None
+
+    def agendar_filtro(_evento=None):
+        nonlocal filtro_agendado
+        if filtro_agendado is not None:
+            janela.after_cancel(filtro_agendado)
+        filtro_agendado = janela.after(ESPERA_FILTRO, filtrar)
+
+    entrada.bind("<KeyRelease>", agendar_filtro)
+    tkinter.Checkbutton(barra, text="Só SIM", variable=so_sim_var,
+                        command=filtrar).pack(side="left", padx=(10, 0))
+    tkinter.Checkbutton(barra, text="Só não pesquisáveis",
+                        variable=so_paginas_var,
+                        command=filtrar).pack(side="left")
+
+    pedacos = ler_jsonl(caminho)
+
+    def ler_mais():
+        nonlocal lendo
+        if not janela.winfo_exists():
+            pedacos.close()
+            return
+        try:
+            resultados.acrescentar(next(pedacos))
+        except StopIteration:
+            lendo = False
+        except (OSError, ValueError) as e:
+            lendo = False
+            log.warning("Não deu pra ler %s: %s", caminho, e)
+        grade.desenhar()
+        contar()
+        if lendo:
+            janela.after(1, ler_mais)
+
+    janela.after(1, ler_mais)
+    return janela
@@ -0,0 +1,367 @@
+"""
+historico.py
+
+Descrição:
+Histórico dos resultados de cada arquivo, execução a execução, e o relatório
+do que mudou desde a última. Cada execução grava relatorio_<data_hora>.txt e
+relatorio_execucao_<data_hora>.csv novinhos, e quem revisa o acervo toda
+semana ficava comparando milhares de linhas no olho pra descobrir o que
+mudou.
+
+Agora o resultado de cada arquivo (status e achados) fica guardado,
+pelo caminho, junto com o hash do conteúdo. No fim de cada execução sai o
+delta: arquivos novos, arquivos que sumiram, arquivos que mudaram de status
+ou de achados, e os que não mudaram (só a contagem).
+
+Orientações:
+- SaidaHistorico tem a mesma interface das saídas estruturadas
+  (gravar_arquivo(registro, achados) e close()), então entra na lista de
+  saídas do processar_pdfs_no_diretorio e do rebuscar_pdfs_no_diretorio.
+- A comparação não lê relatório antigo nenhum. Cada arquivo guardado tem
+  uma assinatura (hash do status e da lista de achados). Arquivo igual custa
+  uma consulta pela chave e a comparação da assinatura, sem escrita. Só pra
+  quem mudou a lista de achados antiga é carregada, pro detalhe do que
+  entrou e do que saiu.
+- O histórico só é atualizado no concluir(), de uma vez, chamado quando a
+  execução termina: execução que cai no meio não estraga a base de
+  comparação da próxima (nem dá todo mundo que faltou como sumido).
+- Sumiu: estava no histórico, dentro do diretório varrido (e só no
+  diretório, sem subpastas, se a varredura não for recursiva), e não
+  apareceu nessa execução. Sai do histórico depois de reportado.
+- Conteúdo mudou (hash novo) mas o resultado não: conta como sem mudança,
+  com a contagem à parte.
+- Primeira execução num diretório só guarda, não lista os arquivos como
+  novos.
+- Cada arquivo guarda também os perfis de regras (ver varredura.Perfil) que
+  já foram avaliados nele. Só se comparam os achados dos perfis avaliados
+  nas duas execuções: execução com menos perfis (a rebusca, ou sem o
+  --perfil) não dá os achados dos outros como saídos, eles continuam
+  guardados como estavam. Perfil avaliado pela primeira vez num arquivo só
+  é guardado, não entra como mudança.
+
+Sobre a saída:
+- <diretorio_historico>/historico.sqlite
+- delta_<data_hora>.txt no diretório atual, com o que mudou.
+
+Histórico de alterações:
+- 2026 10 19 Versão 0.0.4: Implantação.
+- 2026 10 19 Versão 0.0.4: Achado sem perfil conta como da lista de parafusos.
+- 2026 10 19 Versão 0.0.4: Compara só os perfis avaliados nas duas execuções.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+
+import duplicados
+import varredura
+
+log = logging.getLogger("detetive.historico")
+
+# Onde fica o histórico se ninguém disser nada
+DIRETORIO_PADRAO = os.path.join(os.path.expanduser("~"), ".detetive_b8",
+                                "historico")
+
+
+def _chave(caminho):
+    """
+    :return: O caminho do jeito que vai pro histórico (absoluto, e sem
+    diferença de maiúsculas no Windows).
+    """
+    return os.path.normcase(os.path.abspath(caminho))
+
+
+def _achados_compactos(achados):
+    """
+    :param achados: Lista de dicionários (saidas_estruturadas).
+    :return: Lista ordenada de [perfil, norma, padrao, pagina, linha,
+    linha_norma]. Achado sem perfil é da lista de parafusos.
+    """
+    return sorted(
+        [achado.get("perfil") or varredura.PERFIL_PADRAO.nome,
+         achado["norma"], achado["padrao"], achado["pagina"], achado["linha"],
+         achado.get("linha_norma")]
+        for achado in achados
+    )
+
+
+def _json(valor):
+    return json.dumps(valor, ensure_ascii=False, separators=(",", ":"))
+
+
+def _assinatura(status, compactos):
+    """
+    :return: Hash do status e dos achados, pra comparar sem carregar nada.
+    """
+    return hashlib.sha1(_json([status, compactos]).encode("utf-8")).hexdigest()
+
+
+def _linha(caminho, nome, hash_arquivo, status, compactos, perfis):
+    """
+    :param compactos: Achados, do jeito do _achados_compactos.
+    :param perfis: Nomes dos perfis de regras avaliados no arquivo.
+    :return: Linha da tabela arquivos, na ordem do INSERT do concluir().
+    """
+    compactos = sorted(compactos)
+    return (caminho, nome, hash_arquivo, status,
+            _assinatura(status, compactos), _json(compactos),
+            _json(sorted(perfis)))
+
+
+def _ordem(achado):
+    # linha_norma pode ser None, não compara com número
+    return achado[:5] + (achado[5] is not None, achado[5] or 0)
+
+
+def _formatar_achado(achado):
+    perfil, norma, padrao, pagina, linha, linha_norma = achado
+    rotulo = f"[{perfil}] " if perfil and perfil != (
+        varredura.PERFIL_PADRAO.nome) else ""
+    texto = f"{rotulo}{norma} - {padrao} (Página {pagina}, Linha {linha}"
+    if linha_norma is not None:
+        texto += f", norma na linha {linha_norma}"
+    return texto + ")"
+
+
+class SaidaHistorico:
+    """
+    Compara o resultado de cada arquivo com o da execução anterior e, no
+    concluir(), grava o delta e atualiza o histórico.
+    """
+
+    ESQUEMA = """
+        CREATE TABLE IF NOT EXISTS arquivos (
+            caminho TEXT PRIMARY KEY,
+            nome TEXT NOT NULL,
+            hash TEXT,
+            status TEXT NOT NULL,
+            assinatura TEXT NOT NULL,
+            achados TEXT NOT NULL,
+            perfis TEXT
+        );
+    """
+
+    def __init__(self, filename, diretorio_varrido, recursivo=False,
+                 diretorio=DIRETORIO_PADRAO, perfis=None):
+        """
+        :param filename: Arquivo do relatório do delta (delta_<data_hora>.txt).
+        :param diretorio_varrido: Diretório que a execução varre, pra saber
+        quem sumiu.
+        :param recursivo: Se a execução desce nos subdiretórios.
+        :param diretorio: Diretório do histórico.
+        :param perfis: Nomes dos perfis de regras avaliados nessa execução,
+        None é só a lista de parafusos (varredura.PERFIL_PADRAO).
+        """
+        os.makedirs(diretorio, exist_ok=True)
+        self.filename = filename
+        self.diretorio_varrido = _chave(diretorio_varrido)
+        self.recursivo = recursivo
+        self.conexao = sqlite3.connect(
+            os.path.join(diretorio, "historico.sqlite")
+        )
+        self.conexao.executescript(self.ESQUEMA)
+        colunas = {coluna[1] for coluna in
+                   self.conexao.execute("PRAGMA table_info(arquivos)")}
+        if "perfis" not in colunas:
+            # Histórico de antes dos perfis guardados
+            self.conexao.execute("ALTER TABLE arquivos ADD COLUMN perfis TEXT")
+        self.conexao.commit()
+        self.perfis = frozenset(perfis or [varredura.PERFIL_PADRAO.nome])
+
+        # Caminhos vistos nessa execução
+        self._vistos = set()
+        # Linhas pra gravar no close: (caminho, nome, hash, status,
+        # assinatura, achados, perfis)
+        self._gravar = []
+        self.novos = []
+        # (nome, status antigo, status novo, entraram, saíram)
+        self.mudaram = []
+        self.iguais = 0
+        self.conteudo_novo = 0
+        self.removidos = []
+        self.concluido = False
+
+    def gravar_arquivo(self, registro, achados):
+        """
+        Compara o arquivo com o histórico.
+
+        :param registro: Dicionário montado por registro_arquivo.
+        :param achados: Lista de dicionários montada por registros_achados.
+        """
+        caminho = _chave(registro["caminho"])
+        if caminho in self._vistos:
+            return
+        self._vistos.add(caminho)
+        nome = registro["arquivo"]
+        status = registro["status"]
+        hash_arquivo = registro.get("hash")
+        if hash_arquivo is None:
+            try:
+                hash_arquivo = duplicados.calcular_hash(registro["caminho"])
+            except OSError:
+                pass
+        compactos = _achados_compactos(achados)
+
+        guardado = self.conexao.execute(
+            "SELECT hash, status, assinatura, perfis FROM arquivos "
+            "WHERE caminho = ?", (caminho,),
+        ).fetchone()
+        if guardado is None:
+            self.novos.append((nome, status, len(compactos)))
+            self._gravar.append(_linha(caminho, nome, hash_arquivo, status,
+                                       compactos, self.perfis))
+            return
+        hash_antigo, status_antigo, assinatura_antiga, perfis_antigos = (
+            guardado
+        )
+        if perfis_antigos is not None:
+            perfis_antigos = frozenset(json.loads(perfis_antigos))
+        if perfis_antigos == self.perfis:
+            # Mesmos perfis das duas vezes, a assinatura resolve
+            linha = _linha(caminho, nome, hash_arquivo, status, compactos,
+                           self.perfis)
+            if linha[4] == assinatura_antiga:
+                self.iguais += 1
+                if hash_arquivo != hash_antigo:
+                    self.conteudo_novo += 1
+                    self._gravar.append(linha)
+                return
+
+        # Mudou, ou os perfis não batem: só agora carrega os achados de antes
+        antigos = self.conexao.execute(
+            "SELECT achados FROM arquivos WHERE caminho = ?", (caminho,)
+        ).fetchone()[0]
+        antigos = [tuple(achado) for achado in json.loads(antigos)]
+        if perfis_antigos is None:
+            # Histórico de antes dos perfis guardados
+            perfis_antigos = frozenset(
+                [varredura.PERFIL_PADRAO.nome]
+                + [achado[0] for achado in antigos]
+            )
+        # Achados dos perfis que essa execução não avaliou ficam como estão
+        mantidos = [achado for achado in antigos
+                    if achado[0] not in self.perfis]
+        linha = _linha(caminho, nome, hash_arquivo, status,
+                       compactos + [list(achado) for achado in mantidos],
+                       self.perfis | perfis_antigos)
+        comuns = self.perfis & perfis_antigos
+        antigos = {achado for achado in antigos if achado[0] in comuns}
+        novos = {tuple(achado) for achado in compactos if achado[0] in comuns}
+        if status == status_antigo and novos == antigos:
+            self.iguais += 1
+            if hash_arquivo != hash_antigo:
+                self.conteudo_novo += 1
+            if (linha[4] != assinatura_antiga or hash_arquivo != hash_antigo
+                    or not self.perfis <= perfis_antigos):
+                self._gravar.append(linha)
+            return
+        self.mudaram.append((nome, status_antigo, status,
+                             sorted(novos - antigos, key=_ordem),
+                             sorted(antigos - novos, key=_ordem)))
+        self._gravar.append(linha)
+
+    def _sumiram(self):
+        """
+        :return: Lista de (caminho, nome) do histórico, dentro do diretório
+        varrido, que não apareceram nessa execução.
+        """
+        prefixo = os.path.join(self.diretorio_varrido, "")
+        # Faixa de chaves que começam com o prefixo, pelo índice da chave
+        fim = prefixo[:-1] + chr(ord(prefixo[-1]) + 1)
+        sumidos = []
+        for caminho, nome in self.conexao.execute(
+            "SELECT caminho, nome FROM arquivos "
+            "WHERE caminho >= ? AND caminho < ?", (prefixo, fim),
+        ):
+            if caminho in self._vistos:
+                continue
+            if (not self.recursivo
+                    and os.path.dirname(caminho) != self.diretorio_varrido):
+                continue
+            sumidos.append((caminho, nome))
+        return sumidos
+
+    def relatorio(self):
+        """
+        O delta dessa execução.
+
+        :return: Lista de linhas de texto.
+        """
+        primeira = not self.mudaram and not self.iguais and not self.removidos
+        relatorio = [
+            f"Delta desde a última execução em {self.diretorio_varrido}:",
+            f"  {len(self.novos)} arquivo(s) novo(s), {len(self.removidos)} "
+            f"sumiram, {len(self.mudaram)} mudaram, {self.iguais} sem "
+            f"mudança ({self.conteudo_novo} com conteúdo novo e o mesmo "
+            "resultado)",
+        ]
+        if primeira and self.novos:
+            relatorio.append("  Primeira execução nesse diretório, "
+                             "resultados guardados pra próxima.")
+            return relatorio
+
+        if self.mudaram:
+            relatorio.append("")
+            relatorio.append("Mudaram:")
+        for nome, status_antigo, status, entraram, sairam in self.mudaram:
+            relatorio.append("")
+            relatorio.append(f"Arquivo........: {nome}")
+            if status != status_antigo:
+                relatorio.append(f" Status: {status_antigo} -> {status}")
+            for achado in entraram:
+                relatorio.append(f" + {_formatar_achado(achado)}")
+            for achado in sairam:
+                relatorio.append(f" - {_formatar_achado(achado)}")
+        if self.novos:
+            relatorio.append("")
+            relatorio.append("Novos:")
+            for nome, status, quantidade in self.novos:
+                relatorio.append(f" - {nome}: {status}, {quantidade} "
+                                 "achado(s)")
+        if self.removidos:
+            relatorio.append("")
+            relatorio.append("Sumiram:")
+            for caminho, nome in self.removidos:
+                relatorio.append(f" - {nome} ({caminho})")
+        return relatorio
+
+    def resumo(self):
+        """
+        :return: As linhas do começo do delta, pra exibir no fim da execução.
+        """
+        return self.relatorio()[:2]
+
+    def concluir(self):
+        """
+        Fecha a conta, com a execução terminada: descobre quem sumiu, grava
+        o delta e atualiza o histórico.
+        """
+        self.removidos = self._sumiram()
+        with open(self.filename, "w", encoding="utf-8") as arquivo:
+            for linha in self.relatorio():
+                arquivo.write(f"{linha}\n")
+        with self.conexao:
+            self.conexao.executemany(
+                "INSERT OR REPLACE INTO arquivos (caminho, nome, hash, "
+                "status, assinatura, achados, perfis) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                self._gravar,
+            )
+            self.conexao.executemany(
+                "DELETE FROM arquivos WHERE caminho = ?",
+                [(caminho,) for caminho, _ in self.removidos],
+            )
+        self.concluido = True
+        for linha in self.resumo():
+            log.debug("%s", linha)
+
+    def close(self):
+        """
+        Fecha o histórico. Sem concluir() antes (execução interrompida) nada
+        é gravado.
+        """
+        if self.conexao is not None:
+            self.conexao.close()
+            self.conexao = None
@@ -0,0 +1,493 @@
+"""
+indice.py
+
+Descrição:
+Índice invertido do texto extraído dos PDFs, pra responder na hora
+perguntas do tipo "quais documentos falam de A320 L7M?" ou "onde aparece
+17-4PH?" sobre materiais que não estão na lista de normas. Sem o índice era
+cadastrar o material no dicionário e varrer o arquivo morto inteiro de novo.
+
+Orientações:
+- Montado durante o processamento normal (opção --indice do Procura_B8),
+  arquivo a arquivo: cada PDF que termina a extração tem o texto quebrado em
+  termos e as ocorrências gravadas. Arquivo que não mudou (mesmo tamanho e
+  mesma data) não é reindexado; arquivo que mudou tem as ocorrências antigas
+  trocadas pelas novas.
+- O texto é indexado na forma canônica (ver normalizacao.py) e os termos são
+  as sequências de letras e de números: "A-193", "A 193" e "A193" viram
+  todos A, 193. A consulta é quebrada do mesmo jeito e procurada como frase
+  (termos seguidos na mesma linha), então pega as mesmas variações que as
+  regras da busca normal.
+- O conteúdo é indexado pelo hash do arquivo. Cópias idênticas, arquivos
+  renomeados ou movidos apontam pro mesmo documento, sem indexar de novo.
+- As ocorrências de cada termo em cada documento (página, linha, posição na
+  linha) ficam num blob só, comprimido: diferença pra ocorrência anterior,
+  gravada em varint (1 byte pra números até 127).
+- Pode ser usado por várias threads, o acesso ao banco passa por uma trava.
+- Consulta: python indice.py "A320 L7M" [--indice-dir DIR]
+
+Sobre a saída:
+- <diretorio_indice>/indice.sqlite
+- A consulta lista arquivo, página e linha de cada ocorrência, no formato do
+  relatório.
+
+Histórico de alterações:
+- 2026 10 19 Versão 0.0.4: Implantação.
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+import duplicados
+import normalizacao
+
+# Onde fica o índice se ninguém disser nada
+DIRETORIO_PADRAO = os.path.join(os.path.expanduser("~"), ".detetive_b8",
+                                "indice")
+
+# Sequências de letras ou de números, como na regra_canonica
+_TERMO = re.compile(r"[^\W\d_]+|\d+")
+
+
+def termos(texto):
+    """
+    Quebra o texto (já na forma canônica) em termos.
+
+    :param texto: Texto de uma linha.
+    :return: Lista de termos, na ordem.
+    """
+    return _TERMO.findall(texto)
+
+
+def _codificar(ocorrencias):
+    """
+    Comprime a lista de ocorrências de um termo num documento.
+
+    :param ocorrencias: Lista ordenada de (pagina, linha, posicao).
+    :return: Bytes, cada número em varint; a página é a diferença pra
+    anterior e a linha também, dentro da mesma página.
+    """
+    dados = bytearray()
+    pagina_anterior = 0
+    linha_anterior = 0
+    for pagina, linha, posicao in ocorrencias:
+        if pagina != pagina_anterior:
+            linha_anterior = 0
+        for valor in (pagina - pagina_anterior, linha - linha_anterior,
+                      posicao):
+            while valor >= 0x80:
+                dados.append((valor & 0x7F) | 0x80)
+                valor >>= 7
+            dados.append(valor)
+        pagina_anterior = pagina
+        linha_anterior = linha
+    return bytes(dados)
+
+
+def _decodificar(dados):
+    """
+    Desfaz o _codificar.
+
+    :param dados: Bytes gravados.
+    :return: Lista de (pagina, linha, posicao).
+    """
+    valores = []
+    valor = 0
+    deslocamento = 0
+    for byte in dados:
+        valor |= (byte & 0x7F) << deslocamento
+        if byte & 0x80:
+            deslocamento += 7
+        else:
+            valores.append(valor)
+            valor = 0
+            deslocamento = 0
+
+    ocorrencias = []
+    pagina = 0
+    linha = 0
+    for i in range(0, len(valores), 3):
+        if valores[i]:
+            pagina += valores[i]
+            linha = 0
+        linha += valores[i + 1]
+        ocorrencias.append((pagina, linha, valores[i + 2]))
+    return ocorrencias
+
+
+class IndiceInvertido:
+    """
+    Índice invertido (termo -> ocorrências) do texto dos PDFs, em SQLite.
+    """
+
+    ESQUEMA = """
+        CREATE TABLE IF NOT EXISTS documentos (
+            id INTEGER PRIMARY KEY,
+            hash TEXT NOT NULL UNIQUE,
+            paginas INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS arquivos (
+            caminho TEXT PRIMARY KEY,
+            documento INTEGER NOT NULL,
+            tamanho INTEGER NOT NULL,
+            modificado REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_arquivos_documento
+            ON arquivos(documento);
+        CREATE TABLE IF NOT EXISTS ocorrencias (
+            termo TEXT NOT NULL,
+            documento INTEGER NOT NULL,
+            dados BLOB NOT NULL,
+            PRIMARY KEY (termo, documento)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_ocorrencias_documento
+            ON ocorrencias(documento);
+    """
+
+    def __init__(self, diretorio=DIRETORIO_PADRAO):
+        os.makedirs(diretorio, exist_ok=True)
+        self.diretorio = diretorio
+        self.conexao = sqlite3.connect(
+            os.path.join(diretorio, "indice.sqlite"),
+            check_same_thread=False,
+        )
+        # Uma thread de cada vez no banco (e nos contadores)
+        self._trava = threading.Lock()
+        self.conexao.executescript(self.ESQUEMA)
+        self.conexao.commit()
+        # Contadores dessa execução
+        self.indexados = 0
+        self.em_dia = 0
+
+    def _documento_do_hash(self, hash_arquivo):
+        linha = self.conexao.execute(
+            "SELECT id FROM documentos WHERE hash = ?", (hash_arquivo,)
+        ).fetchone()
+        return linha[0] if linha else None
+
+    def _gravar_arquivo(self, caminho, documento, estado):
+        """
+        Aponta o arquivo pro documento e apaga o documento antigo dele, se
+        mais ninguém usa.
+        """
+        anterior = self.conexao.execute(
+            "SELECT documento FROM arquivos WHERE caminho = ?", (caminho,)
+        ).fetchone()
+        self.conexao.execute(
+            "INSERT OR REPLACE INTO arquivos (caminho, documento, tamanho, "
+            "modificado) VALUES (?, ?, ?, ?)",
+            (caminho, documento, estado.st_size, estado.st_mtime),
+        )
+        if anterior and anterior[0] != documento:
+            self._remover_orfaos((anterior[0],))
+
+    def _remover_orfaos(self, documentos):
+        for documento in documentos:
+            usado = self.conexao.execute(
+                "SELECT 1 FROM arquivos WHERE documento = ? LIMIT 1",
+                (documento,),
+            ).fetchone()
+            if not usado:
+                self.conexao.execute(
+                    "DELETE FROM ocorrencias WHERE documento = ?",
+                    (documento,),
+                )
+                self.conexao.execute(
+                    "DELETE FROM documentos WHERE id = ?", (documento,)
+                )
+
+    def em_dia_com(self, caminho):
+        """
+        :param caminho: Caminho do arquivo.
+        :return: True se o arquivo já está indexado e não mudou desde então
+        (mesmo tamanho e mesma data de modificação).
+        """
+        caminho = os.path.abspath(caminho)
+        estado = os.stat(caminho)
+        with self._trava:
+            linha = self.conexao.execute(
+                "SELECT tamanho, modificado FROM arquivos WHERE caminho = ?",
+                (caminho,),
+            ).fetchone()
+        return linha == (estado.st_size, estado.st_mtime)
+
+    def indexar(self, caminho, paginas, hash_arquivo=None):
+        """
+        Indexa o texto de um arquivo, se ele ainda não estiver em dia no
+        índice.
+
+        :param caminho: Caminho do arquivo PDF.
+        :param paginas: Lista com o texto de cada página (como devolvido
+        pelo extrair_paginas).
+        :param hash_arquivo: Hash do conteúdo, se já tiver sido calculado.
+        :return: True se o arquivo foi (re)indexado, False se já estava em
+        dia.
+        """
+        caminho = os.path.abspath(caminho)
+        if self.em_dia_com(caminho):
+            with self._trava:
+                self.em_dia += 1
+            return False
+        estado = os.stat(caminho)
+        if hash_arquivo is None:
+            hash_arquivo = duplicados.calcular_hash(caminho)
+
+        with self._trava:
+            documento = self._documento_do_hash(hash_arquivo)
+        if documento is None:
+            # Conteúdo novo, quebra em termos fora da trava
+            por_termo = {}
+            for pagina, texto in enumerate(paginas, start=1):
+                if not texto:
+                    continue
+                linhas = normalizacao.normalizar(texto).texto.splitlines()
+                for linha, conteudo in enumerate(linhas, start=1):
+                    for posicao, termo in enumerate(termos(conteudo)):
+                        por_termo.setdefault(termo, []).append(
+                            (pagina, linha, posicao)
+                        )
+
+        with self._trava, self.conexao:
+            if documento is None:
+                # Outra thread pode ter indexado o mesmo conteúdo enquanto
+                # isso
+                documento = self._documento_do_hash(hash_arquivo)
+            if documento is None:
+                documento = self.conexao.execute(
+                    "INSERT INTO documentos (hash, paginas) VALUES (?, ?)",
+                    (hash_arquivo, len(paginas)),
+                ).lastrowid
+                self.conexao.executemany(
+                    "INSERT INTO ocorrencias (termo, documento, dados) "
+                    "VALUES (?, ?, ?)",
+                    ((termo, documento, _codificar(ocorrencias))
+                     for termo, ocorrencias in por_termo.items()),
+                )
+            self._gravar_arquivo(caminho, documento, estado)
+            self.indexados += 1
+        return True
+
+    def vincular(self, caminho, original):
+        """
+        Registra uma cópia idêntica de um arquivo já indexado, sem
+        indexar de novo.
+
+        :param caminho: Caminho da cópia.
+        :param original: Caminho do original.
+        :return: True se a cópia foi registrada, False se o original não
+        está no índice.
+        """
+        caminho = os.path.abspath(caminho)
+        estado = os.stat(caminho)
+        with self._trava, self.conexao:
+            linha = self.conexao.execute(
+                "SELECT documento FROM arquivos WHERE caminho = ?",
+                (os.path.abspath(original),),
+            ).fetchone()
+            if not linha:
+                return False
+            self._gravar_arquivo(caminho, linha[0], estado)
+        return True
+
+    def remover_ausentes(self):
+        """
+        Tira do índice os arquivos que não existem mais.
+
+        :return: Quantos arquivos foram removidos.
+        """
+        with self._trava, self.conexao:
+            ausentes = [
+                (caminho, documento) for caminho, documento
+                in self.conexao.execute(
+                    "SELECT caminho, documento FROM arquivos"
+                ).fetchall()
+                if not os.path.exists(caminho)
+            ]
+            self.conexao.executemany(
+                "DELETE FROM arquivos WHERE caminho = ?",
+                ((caminho,) for caminho, _ in ausentes),
+            )
+            self._remover_orfaos({documento for _, documento in ausentes})
+        return len(ausentes)
+
+    def consultar(self, consulta):
+        """
+        Procura um termo ou uma frase (termos seguidos na mesma linha).
+
+        :param consulta: O que procurar, do jeito que o usuário digitou
+        ("A320 L7M", "17-4PH"...).
+        :return: Lista ordenada de (caminho, pagina, linha), uma por linha
+        que tem a consulta.
+        """
+        procurados = termos(normalizacao.normalizar(consulta).texto)
+        if not procurados:
+            return []
+
+        with self._trava:
+            # Primeiro só os documentos que têm todos os termos, sai direto
+            # do índice da tabela
+            documentos = None
+            for termo in set(procurados):
+                com_termo = {documento for (documento,) in
+                             self.conexao.execute(
+                                 "SELECT documento FROM ocorrencias "
+                                 "WHERE termo = ?", (termo,)
+                             )}
+                documentos = (com_termo if documentos is None
+                              else documentos & com_termo)
+                if not documentos:
+                    return []
+
+            # Depois as posições, só nesses documentos
+            linhas_por_documento = {}
+            for documento in documentos:
+                posicoes = {}
+                for termo in set(procurados):
+                    (dados,) = self.conexao.execute(
+                        "SELECT dados FROM ocorrencias "
+                        "WHERE termo = ? AND documento = ?",
+                        (termo, documento),
+                    ).fetchone()
+                    posicoes[termo] = _decodificar(dados)
+                seguintes = [set(posicoes[termo]) for termo in procurados[1:]]
+                linhas = {
+                    (pagina, linha)
+                    for pagina, linha, posicao in posicoes[procurados[0]]
+                    if all((pagina, linha, posicao + k) in conjunto
+                           for k, conjunto in enumerate(seguintes, start=1))
+                }
+                if linhas:
+                    linhas_por_documento[documento] = linhas
+
+            resultado = []
+            for documento, linhas in linhas_por_documento.items():
+                for (caminho,) in self.conexao.execute(
+                    "SELECT caminho FROM arquivos WHERE documento = ?",
+                    (documento,),
+                ):
+                    resultado.extend((caminho, pagina, linha)
+                                     for pagina, linha in linhas)
+        return sorted(resultado)
+
+    def estatisticas(self):
+        """
+        Estatísticas do índice: o que tem guardado e o que aconteceu nessa
+        execução.
+
+        :return: Dicionário com as estatísticas.
+        """
+        with self._trava:
+            arquivos = self.conexao.execute(
+                "SELECT COUNT(*) FROM arquivos"
+            ).fetchone()[0]
+            documentos = self.conexao.execute(
+                "SELECT COUNT(*) FROM documentos"
+            ).fetchone()[0]
+        caminho_banco = os.path.join(self.diretorio, "indice.sqlite")
+        return {
+            "diretorio": self.diretorio,
+            "arquivos": arquivos,
+            "documentos": documentos,
+            "tamanho_mb": os.path.getsize(caminho_banco) / (1024 * 1024),
+            "indexados": self.indexados,
+            "em_dia": self.em_dia,
+        }
+
+    def relatorio(self):
+        """
+        Estatísticas do índice formatadas pra exibir.
+
+        :return: Lista de linhas de texto.
+        """
+        est = self.estatisticas()
+        return [
+            f"Índice de texto: {est['diretorio']}",
+            f"  Arquivos: {est['arquivos']}  Documentos diferentes: "
+            f"{est['documentos']}  Tamanho: {est['tamanho_mb']:.2f} MB",
+            f"  Nessa execução: {est['indexados']} indexados, "
+            f"{est['em_dia']} já estavam em dia",
+        ]
+
+    def close(self):
+        """
+        Fecha a conexão com o banco.
+        """
+        with self._trava:
+            if self.conexao:
+                self.conexao.close()
+                self.conexao = None
+
+
+def relatar_consulta(consulta, ocorrencias):
+    """
+    Monta o resultado da consulta no formato do relatório.
+
+    :param consulta: O que foi procurado.
+    :param ocorrencias: Lista de (caminho, pagina, linha) do consultar.
+    :return: Lista de linhas de texto.
+    """
+    por_arquivo = {}
+    for caminho, pagina, linha in ocorrencias:
+        por_arquivo.setdefault(caminho, []).append((pagina, linha))
+
+    relatorio = []
+    for caminho, linhas in por_arquivo.items():
+        relatorio.append("")
+        relatorio.append(
+            "/////////////////////////////////////////////////////////"
+        )
+        relatorio.append(f"Arquivo........: {caminho}")
+        for pagina, linha in linhas:
+            relatorio.append(f" - {consulta} (Página {pagina}, Linha {linha})")
+    if not por_arquivo:
+        relatorio.append(f"Não localizado '{consulta}' em nenhum documento "
+                         "do índice.")
+    return relatorio
+
+
+def parse_arguments(argv=None):
+    """
+    Argumentos da consulta pela linha de comando.
+
+    - consulta (str): Termo ou frase a procurar
+    - indice_dir (str): Diretório do índice
+
+    Uso na linha de comando:
+    python indice.py [--indice-dir DIR] consulta
+    """
+    parser = argparse.ArgumentParser(
+        description="Consulta ao índice de texto dos PDFs"
+    )
+    parser.add_argument(
+        "consulta", help="Termo ou frase a procurar (ex: \"A320 L7M\")"
+    )
+    parser.add_argument(
+        "--indice-dir", default=DIRETORIO_PADRAO,
+        help="Diretório do índice de texto"
+    )
+    return parser.parse_args(argv)
+
+
+######################## Main ################################
+if __name__ == "__main__":
+    args = parse_arguments()
+    if not os.path.exists(os.path.join(args.indice_dir, "indice.sqlite")):
+        print(f"Índice não encontrado em {args.indice_dir}. Rode o "
+              "Procura_B8 com --indice antes.")
+        sys.exit(1)
+    indice = IndiceInvertido(args.indice_dir)
+    inicio = time.perf_counter()
+    ocorrencias = indice.consultar(args.consulta)
+    decorrido = time.perf_counter() - inicio
+    for linha in relatar_consulta(args.consulta, ocorrencias):
+        print(linha)
+    print()
+    print(f"{len(ocorrencias)} ocorrência(s) em "
+          f"{len({caminho for caminho, _, _ in ocorrencias})} arquivo(s), "
+          f"{decorrido * 1000:.1f} ms.")
+    indice.close()
@@ -0,0 +1,106 @@
+"""
+log_execucao.py
+
+Descrição:
+Configuração do log (módulo logging) do Detetive B8.
+Antes o debug era feito com print de cada linha extraída, cada uma passando
+pela janela do Tk, e rodar com debug ficava 10 a 50 vezes mais lento.
+Agora cada módulo tem seu logger ("detetive.<modulo>") e:
+- o console (janela) recebe só INFO pra cima;
+- com debug ligado, tudo (inclusive DEBUG) vai pra um arquivo próprio,
+  gravado por uma thread em segundo plano, com rotação por tamanho.
+
+Orientações:
+- Nos módulos: log = logging.getLogger("detetive.<modulo>") e
+  log.debug("Linha %s: %s", numero, texto). Nada de f-string na mensagem,
+  a formatação só acontece se o registro for realmente gravado.
+- A mensagem é formatada na thread que grava o arquivo, não na thread que
+  está processando os PDFs.
+- Chamar encerrar_log() no fim pra descarregar o que estiver na fila.
+
+Sobre a saída:
+- log_debug_<data_hora>.txt (com debug ligado), quebrado em pedaços de
+  20 MB (.1, .2, ...) guardando os 5 últimos.
+
+Histórico de alterações:
+- 2026 10 19 Versão 0.0.4: Implantação.
+"""
+
+import logging
+import logging.handlers
+import queue
+
+# Logger pai de todos os módulos do programa
+NOME_RAIZ = "detetive"
+FORMATO_ARQUIVO = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+TAMANHO_MAXIMO_MB = 20
+COPIAS = 5
+
+# Thread que grava o arquivo de debug
+_ouvinte = None
+
+
+class _FilaSemFormatar(logging.handlers.QueueHandler):
+    """
+    O QueueHandler padrão formata a mensagem antes de pôr na fila, ou seja,
+    na thread de quem chamou o log. Como a fila aqui é entre threads do
+    mesmo processo, dá pra mandar o registro cru e deixar a formatação pra
+    thread que grava.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def configurar_log(console=None, arquivo_debug=None):
+    """
+    Configura os loggers do programa.
+
+    :param console: Stream que recebe as mensagens INFO pra cima (a janela,
+    via RedirectText). None não mostra nada.
+    :param arquivo_debug: Arquivo que recebe tudo, inclusive DEBUG. None
+    desliga o debug.
+    :return: O logger raiz do programa.
+    """
+    encerrar_log()
+
+    raiz = logging.getLogger(NOME_RAIZ)
+    for handler in list(raiz.handlers):
+        raiz.removeHandler(handler)
+    raiz.propagate = False
+    # Sem debug o log.debug morre logo na checagem de nível, custo zero
+    raiz.setLevel(logging.DEBUG if arquivo_debug else logging.INFO)
+
+    if console is not None:
+        handler_console = logging.StreamHandler(console)
+        handler_console.setLevel(logging.INFO)
+        handler_console.setFormatter(logging.Formatter("%(message)s"))
+        raiz.addHandler(handler_console)
+
+    if arquivo_debug:
+        global _ouvinte
+        fila = queue.SimpleQueue()
+        handler_arquivo = logging.handlers.RotatingFileHandler(
+            arquivo_debug,
+            maxBytes=TAMANHO_MAXIMO_MB * 1024 * 1024,
+            backupCount=COPIAS,
+            encoding="utf-8",
+        )
+        handler_arquivo.setFormatter(logging.Formatter(FORMATO_ARQUIVO))
+        raiz.addHandler(_FilaSemFormatar(fila))
+        _ouvinte = logging.handlers.QueueListener(fila, handler_arquivo)
+        _ouvinte.start()
+
+    return raiz
+
+
+def encerrar_log():
+    """
+    Para a thread de gravação depois de esvaziar a fila e fecha o arquivo.
+    """
+    global _ouvinte
+    if _ouvinte is not None:
+        _ouvinte.stop()
+        for handler in _ouvinte.handlers:
+            handler.close()
+        _ouvinte = None
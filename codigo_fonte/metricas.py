@@ -0,0 +1,337 @@
+"""
+metricas.py
+
+Descrição:
+Métricas do processamento (contadores e histogramas) pra acompanhar as
+execuções longas, as de madrugada, sem ficar lendo o log: arquivos, páginas,
+bytes, achados por norma, páginas não pesquisáveis, erros e o tempo de cada
+etapa (extração e busca).
+
+Orientações:
+- METRICAS é o registro do programa inteiro, cada módulo anota nele.
+- Contar custa uma trava e uma soma no dicionário, pode ficar ligado sempre.
+  O que roda por página (a busca) usa cronômetro amostrado, mede uma página
+  a cada AMOSTRA_PAGINAS. A contagem é da execução inteira (um cronômetro
+  por nome no registro), não recomeça a cada arquivo: senão a primeira
+  página (a folha de rosto) de todo arquivo seria sempre a medida.
+- Cada arquivo terminado é contado com METRICAS.registrar_arquivo(registro,
+  achados), com os mesmos registros das saídas estruturadas.
+- GravadorMetricas regrava o JSON com a foto das métricas de tempos em
+  tempos, numa thread separada.
+- Formato Prometheus: texto_prometheus(), servido em /metrics pelo
+  servico.py ou por servir_prometheus() na execução com janela
+  (--metricas-porta).
+
+Sobre a saída:
+- metricas_<data_hora>.json : foto das métricas, regravada a cada
+  INTERVALO_GRAVACAO segundos e no fim.
+
+Histórico de alterações:
+- 2026 10 19 Versão 0.0.4: Implantação.
+- 2026 10 19 Versão 0.0.4: Amostra da busca contada na execução inteira.
+"""
+
+import http.server
+import itertools
+import json
+import os
+import threading
+import time
+
+# Limites (em segundos) das faixas dos histogramas
+FAIXAS_PADRAO = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300,
+                 900)
+# Mede 1 a cada N páginas na busca
+AMOSTRA_PAGINAS = 32
+# De quanto em quanto tempo o JSON é regravado (segundos)
+INTERVALO_GRAVACAO = 15
+
+# Explicação de cada métrica, vai no # HELP do Prometheus
+DESCRICOES = {
+    "detetive_arquivos_total": "Arquivos processados, por status.",
+    "detetive_paginas_total": "Páginas processadas.",
+    "detetive_bytes_total": "Bytes de PDF processados.",
+    "detetive_achados_total": "Itens proibidos encontrados, por norma.",
+    "detetive_paginas_nao_pesquisaveis_total":
+        "Páginas em branco ou não pesquisáveis.",
+    "detetive_erros_total": "Erros, por etapa.",
+    "detetive_cache_total": "Consultas ao cache de texto, por resultado.",
+    "detetive_extracao_segundos": "Tempo de extração do texto por arquivo.",
+    "detetive_busca_pagina_segundos":
+        "Tempo de busca por página (amostrado).",
+    "detetive_arquivo_segundos": "Tempo total por arquivo.",
+}
+
+
+class _Cronometro:
+    """
+    Mede o tempo do bloco 'with' e anota no histograma. Com amostra N só
+    mede uma vez a cada N usos, o resto passa direto.
+
+    Pode ser usado por várias threads ao mesmo tempo: a contagem dos usos é
+    uma só e o início de cada medida fica na thread.
+    """
+
+    def __init__(self, metricas, nome, amostra=1):
+        self.metricas = metricas
+        self.nome = nome
+        self.amostra = amostra
+        self._usos = itertools.count()
+        self._local = threading.local()
+
+    def __enter__(self):
+        self._local.inicio = (time.perf_counter()
+                              if next(self._usos) % self.amostra == 0
+                              else None)
+        return self
+
+    def __exit__(self, *_):
+        inicio = self._local.inicio
+        if inicio is not None:
+            self.metricas.observar(self.nome, time.perf_counter() - inicio)
+        return False
+
+
+class Metricas:
+    """
+    Registro de contadores e histogramas, pode ser usado por várias threads.
+    """
+
+    def __init__(self, faixas=FAIXAS_PADRAO):
+        self.faixas = tuple(faixas)
+        self.inicio = time.time()
+        self._trava = threading.Lock()
+        # {nome: {rotulos: valor}}, rotulos é uma tupla de (chave, valor)
+        self._contadores = {}
+        # {nome: [contagem por faixa..., contagem, soma]}
+        self._histogramas = {}
+        # {(nome, amostra): _Cronometro}, a amostra conta a execução inteira
+        self._cronometros = {}
+
+    def contar(self, nome, valor=1, **rotulos):
+        """
+        Soma no contador.
+
+        :param nome: Nome da métrica.
+        :param valor: Quanto somar.
+        :param rotulos: Rótulos da série (ex: norma="A193").
+        """
+        chave = tuple(sorted(rotulos.items()))
+        with self._trava:
+            serie = self._contadores.setdefault(nome, {})
+            serie[chave] = serie.get(chave, 0) + valor
+
+    def observar(self, nome, valor):
+        """
+        Anota um valor (tempo, em segundos) no histograma.
+
+        :param nome: Nome da métrica.
+        :param valor: Valor observado.
+        """
+        with self._trava:
+            histograma = self._histogramas.get(nome)
+            if histograma is None:
+                histograma = [0] * (len(self.faixas) + 2)
+                self._histogramas[nome] = histograma
+            for i, limite in enumerate(self.faixas):
+                if valor <= limite:
+                    histograma[i] += 1
+                    break
+            histograma[-2] += 1
+            histograma[-1] += valor
+
+    def cronometro(self, nome, amostra=1):
+        """
+        Cronômetro pra usar com 'with'. É sempre o mesmo pro mesmo nome e
+        amostra, então a contagem da amostra segue de uma chamada (um
+        arquivo) pra outra.
+
+        :param nome: Nome do histograma.
+        :param amostra: Mede uma vez a cada 'amostra' usos.
+        :return: Objeto cronômetro.
+        """
+        with self._trava:
+            cronometro = self._cronometros.get((nome, amostra))
+            if cronometro is None:
+                cronometro = _Cronometro(self, nome, amostra)
+                self._cronometros[(nome, amostra)] = cronometro
+            return cronometro
+
+    def registrar_arquivo(self, registro, achados):
+        """
+        Conta o resumo de um arquivo processado.
+
+        :param registro: Dicionário de saidas_estruturadas.registro_arquivo.
+        :param achados: Lista de saidas_estruturadas.registros_achados.
+        """
+        self.contar("detetive_arquivos_total", status=registro["status"])
+        self.contar("detetive_paginas_total", registro["paginas"])
+        self.contar("detetive_bytes_total", registro["tamanho_bytes"])
+        self.contar("detetive_paginas_nao_pesquisaveis_total",
+                    len(registro["paginas_nao_pesquisaveis"]))
+        if registro["status"] == "ERRO":
+            self.contar("detetive_erros_total", etapa="arquivo")
+        for achado in achados:
+            self.contar("detetive_achados_total", norma=achado["norma"])
+        self.observar("detetive_arquivo_segundos", registro["tempo_s"])
+
+    def instantaneo(self):
+        """
+        Foto das métricas nesse momento.
+
+        :return: Dicionário pronto pra virar JSON.
+        """
+        with self._trava:
+            contadores = {
+                nome: [{"rotulos": dict(chave), "valor": valor}
+                       for chave, valor in serie.items()]
+                for nome, serie in self._contadores.items()
+            }
+            histogramas = {}
+            for nome, histograma in self._histogramas.items():
+                histogramas[nome] = {
+                    "faixas": dict(zip(map(str, self.faixas),
+                                       histograma[:len(self.faixas)])),
+                    "contagem": histograma[-2],
+                    "soma": histograma[-1],
+                }
+        decorrido = time.time() - self.inicio
+        arquivos = sum(item["valor"]
+                       for item in contadores.get("detetive_arquivos_total",
+                                                  []))
+        return {
+            "data_hora": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "decorrido_s": round(decorrido, 1),
+            "arquivos_por_minuto": (round(arquivos * 60 / decorrido, 2)
+                                    if decorrido else 0.0),
+            "contadores": contadores,
+            "histogramas": histogramas,
+        }
+
+    def gravar_json(self, caminho):
+        """
+        Grava a foto das métricas. Grava num temporário e troca, quem estiver
+        lendo nunca pega o arquivo pela metade.
+
+        :param caminho: Arquivo de destino.
+        """
+        temporario = caminho + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as arquivo:
+            json.dump(self.instantaneo(), arquivo, ensure_ascii=False,
+                      indent=2)
+        os.replace(temporario, caminho)
+
+    def texto_prometheus(self):
+        """
+        Métricas no formato texto do Prometheus.
+
+        :return: String.
+        """
+        def escapar(valor):
+            return (str(valor).replace("\\", "\\\\")
+                    .replace('"', '\\"').replace("\n", "\\n"))
+
+        def rotulos_texto(rotulos):
+            if not rotulos:
+                return ""
+            itens = ",".join(
+                f'{chave}="{escapar(valor)}"' for chave, valor in rotulos
+            )
+            return "{" + itens + "}"
+
+        linhas = []
+        with self._trava:
+            for nome, serie in sorted(self._contadores.items()):
+                linhas.append(f"# HELP {nome} {DESCRICOES.get(nome, nome)}")
+                linhas.append(f"# TYPE {nome} counter")
+                for chave, valor in serie.items():
+                    linhas.append(f"{nome}{rotulos_texto(chave)} {valor}")
+            for nome, histograma in sorted(self._histogramas.items()):
+                linhas.append(f"# HELP {nome} {DESCRICOES.get(nome, nome)}")
+                linhas.append(f"# TYPE {nome} histogram")
+                acumulado = 0
+                for limite, contagem in zip(self.faixas, histograma):
+                    acumulado += contagem
+                    linhas.append(f'{nome}_bucket{{le="{limite}"}} '
+                                  f"{acumulado}")
+                linhas.append(f'{nome}_bucket{{le="+Inf"}} {histograma[-2]}')
+                linhas.append(f"{nome}_sum {histograma[-1]}")
+                linhas.append(f"{nome}_count {histograma[-2]}")
+        return "\n".join(linhas) + "\n"
+
+
+# Registro do programa inteiro
+METRICAS = Metricas()
+
+
+class GravadorMetricas:
+    """
+    Mantém o JSON com a foto das métricas atualizado, regravando de tempos
+    em tempos numa thread separada.
+    """
+
+    def __init__(self, filename, metricas=METRICAS,
+                 intervalo=INTERVALO_GRAVACAO):
+        self.filename = filename
+        self.metricas = metricas
+        self._parar = threading.Event()
+        self.metricas.gravar_json(filename)
+        self._thread = threading.Thread(
+            target=self._regravar, args=(intervalo,), daemon=True,
+            name="metricas",
+        )
+        self._thread.start()
+
+    def _regravar(self, intervalo):
+        while not self._parar.wait(intervalo):
+            try:
+                self.metricas.gravar_json(self.filename)
+            except OSError:
+                pass  # Tenta de novo na próxima rodada
+
+    def close(self):
+        """
+        Para a regravação e grava a foto final.
+        """
+        if not self._parar.is_set():
+            self._parar.set()
+            self._thread.join()
+            self.metricas.gravar_json(self.filename)
+
+
+class _ManipuladorPrometheus(http.server.BaseHTTPRequestHandler):
+    """
+    Responde o /metrics.
+    """
+
+    def log_message(self, formato, *args):
+        pass  # O Prometheus pergunta toda hora, não precisa ir pro log
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        corpo = self.server.metricas.texto_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+
+def servir_prometheus(porta, metricas=METRICAS):
+    """
+    Sobe um servidor HTTP em segundo plano, só na própria máquina, com as
+    métricas em /metrics.
+
+    :param porta: Porta TCP.
+    :param metricas: Registro de métricas.
+    :return: O servidor (shutdown() pra parar).
+    """
+    servidor = http.server.ThreadingHTTPServer(("127.0.0.1", porta),
+                                               _ManipuladorPrometheus)
+    servidor.daemon_threads = True
+    servidor.metricas = metricas
+    threading.Thread(target=servidor.serve_forever, daemon=True,
+                     name="prometheus").start()
+    return servidor
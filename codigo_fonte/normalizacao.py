@@ -0,0 +1,271 @@
+"""
+normalizacao.py
+
+Descrição:
+Normalização do texto extraído antes da busca. A extração dos PDFs devolve
+de tudo: traço curto, traço longo, hífen que não quebra, espaço que não
+quebra, ligadura (ﬁ), caractere de largura cheia (Ａ１９３)... Cada variação
+era coberta por mais um padrão na lista ("A 193", "A-193", "F593-A"...), e
+a que ninguém lembrou de cadastrar passava batido.
+
+Agora o texto de cada página passa uma vez só por aqui e sai na forma
+canônica: NFKC (ligaduras, largura cheia), todos os traços viram "-", todos
+os espaços viram " " e tudo em maiúsculas. As regras (ver regra_canonica)
+só precisam conhecer essa forma.
+
+Orientações:
+- normalizar(texto) devolve um TextoNormalizado, com o texto canônico e o
+  mapa de volta pro texto original, pra mostrar no relatório o que estava
+  escrito de verdade.
+- Quase sempre o texto canônico tem o mesmo tamanho do original (trocas de
+  1 caractere por 1) e o mapa nem é montado. Só quando muda o tamanho
+  (ligadura, caractere apagado) o texto é refeito caractere a caractere.
+- Quebras de linha nunca são criadas nem apagadas, a linha N do texto
+  canônico é a linha N do original.
+- Espaços repetidos não são juntados no texto, quem aceita a sequência é o
+  SEPARADOR das regras.
+- O SEPARADOR só entra onde as listas antigas tinham variantes: entre o
+  prefixo e o número da norma ("A 193", "F-593") e antes do sufixo do
+  padrão ("B8 N", "17-4 PH", "F593 A"). Código de uma letra e um número
+  curto (B8, A1, C3) é exato, senão pega referência de desenho ("ZONA B-8",
+  "DETALHE A 1"). Pra conferir as variantes antigas e esses falsos
+  positivos: python normalizacao.py.
+
+Sobre a saída:
+- Não gera arquivos.
+
+Histórico de alterações:
+- 2026 10 19 Versão 0.0.4: Implantação.
+- 2026 10 19 Versão 0.0.4: Vários espaços ou traços entre as partes do código.
+- 2026 10 19 Versão 0.0.4: Separador só no prefixo da norma e no sufixo do padrão.
+"""
+
+import re
+import unicodedata
+
+# Traços que viram "-" (o NFKC já junta o hífen que não quebra no U+2010 e
+# passa os traços de largura cheia pra "-")
+TRACOS = "\u2010\u2012\u2013\u2014\u2015\u2212\ufe58\ufe63"
+# Espaços que viram " " (o NFKC já resolve os espaços que não quebram, os
+# finos e os de largura cheia)
+ESPACOS = "\t\u1680\u180e"
+# Invisíveis que somem: hífen "suave", espaços de largura zero
+INVISIVEIS = "\u00ad\u200b\u200c\u200d\u2060\ufeff"
+
+TABELA = str.maketrans(
+    {**{c: "-" for c in TRACOS}, **{c: " " for c in ESPACOS},
+     **{c: None for c in INVISIVEIS}}
+)
+_INVISIVEL = re.compile(f"[{INVISIVEIS}]")
+_NAO_ASCII = re.compile(r"[^\x00-\x7f]")
+
+# Separador opcional entre as partes de um código na forma canônica. Quantos
+# espaços e traços vierem: texto extraído de tabela sai com "17-4  PH" e
+# "F593   A", e a repescagem antiga (\s*) pegava.
+SEPARADOR = "[ -]*"
+# Números a partir desse tamanho depois de letras são de norma ("A 193",
+# "F 593") e aceitam o SEPARADOR; mais curtos são de padrão (B8, A1, C3)
+DIGITOS_NORMA = 3
+
+
+class TextoNormalizado:
+    """
+    Texto na forma canônica e o caminho de volta pro original.
+    """
+
+    def __init__(self, original, texto, mapa=None):
+        """
+        :param original: Texto como saiu da extração.
+        :param texto: Texto na forma canônica.
+        :param mapa: Pra cada caractere do texto canônico, a posição do
+        caractere do original que gerou ele. None se os dois têm o mesmo
+        tamanho e a posição é a mesma.
+        """
+        self.original = original
+        self.texto = texto
+        self.mapa = mapa
+
+    def posicao_original(self, posicao):
+        """
+        :param posicao: Posição no texto canônico.
+        :return: Posição correspondente no texto original.
+        """
+        if self.mapa is None:
+            return posicao
+        if posicao >= len(self.mapa):
+            return len(self.original)
+        return self.mapa[posicao]
+
+    def trecho_original(self, inicio, fim):
+        """
+        :param inicio: Início do trecho no texto canônico.
+        :param fim: Fim (exclusivo) do trecho no texto canônico.
+        :return: O trecho como estava escrito no original.
+        """
+        return self.original[self.posicao_original(inicio):
+                             self.posicao_original(fim)]
+
+    def linhas(self):
+        """
+        Divide em linhas, como o splitlines.
+
+        :return: Lista de (linha canônica, linha original).
+        """
+        linhas = []
+        posicao = 0
+        for linha in self.texto.splitlines(keepends=True):
+            conteudo = linha.splitlines()[0] if linha.splitlines() else ""
+            linhas.append((
+                conteudo,
+                self.trecho_original(posicao, posicao + len(conteudo)),
+            ))
+            posicao += len(linha)
+        return linhas
+
+
+def _canonico(trecho):
+    return unicodedata.normalize("NFKC", trecho).translate(TABELA).upper()
+
+
+def normalizar(texto):
+    """
+    Passa o texto pra forma canônica.
+
+    :param texto: Texto original (de uma página, por exemplo).
+    :return: Objeto TextoNormalizado.
+    """
+    # O caso mais comum, ASCII puro, só falta a caixa alta
+    if texto.isascii():
+        return TextoNormalizado(texto, texto.replace("\t", " ").upper())
+
+    # Já está em NFKC e não tem nada pra apagar: as trocas são de 1 pra 1
+    # e a posição é a mesma nos dois
+    if (unicodedata.is_normalized("NFKC", texto)
+            and not _INVISIVEL.search(texto)):
+        canonico = texto.translate(TABELA).upper()
+        if len(canonico) == len(texto):
+            return TextoNormalizado(texto, canonico)
+
+    # Muda de tamanho (ligadura, caractere apagado...), refaz anotando de
+    # onde veio cada caractere. Os trechos ASCII vão inteiros, só o resto é
+    # convertido um a um.
+    partes = []
+    mapa = []
+    anterior = 0
+    for encontrado in _NAO_ASCII.finditer(texto):
+        posicao = encontrado.start()
+        if posicao > anterior:
+            partes.append(texto[anterior:posicao].translate(TABELA).upper())
+            mapa.extend(range(anterior, posicao))
+        convertido = _canonico(texto[posicao])
+        partes.append(convertido)
+        mapa.extend([posicao] * len(convertido))
+        anterior = posicao + 1
+    partes.append(texto[anterior:].translate(TABELA).upper())
+    mapa.extend(range(anterior, len(texto)))
+    return TextoNormalizado(texto, "".join(partes), mapa)
+
+
+def regra_canonica(codigo):
+    """
+    Monta a expressão regular de um código (norma ou padrão) na forma
+    canônica, aceitando espaços ou traços (quantos forem, ou nenhum) só onde
+    as listas antigas tinham variantes:
+    - entre o prefixo e o número da norma: "A193" pega "A193", "A 193",
+      "A-193" e "A   193";
+    - entre o número e o sufixo do padrão: "B8N" pega "B8 N", "17-4PH" pega
+      "17-4  PH" e "F593A" pega "F593-A".
+    Letra e número curto ("B8", "A1") ficam grudados: "B 8" não é B8.
+    Separador escrito no código ("17-4") vira um ou mais espaços ou traços.
+
+    :param codigo: O código, com ou sem separadores.
+    :return: A expressão regular (texto), pra rodar no texto canônico.
+    """
+    regra = ""
+    anterior = None
+    for parte in re.findall(r"[A-Z]+|[0-9]+|[ -]+", codigo.upper()):
+        if parte[0] in " -":
+            # Separador escrito no código
+            regra += "[ -]+"
+            anterior = None
+            continue
+        if anterior and ((anterior.isdigit() and parte.isalpha())
+                         or (anterior.isalpha()
+                             and len(parte) >= DIGITOS_NORMA)):
+            regra += SEPARADOR
+        regra += parte
+        anterior = parte
+    return r"\b" + regra + r"\b"
+
+
+def conferir_separadores(variantes, espacos=(1, 2, 3, 5)):
+    """
+    Confere as regras contra as variantes que as listas antigas tinham
+    cadastradas ("A 193", "B8 N", "F593-A"), com vários espaços no lugar de
+    cada espaço, como a repescagem antiga (\s*) pegava.
+
+    :param variantes: Lista de (código, variante antiga).
+    :param espacos: Quantos espaços pôr no lugar de cada espaço.
+    :return: Lista de (código, texto) que a regra não pega. Vazia, tudo
+    certo.
+    """
+    perdidos = []
+    for codigo, variante in variantes:
+        regra = re.compile(regra_canonica(codigo))
+        for quantidade in espacos:
+            texto = f"BOLT {variante.replace(' ', ' ' * quantidade)} NUT"
+            if not regra.search(normalizar(texto).texto):
+                perdidos.append((codigo, texto))
+    return perdidos
+
+
+def conferir_falsos(casos):
+    """
+    Confere que as regras não pegam o que não é código (referência de
+    desenho, por exemplo).
+
+    :param casos: Lista de (código, texto).
+    :return: Lista de (código, texto) em que a regra achou o código. Vazia,
+    tudo certo.
+    """
+    return [(codigo, texto) for codigo, texto in casos
+            if re.search(regra_canonica(codigo), normalizar(texto).texto)]
+
+
+if __name__ == "__main__":
+    import sys
+
+    import varredura
+
+    # As variantes que as listas antigas (antes da forma canônica) tinham
+    variantes = []
+    for norma in ("A193", "A453", "A564", "A540", "F593"):
+        variantes += [(norma, f"{norma[0]} {norma[1:]}"),
+                      (norma, f"{norma[0]}-{norma[1:]}")]
+    for padrao in ("B8N", "B8T", "B8LN", "B8SH"):
+        variantes.append((padrao, f"{padrao[:2]} {padrao[2:]}"))
+    for padrao in ("17-4PH", "17-7PH", "17-6PH"):
+        variantes.append((padrao, f"{padrao[:4]} {padrao[4:]}"))
+    for padrao in ("F593A", "F593B", "F593C", "F593D"):
+        variantes += [(padrao, f"{padrao[:4]} {padrao[4:]}"),
+                      (padrao, f"{padrao[:4]}-{padrao[4:]}")]
+    # E o próprio código, de cada regra das listas de hoje
+    for dicionario in (varredura.normas, varredura.strings_especificas):
+        for norma, padroes in dicionario.items():
+            variantes.append((norma, norma))
+            variantes.extend((padrao, padrao) for padrao in padroes)
+    # Referências de desenho e afins, que não são código
+    falsos = [("B8", "ITEM B 8 NOTE A-193"), ("B8", "ZONA B-8"),
+              ("A1", "DETALHE A 1"), ("A1", "VER A-1"), ("C3", "ZONA C-3"),
+              ("F1", "FOLHA F 1"), ("A193", "A1930"), ("B8N", "B 8N")]
+
+    perdidos = conferir_separadores(variantes)
+    for codigo, texto in perdidos:
+        print(f"Perdido: {codigo} em '{texto}'")
+    achados_falsos = conferir_falsos(falsos)
+    for codigo, texto in achados_falsos:
+        print(f"Falso positivo: {codigo} em '{texto}'")
+    print(f"{len(variantes)} variantes e {len(falsos)} falsos conferidos, "
+          f"{len(perdidos)} perdido(s), {len(achados_falsos)} falso(s) "
+          "positivo(s).")
+    sys.exit(1 if perdidos or achados_falsos else 0)
@@ -0,0 +1,198 @@
+"""
+rebusca.py
+
+Descrição:
+Busca em lote (vetorizada, com pandas) sobre o texto já extraído dos PDFs.
+Quando entra uma norma ou um padrão novo na lista, reavaliar o arquivo
+morto inteiro com a busca linha a linha (buscar_parafusos) leva horas de
+Python puro. Aqui as linhas de muitos arquivos vão pra uma tabela
+(arquivo, pagina, linha, texto) e cada regra roda de uma vez na coluna de
+texto inteira.
+
+Orientações:
+- Quem usa é o Procura_B8.rebuscar_pdfs_no_diretorio (opção --rebusca), que
+  pega o texto do cache, monta os blocos e gera o relatório e o CSV de
+  sempre.
+- O texto vai pra tabela já na forma canônica (ver normalizacao.py) e as
+  regras são as mesmas da busca normal, só que compiladas aqui.
+- As peneiras (tem alguma norma? algum padrão da repescagem?) rodam uma vez
+  só no texto do bloco inteiro, todas as linhas juntas, e as posições
+  encontradas viram números de linha com numpy. Só as linhas que passam
+  na peneira vão pras regras uma a uma (str.contains do pandas).
+- A tabela é montada em blocos de TAMANHO_BLOCO linhas, pra memória não
+  explodir com o arquivo morto inteiro.
+- O resultado sai na mesma ordem que a busca linha a linha acharia: por
+  arquivo, página, linha; primeiro norma + padrão, depois a repescagem
+  (strings_especificas), na ordem das regras.
+
+Sobre a saída:
+- Não gera arquivos.
+
+Histórico de alterações:
+- 2026 10 19 Versão 0.0.4: Implantação.
+"""
+
+import re
+
+import numpy
+import pandas
+
+import normalizacao
+
+# Linhas de texto por bloco
+TAMANHO_BLOCO = 500_000
+
+COLUNAS_ACHADOS = ["arquivo", "pagina", "linha", "fonte", "ordem", "norma",
+                   "padrao"]
+
+
+class Regras:
+    """
+    As regras de busca (normas e strings_especificas) compiladas pra rodar
+    no texto canônico.
+    """
+
+    def __init__(self, normas, strings_especificas):
+        """
+        :param normas: Dicionário {norma: [padrao, ...]}.
+        :param strings_especificas: Dicionário {norma: [string, ...]} da
+        repescagem.
+        """
+        self.normas = [
+            (norma, self._compilar(norma),
+             [(padrao, self._compilar(padrao)) for padrao in padroes])
+            for norma, padroes in normas.items()
+        ]
+        self.especificas = [
+            (norma, string, self._compilar(string))
+            for norma, strings in strings_especificas.items()
+            for string in strings
+        ]
+        # Peneiras: uma passada só pra separar as linhas que interessam
+        self.peneira_normas = re.compile("|".join(
+            normalizacao.regra_canonica(norma) for norma in normas
+        ))
+        self.peneira_especificas = re.compile("|".join(
+            normalizacao.regra_canonica(string)
+            for _, string, _ in self.especificas
+        ))
+
+    @staticmethod
+    def _compilar(codigo):
+        return re.compile(normalizacao.regra_canonica(codigo))
+
+
+def montar_quadro(documentos):
+    """
+    Monta a tabela de linhas de um bloco de arquivos.
+
+    :param documentos: Iterável de (arquivo, paginas), 'arquivo' é um número
+    que identifica o arquivo e 'paginas' a lista com o texto de cada página
+    (como devolvido por extrair_paginas).
+    :return: DataFrame com as colunas arquivo, pagina, linha e texto (na
+    forma canônica). Páginas sem texto não entram.
+    """
+    arquivos = []
+    paginas = []
+    linhas = []
+    textos = []
+    for arquivo, paginas_texto in documentos:
+        for pagina, texto in enumerate(paginas_texto, start=1):
+            if not texto:
+                continue
+            linhas_pagina = normalizacao.normalizar(texto).texto.splitlines()
+            quantidade = len(linhas_pagina)
+            arquivos.extend([arquivo] * quantidade)
+            paginas.extend([pagina] * quantidade)
+            linhas.extend(range(1, quantidade + 1))
+            textos.extend(linhas_pagina)
+    return pandas.DataFrame({
+        "arquivo": pandas.array(arquivos, dtype="int32"),
+        "pagina": pandas.array(paginas, dtype="int32"),
+        "linha": pandas.array(linhas, dtype="int32"),
+        "texto": pandas.array(textos, dtype=object),
+    })
+
+
+def _linhas_com(regra, texto_bloco, inicios):
+    """
+    Quais linhas do bloco têm a regra, com uma passada só no texto todo.
+
+    :param regra: Expressão regular compilada (não atravessa linhas).
+    :param texto_bloco: As linhas do bloco juntas, separadas por "\\n".
+    :param inicios: Array com a posição de início de cada linha.
+    :return: Array com os números (posição no quadro) das linhas.
+    """
+    posicoes = numpy.fromiter(
+        (encontrado.start() for encontrado in regra.finditer(texto_bloco)),
+        dtype=numpy.int64,
+    )
+    return numpy.unique(numpy.searchsorted(inicios, posicoes,
+                                           side="right") - 1)
+
+
+def buscar_no_quadro(quadro, regras):
+    """
+    Roda as regras na tabela de linhas.
+
+    :param quadro: DataFrame montado por montar_quadro.
+    :param regras: Objeto Regras.
+    :return: 'Tuple' com o DataFrame de achados (colunas COLUNAS_ACHADOS;
+    fonte 0 é norma + padrão na mesma linha, 1 é repescagem) e o conjunto
+    de (arquivo, pagina) que têm alguma norma, as únicas onde a busca em
+    janela pode achar alguma coisa.
+    """
+    texto = quadro["texto"]
+    partes = []
+    ordem = 0
+    texto_bloco = "\n".join(texto)
+    tamanhos = texto.str.len().to_numpy(dtype=numpy.int64) + 1
+    inicios = numpy.concatenate(([0], numpy.cumsum(tamanhos)[:-1]))
+
+    # Norma e padrão na mesma linha
+    com_norma = quadro.iloc[
+        _linhas_com(regras.peneira_normas, texto_bloco, inicios)
+    ]
+    paginas_com_norma = set(zip(com_norma["arquivo"], com_norma["pagina"]))
+    for norma, regra_norma, padroes in regras.normas:
+        linhas_norma = com_norma[com_norma["texto"].str.contains(regra_norma)]
+        for padrao, regra in padroes:
+            if not linhas_norma.empty:
+                achadas = linhas_norma[
+                    linhas_norma["texto"].str.contains(regra)
+                ]
+                if not achadas.empty:
+                    partes.append(achadas[["arquivo", "pagina", "linha"]]
+                                  .assign(fonte=0, ordem=ordem, norma=norma,
+                                          padrao=padrao))
+            ordem += 1
+    normais = partes[:]
+
+    # Repescagem: só o padrão, sem repetir o que a linha ja deu acima
+    com_especifica = quadro.iloc[
+        _linhas_com(regras.peneira_especificas, texto_bloco, inicios)
+    ]
+    for norma, string, regra in regras.especificas:
+        achadas = com_especifica[com_especifica["texto"].str.contains(regra)]
+        if not achadas.empty:
+            partes.append(achadas[["arquivo", "pagina", "linha"]]
+                          .assign(fonte=1, ordem=ordem, norma=norma,
+                                  padrao=string))
+        ordem += 1
+
+    if not partes:
+        return pandas.DataFrame(columns=COLUNAS_ACHADOS), paginas_com_norma
+
+    achados = pandas.concat(partes, ignore_index=True)
+    if normais and len(partes) > len(normais):
+        chave = ["arquivo", "pagina", "linha", "padrao"]
+        ja_achados = pandas.concat(normais)[chave].drop_duplicates()
+        marcados = achados.merge(ja_achados, on=chave, how="left",
+                                 indicator=True)
+        repetido = (marcados["_merge"] == "both") & (marcados["fonte"] == 1)
+        achados = achados[~repetido.to_numpy()]
+
+    achados = achados.sort_values(
+        ["arquivo", "pagina", "linha", "fonte", "ordem"], kind="stable"
+    ).reset_index(drop=True)
+    return achados[COLUNAS_ACHADOS], paginas_com_norma
@@ -0,0 +1,309 @@
+"""
+saidas_estruturadas.py
+
+Descrição:
+Saídas "de máquina" do Detetive B8, gravadas ao lado do CSV de sempre.
+O CSV separado por ';' com colunas de largura variável é ótimo pra abrir no
+olho, mas péssimo pra ferramenta nenhuma ler. Aqui cada arquivo processado e
+cada achado viram registros estruturados.
+
+Orientações:
+- As saídas são gravadas de forma incremental, arquivo a arquivo, durante a
+  varredura. Se o processamento cair no meio, o que já foi feito está salvo.
+- Todas as classes têm a mesma interface: gravar_arquivo(registro, achados)
+  e close(). O processar_pdfs_no_diretorio recebe uma lista delas.
+
+Sobre a saída:
+- resultado_<data_hora>.jsonl  : um registro JSON por linha, "tipo": "arquivo"
+  para o resumo de cada PDF e "tipo": "achado" para cada item proibido.
+- resultado_<data_hora>.sqlite : (opcional) banco com as tabelas indexadas
+  'files' (um registro por PDF) e 'findings' (um registro por achado).
+- resultado_<data_hora>.xlsx   : (opcional) planilha Excel nativa com as abas
+  'Arquivos' e 'Achados', página e linha como colunas numéricas.
+
+Histórico de alterações:
+- 2026 10 19 Versão 0.0.4: Implantação.
+- 2026 10 19 Versão 0.0.4: Planilha xlsx com o openpyxl em modo write-only.
+- 2026 10 19 Versão 0.0.4: Perfil de regras de cada achado.
+- 2026 10 19 Versão 0.0.4: Hash do conteúdo no registro do arquivo.
+- 2026 10 19 Versão 0.0.4: Hash do conteúdo na tabela files do SQLite.
+"""
+
+import json
+import sqlite3
+
+
+def registro_arquivo(nome_arquivo, caminho, status, total_paginas=0,
+                     paginas_nao_pesquisaveis=(), tamanho_bytes=0,
+                     tempo_s=0.0, erro=None, duplicata_de=None,
+                     hash_arquivo=None):
+    """
+    Monta o registro (dicionário) com o resumo de um arquivo processado.
+
+    :param nome_arquivo: Nome do arquivo PDF.
+    :param caminho: Caminho completo do arquivo.
+    :param status: "SIM", "NAO" ou "ERRO".
+    :param total_paginas: Quantidade de páginas do PDF.
+    :param paginas_nao_pesquisaveis: Páginas em branco ou sem texto.
+    :param tamanho_bytes: Tamanho do arquivo em bytes.
+    :param tempo_s: Tempo gasto no processamento, em segundos.
+    :param erro: Mensagem de erro, se houver.
+    :param duplicata_de: Caminho do original, se o arquivo for uma cópia
+    idêntica de outro já processado.
+    :param hash_arquivo: Hash do conteúdo (ver duplicados.py), se já foi
+    calculado.
+    :return: Dicionário com o resumo do arquivo.
+    """
+    return {
+        "tipo": "arquivo",
+        "arquivo": nome_arquivo,
+        "caminho": caminho,
+        "status": status,
+        "paginas": total_paginas,
+        "paginas_nao_pesquisaveis": list(paginas_nao_pesquisaveis),
+        "tamanho_bytes": tamanho_bytes,
+        "tempo_s": round(tempo_s, 3),
+        "erro": erro,
+        "duplicata_de": duplicata_de,
+        "hash": hash_arquivo,
+    }
+
+
+def registros_achados(nome_arquivo, caminho, resultados, formatar_norma,
+                      perfil=None):
+    """
+    Converte o dicionário de resultados da busca ({norma: [(padrao, pagina,
+    linha[, linha_norma]), ...]}) em uma lista de registros, um por achado.
+    'linha_norma' só vem preenchida quando a norma está em outra linha.
+
+    :param nome_arquivo: Nome do arquivo PDF.
+    :param caminho: Caminho completo do arquivo.
+    :param resultados: Dicionário de resultados da busca.
+    :param formatar_norma: Função que devolve a norma como vai pro relatório.
+    :param perfil: Nome do perfil de regras que achou (ver varredura.Perfil).
+    :return: Lista de dicionários, um por achado.
+    """
+    achados = []
+    for norma, padroes in resultados.items():
+        for padrao in padroes:
+            achados.append({
+                "tipo": "achado",
+                "arquivo": nome_arquivo,
+                "caminho": caminho,
+                "norma": formatar_norma(norma),
+                "padrao": padrao[0].strip(),
+                "pagina": padrao[1],
+                "linha": padrao[2],
+                "linha_norma": padrao[3] if len(padrao) > 3 else None,
+                "perfil": perfil,
+            })
+    return achados
+
+
+class SaidaJSONL:
+    """
+    Grava um registro JSON por linha. Cada arquivo processado gera uma linha
+    "arquivo" seguida das linhas "achado" dele.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.file = open(filename, "w", encoding="utf-8")
+
+    def gravar_arquivo(self, registro, achados):
+        """
+        Grava o resumo do arquivo e seus achados e descarrega no disco.
+
+        :param registro: Dicionário montado por registro_arquivo.
+        :param achados: Lista de dicionários montada por registros_achados.
+        """
+        self.file.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        for achado in achados:
+            self.file.write(json.dumps(achado, ensure_ascii=False) + "\n")
+        # Descarrega a cada arquivo, quem estiver lendo ja enxerga o registro
+        self.file.flush()
+
+    def close(self):
+        """
+        Fecha o arquivo se ele estiver aberto.
+        """
+        if self.file and not self.file.closed:
+            self.file.close()
+
+
+class SaidaSQLite:
+    """
+    Grava os resultados num banco SQLite com as tabelas 'files' e 'findings'.
+    Cada arquivo processado é uma transação, então o banco pode ser
+    consultado enquanto a varredura ainda está rodando.
+    """
+
+    ESQUEMA = """
+        CREATE TABLE IF NOT EXISTS files (
+            id INTEGER PRIMARY KEY,
+            arquivo TEXT NOT NULL,
+            caminho TEXT NOT NULL,
+            status TEXT NOT NULL,
+            paginas INTEGER,
+            paginas_nao_pesquisaveis TEXT,
+            tamanho_bytes INTEGER,
+            tempo_s REAL,
+            erro TEXT,
+            duplicata_de TEXT,
+            hash TEXT
+        );
+        CREATE TABLE IF NOT EXISTS findings (
+            id INTEGER PRIMARY KEY,
+            file_id INTEGER NOT NULL REFERENCES files(id),
+            arquivo TEXT NOT NULL,
+            norma TEXT NOT NULL,
+            padrao TEXT NOT NULL,
+            pagina INTEGER,
+            linha INTEGER,
+            linha_norma INTEGER,
+            perfil TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_files_caminho ON files(caminho);
+        CREATE INDEX IF NOT EXISTS idx_files_status ON files(status);
+        CREATE INDEX IF NOT EXISTS idx_files_hash ON files(hash);
+        CREATE INDEX IF NOT EXISTS idx_findings_file ON findings(file_id);
+        CREATE INDEX IF NOT EXISTS idx_findings_norma
+            ON findings(norma, padrao);
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.conexao = sqlite3.connect(filename)
+        # WAL deixa os paineis lerem o banco enquanto a gente escreve
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.executescript(self.ESQUEMA)
+        self.conexao.commit()
+
+    def gravar_arquivo(self, registro, achados):
+        """
+        Grava o resumo do arquivo e seus achados numa única transação.
+
+        :param registro: Dicionário montado por registro_arquivo.
+        :param achados: Lista de dicionários montada por registros_achados.
+        """
+        with self.conexao:
+            cursor = self.conexao.execute(
+                "INSERT INTO files (arquivo, caminho, status, paginas, "
+                "paginas_nao_pesquisaveis, tamanho_bytes, tempo_s, erro, "
+                "duplicata_de, hash) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    registro["arquivo"],
+                    registro["caminho"],
+                    registro["status"],
+                    registro["paginas"],
+                    ", ".join(map(str, registro["paginas_nao_pesquisaveis"])),
+                    registro["tamanho_bytes"],
+                    registro["tempo_s"],
+                    registro["erro"],
+                    registro["duplicata_de"],
+                    registro["hash"],
+                ),
+            )
+            file_id = cursor.lastrowid
+            self.conexao.executemany(
+                "INSERT INTO findings (file_id, arquivo, norma, padrao, "
+                "pagina, linha, linha_norma, perfil) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (file_id, achado["arquivo"], achado["norma"],
+                     achado["padrao"], achado["pagina"], achado["linha"],
+                     achado["linha_norma"], achado.get("perfil"))
+                    for achado in achados
+                ],
+            )
+
+    def close(self):
+        """
+        Fecha a conexão com o banco.
+        """
+        if self.conexao:
+            self.conexao.close()
+            self.conexao = None
+
+
+class SaidaExcel:
+    """
+    Grava uma planilha xlsx com uma aba de resumo por arquivo e uma aba com
+    os achados. Usa o modo write-only do openpyxl, que vai despejando as
+    linhas em disco em vez de montar a planilha inteira na memória, então
+    o consumo fica estável mesmo com centenas de milhares de achados.
+    O arquivo só fica completo depois do close().
+    """
+
+    CABECALHO_ARQUIVOS = [
+        "Arquivo", "Caminho", "Localizado item proibido", "Páginas",
+        "Páginas em branco ou não pesquisáveis", "Tamanho (bytes)",
+        "Tempo (s)", "Erro", "Cópia idêntica de",
+    ]
+    CABECALHO_ACHADOS = ["Arquivo", "Caminho", "Norma", "Padrão", "Página",
+                         "Linha", "Linha da norma", "Perfil"]
+
+    def __init__(self, filename):
+        # Só carrega o openpyxl se alguém pediu a planilha
+        import openpyxl
+
+        self.filename = filename
+        self.workbook = openpyxl.Workbook(write_only=True)
+        self.aba_arquivos = self._criar_aba("Arquivos",
+                                            self.CABECALHO_ARQUIVOS,
+                                            [30, 60, 12, 10, 30, 15, 10, 40,
+                                             60])
+        self.aba_achados = self._criar_aba("Achados", self.CABECALHO_ACHADOS,
+                                           [30, 60, 15, 12, 10, 10, 15,
+                                            20])
+
+    def _criar_aba(self, titulo, cabecalho, larguras):
+        """
+        Cria uma aba com cabeçalho congelado e largura das colunas.
+        No modo write-only isso tem que ser feito antes da primeira linha.
+        """
+        aba = self.workbook.create_sheet(titulo)
+        aba.freeze_panes = "A2"
+        for indice, largura in enumerate(larguras):
+            letra = chr(ord("A") + indice)
+            aba.column_dimensions[letra].width = largura
+        aba.append(cabecalho)
+        return aba
+
+    def gravar_arquivo(self, registro, achados):
+        """
+        Acrescenta o resumo do arquivo e seus achados nas abas.
+
+        :param registro: Dicionário montado por registro_arquivo.
+        :param achados: Lista de dicionários montada por registros_achados.
+        """
+        self.aba_arquivos.append([
+            registro["arquivo"],
+            registro["caminho"],
+            registro["status"],
+            registro["paginas"],
+            ", ".join(map(str, registro["paginas_nao_pesquisaveis"])),
+            registro["tamanho_bytes"],
+            registro["tempo_s"],
+            registro["erro"],
+            registro["duplicata_de"],
+        ])
+        for achado in achados:
+            self.aba_achados.append([
+                achado["arquivo"],
+                achado["caminho"],
+                achado["norma"],
+                achado["padrao"],
+                achado["pagina"],
+                achado["linha"],
+                achado["linha_norma"],
+                achado.get("perfil"),
+            ])
+
+    def close(self):
+        """
+        Salva a planilha. No modo write-only só dá pra salvar uma vez.
+        """
+        if self.workbook:
+            self.workbook.save(self.filename)
+            self.workbook = None
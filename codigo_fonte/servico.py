@@ -0,0 +1,469 @@
+"""
+servico.py
+
+Descrição:
+Modo serviço do Detetive B8: um servidor HTTP local que fica no ar com tudo
+"quente" (bibliotecas importadas, regras carregadas, cache de texto aberto e
+processos de extração já de pé) esperando pedidos de varredura.
+Assim outras ferramentas conseguem usar o detetive sem abrir a janela e sem
+pagar a partida do programa (interpretador, imports, dados do sistema, Tk)
+a cada consulta.
+
+Orientações:
+- Escuta só em 127.0.0.1 (a própria máquina), não tem autenticação e nem
+  deve ter, não é pra ficar exposto na rede.
+- Chamadas:
+    GET  /status                 : situação do serviço, do cache e da
+                                   memória de linhas.
+    GET  /metrics                : métricas no formato do Prometheus (ver
+                                   metricas.py).
+    POST /varrer                 : corpo JSON {"diretorio": "C:/pdfs",
+                                   "recursivo": false, "janela": 1}.
+    POST /varrer-pdf?nome=x.pdf  : o corpo é o próprio arquivo PDF. O
+                                   'caminho' vem null, como no
+                                   detetive.scan_bytes (o arquivo só
+                                   existiu num temporário do serviço).
+- A resposta das varreduras vem aos poucos (streaming), um JSON por linha
+  (NDJSON), na ordem em que os arquivos terminam:
+    {"evento": "inicio", "arquivos": N}
+    {"evento": "arquivo", "registro": {...}, "achados": [...]}
+    {"evento": "fim", "arquivos": N, "com_achados": M, "tempo_s": T}
+  'registro' e 'achados' têm o mesmo formato do resultado_<data_hora>.jsonl
+  (ver saidas_estruturadas.py).
+- Exemplo:
+    python servico.py --porta 8765 --trabalhadores 4
+    curl -N -d "{\"diretorio\": \"C:/pdfs\"}" http://127.0.0.1:8765/varrer
+- Os arquivos de um pedido são divididos entre os trabalhadores, cada um com
+  o seu processo de extração vigiado (mesmos limites de tempo e memória do
+  programa normal).
+
+Sobre a saída:
+- Não gera arquivos, além do cache de texto (ver cache_texto.py) e, com
+  --metricas-json, da foto das métricas.
+
+Histórico de alterações:
+- 2026 10 19 Versão 0.0.4: Implantação.
+- 2026 10 19 Versão 0.0.4: Métricas em /metrics e em JSON.
+- 2026 10 19 Versão 0.0.4: Usa o varredura.py, não carrega mais a interface.
+- 2026 10 19 Versão 0.0.4: Memória das linhas repetidas, em /status.
+- 2026 10 19 Versão 0.0.4: /varrer-pdf sem o caminho do temporário.
+- 2026 10 19 Versão 0.0.4: Mensagem clara quando falta o 'diretorio' no /varrer.
+"""
+
+import argparse
+import concurrent.futures
+import http.server
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+
+import cache_texto
+import duplicados
+import extracao
+import log_execucao
+import metricas
+import saidas_estruturadas
+import varredura
+
+log = logging.getLogger("detetive.servico")
+
+PORTA_PADRAO = 8765
+TRABALHADORES_PADRAO = min(4, os.cpu_count() or 1)
+# Maior PDF aceito no /varrer-pdf
+TAMANHO_MAXIMO_PDF_MB = 512
+
+
+class ServicoVarredura:
+    """
+    Mantém os recursos quentes e faz as varreduras. Um objeto só atende
+    vários pedidos ao mesmo tempo.
+    """
+
+    def __init__(self, trabalhadores=TRABALHADORES_PADRAO, cache=None,
+                 tempo_limite=900, memoria_limite_mb=4096,
+                 memo_limite_mb=varredura.LIMITE_MEMO_MB):
+        """
+        :param trabalhadores: Quantos arquivos são analisados em paralelo.
+        :param cache: Objeto CacheTexto ou None.
+        :param tempo_limite: Tempo máximo de extração por arquivo (segundos).
+        :param memoria_limite_mb: Memória máxima da extração, em MB.
+        :param memo_limite_mb: Memória máxima da memória de linhas
+        repetidas, em MB (0 desliga). Vale pra todos os pedidos.
+        """
+        self.cache = cache
+        self.memo = None
+        if memo_limite_mb > 0:
+            self.memo = varredura.MemoLinhas(memo_limite_mb)
+        self.trabalhadores = trabalhadores
+        self.inicio = time.time()
+        self.pedidos = 0
+        self.arquivos = 0
+        self._trava = threading.Lock()
+        # Um extrator por trabalhador, emprestado arquivo a arquivo. Com os
+        # dois limites em 0 extrai na própria thread (None).
+        self._extratores = queue.Queue()
+        for _ in range(trabalhadores):
+            extrator = None
+            if tempo_limite or memoria_limite_mb:
+                extrator = extracao.ExtratorIsolado(tempo_limite,
+                                                    memoria_limite_mb)
+                extrator.aquecer()
+            self._extratores.put(extrator)
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            trabalhadores, thread_name_prefix="varredura"
+        )
+
+    def _analisar(self, caminho, janela):
+        """
+        Analisa um PDF com um dos extratores livres.
+
+        :return: 'Tuple' do varredura.analisar_pdf_com_limite e o tempo
+        gasto, ou a exceção no lugar da tupla se deu erro.
+        """
+        inicio = time.time()
+        extrator = self._extratores.get()
+        try:
+            analise = varredura.analisar_pdf_com_limite(
+                caminho, self.cache, janela, extrator, memo=self.memo
+            )
+        except Exception as e:
+            log.debug("Erro em %s", caminho, exc_info=True)
+            analise = e
+        finally:
+            self._extratores.put(extrator)
+        return analise, time.time() - inicio
+
+    @staticmethod
+    def _montar_evento(nome, caminho, analise, tempo_s, original=None):
+        """
+        Monta o evento "arquivo" com o registro e os achados.
+        """
+        try:
+            tamanho = os.path.getsize(caminho)
+        except OSError:
+            tamanho = 0
+        if isinstance(analise, Exception):
+            registro = saidas_estruturadas.registro_arquivo(
+                nome, caminho, "ERRO", tamanho_bytes=tamanho, tempo_s=tempo_s,
+                erro=str(analise),
+            )
+            return {"evento": "arquivo", "registro": registro, "achados": []}
+
+        (resultados, paginas_nao_pesquisaveis, total_paginas, _,
+         interrupcao) = analise
+        registro = saidas_estruturadas.registro_arquivo(
+            nome, caminho, varredura.status_arquivo(resultados, interrupcao),
+            total_paginas, paginas_nao_pesquisaveis, tamanho, tempo_s,
+            duplicata_de=original,
+        )
+        achados = saidas_estruturadas.registros_achados(
+            nome, caminho, resultados, varredura.formatar_norma
+        )
+        return {"evento": "arquivo", "registro": registro, "achados": achados}
+
+    def varrer(self, arquivos, janela=1):
+        """
+        Analisa uma lista de PDFs em paralelo.
+
+        :param arquivos: Lista de (nome, caminho), como a do listar_pdfs.
+        :param janela: Quantas linhas seguidas são consideradas juntas na
+        busca.
+        :return: Gerador de eventos (dicionários), na ordem em que os
+        arquivos terminam.
+        """
+        inicio = time.time()
+        with self._trava:
+            self.pedidos += 1
+        yield {"evento": "inicio", "arquivos": len(arquivos)}
+
+        # Cópia idêntica espera o original e reaproveita o resultado
+        duplicatas = duplicados.mapear_duplicados(
+            [caminho for _, caminho in arquivos]
+        )
+        copias = {}
+        futuros = {}
+        for nome, caminho in arquivos:
+            if caminho in duplicatas:
+                copias.setdefault(duplicatas[caminho], []).append(
+                    (nome, caminho)
+                )
+            else:
+                futuro = self._executor.submit(self._analisar, caminho,
+                                               janela)
+                futuros[futuro] = (nome, caminho)
+
+        com_achados = 0
+        for futuro in concurrent.futures.as_completed(futuros):
+            nome, caminho = futuros[futuro]
+            analise, tempo_s = futuro.result()
+            eventos = [self._montar_evento(nome, caminho, analise, tempo_s)]
+            for nome_copia, caminho_copia in copias.get(caminho, []):
+                eventos.append(self._montar_evento(
+                    nome_copia, caminho_copia, analise, 0.0, caminho
+                ))
+            for evento in eventos:
+                metricas.METRICAS.registrar_arquivo(evento["registro"],
+                                                    evento["achados"])
+                if evento["achados"]:
+                    com_achados += 1
+                yield evento
+
+        with self._trava:
+            self.arquivos += len(arquivos)
+        yield {
+            "evento": "fim",
+            "arquivos": len(arquivos),
+            "com_achados": com_achados,
+            "tempo_s": round(time.time() - inicio, 3),
+        }
+
+    def status(self):
+        """
+        Situação do serviço.
+
+        :return: Dicionário com a situação.
+        """
+        return {
+            "no_ar_s": round(time.time() - self.inicio, 1),
+            "trabalhadores": self.trabalhadores,
+            "pedidos": self.pedidos,
+            "arquivos": self.arquivos,
+            "extracao": extracao.BACKEND_EXTRACAO,
+            "cache": self.cache.estatisticas() if self.cache else None,
+            "memo": self.memo.estatisticas() if self.memo else None,
+        }
+
+    def close(self):
+        """
+        Para os trabalhadores e encerra os processos de extração.
+        """
+        self._executor.shutdown(wait=True)
+        while not self._extratores.empty():
+            extrator = self._extratores.get()
+            if extrator:
+                extrator.close()
+
+
+class _Manipulador(http.server.BaseHTTPRequestHandler):
+    """
+    Atende as chamadas HTTP. O serviço fica em self.server.servico.
+    """
+
+    server_version = "DetetiveB8"
+
+    def log_message(self, formato, *args):
+        log.info("%s " + formato, self.address_string(), *args)
+
+    def _responder_json(self, codigo, dados):
+        corpo = json.dumps(dados, ensure_ascii=False).encode("utf-8")
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _transmitir(self, eventos):
+        """
+        Manda os eventos um por linha, cada um assim que fica pronto. Sem
+        Content-Length, o fim da resposta é o fechamento da conexão.
+        """
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.end_headers()
+        for evento in eventos:
+            self.wfile.write(
+                json.dumps(evento, ensure_ascii=False).encode("utf-8") + b"\n"
+            )
+            self.wfile.flush()
+
+    def _ler_corpo(self, limite):
+        tamanho = int(self.headers.get("Content-Length") or 0)
+        if tamanho > limite:
+            return None
+        return self.rfile.read(tamanho)
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        if url.path == "/status":
+            self._responder_json(200, self.server.servico.status())
+        elif url.path == "/metrics":
+            corpo = metricas.METRICAS.texto_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+        else:
+            self._responder_json(404, {"erro": "Caminho desconhecido."})
+
+    def do_POST(self):
+        url = urllib.parse.urlparse(self.path)
+        if url.path == "/varrer":
+            self._varrer_diretorio()
+        elif url.path == "/varrer-pdf":
+            self._varrer_pdf(urllib.parse.parse_qs(url.query))
+        else:
+            self._responder_json(404, {"erro": "Caminho desconhecido."})
+
+    def _varrer_diretorio(self):
+        try:
+            pedido = json.loads(self._ler_corpo(1024 * 1024) or b"{}")
+            diretorio = pedido["diretorio"]
+            recursivo = bool(pedido.get("recursivo", False))
+            janela = max(1, int(pedido.get("janela", 1)))
+        except KeyError:
+            self._responder_json(400, {
+                "erro": "Pedido inválido, falta o 'diretorio'."
+            })
+            return
+        except (ValueError, TypeError) as e:
+            # JSON quebrado, ou 'janela' que não é número
+            self._responder_json(400, {"erro": f"Pedido inválido: {e}"})
+            return
+        if not os.path.isdir(diretorio):
+            self._responder_json(404, {
+                "erro": f"Diretório não encontrado: {diretorio}"
+            })
+            return
+        log.info("Varrendo %s", diretorio)
+        arquivos = varredura.listar_pdfs(diretorio, recursivo)
+        self._transmitir(self.server.servico.varrer(arquivos, janela))
+
+    def _varrer_pdf(self, parametros):
+        nome = parametros.get("nome", ["enviado.pdf"])[0]
+        try:
+            janela = max(1, int(parametros.get("janela", ["1"])[0]))
+        except ValueError:
+            self._responder_json(400, {"erro": "'janela' tem que ser número."})
+            return
+        conteudo = self._ler_corpo(TAMANHO_MAXIMO_PDF_MB * 1024 * 1024)
+        if conteudo is None:
+            self._responder_json(413, {
+                "erro": f"PDF maior que {TAMANHO_MAXIMO_PDF_MB} MB."
+            })
+            return
+        # O extrator trabalha com caminho, então o PDF vai pra um arquivo
+        # temporário durante a análise
+        with tempfile.NamedTemporaryFile(suffix=".pdf",
+                                         delete=False) as temporario:
+            temporario.write(conteudo)
+        try:
+            log.info("Varrendo PDF enviado %s", nome)
+            eventos = self.server.servico.varrer(
+                [(nome, temporario.name)], janela
+            )
+            self._transmitir(_sem_caminho(eventos))
+        finally:
+            os.remove(temporario.name)
+
+
+def _sem_caminho(eventos):
+    """
+    Tira o caminho dos eventos de um PDF enviado: era o do arquivo
+    temporário, que já foi apagado e não diz nada pra quem enviou.
+
+    :param eventos: Gerador de eventos do ServicoVarredura.varrer.
+    :return: Gerador dos mesmos eventos, com 'caminho' None.
+    """
+    for evento in eventos:
+        if "registro" in evento:
+            evento["registro"]["caminho"] = None
+            for achado in evento["achados"]:
+                achado["caminho"] = None
+        yield evento
+
+
+def criar_servidor(servico, porta=PORTA_PADRAO):
+    """
+    Cria o servidor HTTP, só na própria máquina.
+
+    :param servico: Objeto ServicoVarredura.
+    :param porta: Porta TCP (0 escolhe uma livre).
+    :return: O servidor, falta chamar serve_forever().
+    """
+    servidor = http.server.ThreadingHTTPServer(("127.0.0.1", porta),
+                                               _Manipulador)
+    servidor.daemon_threads = True
+    servidor.servico = servico
+    return servidor
+
+
+def parse_arguments(argv=None):
+    """
+    Analisa os argumentos da linha de comando do modo serviço.
+
+    :param argv: Lista de argumentos (None usa sys.argv).
+    :return: Objeto 'Namespace' com os argumentos.
+    """
+    parser = argparse.ArgumentParser(
+        description="Detetive B8 em modo serviço (HTTP local)."
+    )
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO,
+                        help=f"Porta TCP (padrão {PORTA_PADRAO})")
+    parser.add_argument("--trabalhadores", type=int,
+                        default=TRABALHADORES_PADRAO,
+                        help="Arquivos analisados em paralelo")
+    parser.add_argument("--tempo-limite", type=float, default=900,
+                        help="Tempo máximo de extração por arquivo (s)")
+    parser.add_argument("--memoria-limite-mb", type=float, default=4096,
+                        help="Memória máxima da extração (MB)")
+    parser.add_argument("--sem-cache", action="store_true",
+                        help="Não usa o cache de texto extraído")
+    parser.add_argument("--cache-dir", default=cache_texto.DIRETORIO_PADRAO,
+                        help="Diretório do cache de texto")
+    parser.add_argument("--cache-limite-mb", type=float,
+                        default=cache_texto.LIMITE_PADRAO_MB,
+                        help="Tamanho máximo do cache de texto (MB)")
+    parser.add_argument("--metricas-json",
+                        help="Arquivo JSON com a foto das métricas, "
+                             "regravado de tempos em tempos")
+    parser.add_argument("-d", "--debug", action="store_true",
+                        help="Grava o log de depuração em arquivo")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_arguments(argv)
+    log_execucao.configurar_log(
+        console=sys.stderr,
+        arquivo_debug=(
+            f"log_debug_servico_{time.strftime('%Y%m%d_%H%M%S')}.txt"
+            if args.debug else None
+        ),
+    )
+    cache = None
+    if not args.sem_cache:
+        cache = cache_texto.CacheTexto(args.cache_dir, args.cache_limite_mb)
+    servico = ServicoVarredura(args.trabalhadores, cache, args.tempo_limite,
+                               args.memoria_limite_mb)
+    gravador_metricas = None
+    if args.metricas_json:
+        gravador_metricas = metricas.GravadorMetricas(args.metricas_json)
+    servidor = criar_servidor(servico, args.porta)
+    log.info("Detetive B8 no ar em http://127.0.0.1:%s (Ctrl+C encerra)",
+             servidor.server_address[1])
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        log.info("Encerrando...")
+    finally:
+        servidor.server_close()
+        servico.close()
+        if gravador_metricas:
+            gravador_metricas.close()
+        if cache:
+            cache.close()
+        log_execucao.encerrar_log()
+
+
+######################## Main ################################
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
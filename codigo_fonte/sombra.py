@@ -0,0 +1,431 @@
+"""
+sombra.py
+
+Descrição:
+Modo sombra: roda a busca de sempre (buscar_parafusos e
+buscar_parafusos_perdidos, linha a linha) e um motor de busca alternativo
+no mesmo texto, lado a lado, e compara. Motor mais rápido só entra no lugar
+da busca de sempre depois de provar, num acervo de verdade, que acha
+exatamente a mesma coisa. Parafuso B8 que passa batido não aparece em
+benchmark nenhum, só na auditoria.
+
+Orientações:
+- python sombra.py DIRETORIO [--motor memo] [-r] [--cache-dir DIR]
+  O texto vem do cache de texto (ver cache_texto.py), o que não estiver lá
+  é extraído na hora, com os mesmos limites do programa.
+- Motores que já vêm prontos (MOTORES):
+    - memo: a busca do programa hoje (pesquisar_paginas com a MemoLinhas);
+    - lote: a busca em lote do --rebusca (rebusca.py, pandas).
+  Qualquer outro entra como --motor modulo:funcao. A função recebe a lista
+  com o texto de cada página (como o extrair_paginas devolve, do jeito que
+  saiu do PDF) e devolve os achados como (pagina, linha, norma, padrao),
+  página e linha a partir de 1, norma como nas chaves do dicionário
+  'normas' do varredura.py. A normalização é por conta do motor, então o
+  tempo de cada um é o da busca completa.
+- Só a busca na mesma linha (norma + padrão e repescagem) é comparada. A
+  busca em janela (-j, tabelas) é outra etapa, por cima dessa.
+- Diferenças, por arquivo:
+    - só no legado: o motor novo deixou passar (isso é o grave);
+    - só no novo: o motor novo achou o que a busca de sempre não acha;
+    - linha trocada: mesma página, norma e padrão, linha diferente.
+  A ordem dos achados não entra na comparação.
+- O log dos achados (INFO do varredura) fica desligado durante a
+  comparação, senão o tempo medido é o de escrever log.
+
+Sobre a saída:
+- sombra_<data_hora>.txt no diretório atual: resumo (achados e tempo de
+  cada motor) e as diferenças de cada arquivo.
+
+Histórico de alterações:
+- 2026 10 19 Versão 0.0.4: Implantação.
+"""
+
+import argparse
+import collections
+import datetime
+import importlib
+import logging
+import multiprocessing
+import sys
+import time
+
+import cache_texto
+import extracao
+import log_execucao
+import normalizacao
+import varredura
+
+log = logging.getLogger("detetive.sombra")
+
+# Diferenças de um arquivo.
+# - so_legado, so_novo: listas de (pagina, linha, norma, padrao)
+# - linha_trocada: lista de (pagina, norma, padrao, linha no legado, linha
+#   no novo)
+Diferencas = collections.namedtuple(
+    "Diferencas", ["so_legado", "so_novo", "linha_trocada"]
+)
+
+
+def _achados_dos_resultados(resultados):
+    """
+    :param resultados: Dicionário {norma: [(padrao, pagina, linha...)]}.
+    :return: Lista de (pagina, linha, norma, padrao).
+    """
+    return [(achado[1], achado[2], norma, achado[0])
+            for norma, achados in resultados.items() for achado in achados]
+
+
+def motor_legado(paginas):
+    """
+    A busca de referência: buscar_parafusos e buscar_parafusos_perdidos em
+    cada linha, sem memória, sem peneira de fora.
+
+    :param paginas: Lista com o texto de cada página.
+    :return: Lista de (pagina, linha, norma, padrao).
+    """
+    achados = []
+    for pagina, texto in enumerate(paginas, start=1):
+        if not texto:
+            continue
+        for linha_num, linha in enumerate(
+            normalizacao.normalizar(texto).texto.splitlines(), start=1
+        ):
+            resultados = varredura.buscar_parafusos(linha, pagina, linha_num)
+            perdidos = varredura.buscar_parafusos_perdidos(
+                linha, pagina, linha_num, resultados
+            )
+            achados.extend(_achados_dos_resultados(resultados))
+            achados.extend(_achados_dos_resultados(perdidos))
+    return achados
+
+
+def _motor_memo():
+    """
+    :return: Motor com a busca do programa (pesquisar_paginas), com a
+    memória de linhas valendo pra execução inteira, como no programa.
+    """
+    memo = varredura.MemoLinhas()
+
+    def motor(paginas):
+        resultados, _, _ = varredura.pesquisar_paginas(paginas, memo=memo)
+        return _achados_dos_resultados(resultados)
+
+    return motor
+
+
+def _motor_lote():
+    """
+    :return: Motor com a busca em lote do --rebusca, um arquivo por bloco.
+    """
+    import rebusca
+
+    regras = rebusca.Regras(varredura.normas, varredura.strings_especificas)
+
+    def motor(paginas):
+        achados, _ = rebusca.buscar_no_quadro(
+            rebusca.montar_quadro([(0, paginas)]), regras
+        )
+        return list(zip(achados["pagina"].tolist(),
+                        achados["linha"].tolist(),
+                        achados["norma"].tolist(),
+                        achados["padrao"].tolist()))
+
+    return motor
+
+
+# Nome -> função que monta o motor
+MOTORES = {
+    "memo": _motor_memo,
+    "lote": _motor_lote,
+}
+
+
+def carregar_motor(nome):
+    """
+    :param nome: Nome de um dos MOTORES ou "modulo:funcao".
+    :return: O motor (função que recebe as páginas).
+    :raises ValueError: Se não existe motor com esse nome.
+    """
+    if nome in MOTORES:
+        return MOTORES[nome]()
+    modulo, _, funcao = nome.partition(":")
+    if not funcao:
+        raise ValueError(f"Motor '{nome}' desconhecido, use um de "
+                         f"{', '.join(MOTORES)} ou modulo:funcao.")
+    try:
+        return getattr(importlib.import_module(modulo), funcao)
+    except (ImportError, AttributeError) as e:
+        raise ValueError(f"Motor '{nome}' não carregou: {e}") from e
+
+
+def comparar(legado, novo):
+    """
+    Compara os achados dos dois motores num arquivo.
+
+    :param legado: Achados do motor legado, (pagina, linha, norma, padrao).
+    :param novo: Achados do motor novo, no mesmo formato.
+    :return: Objeto Diferencas.
+    """
+    contagem_legado = collections.Counter(legado)
+    contagem_novo = collections.Counter(novo)
+    so_legado = sorted((contagem_legado - contagem_novo).elements())
+    so_novo = sorted((contagem_novo - contagem_legado).elements())
+
+    # Mesma página, norma e padrão dos dois lados: é a linha que mudou
+    sobras_novo = collections.defaultdict(list)
+    for pagina, linha, norma, padrao in so_novo:
+        sobras_novo[(pagina, norma, padrao)].append(linha)
+    linha_trocada = []
+    restou_legado = []
+    for pagina, linha, norma, padrao in so_legado:
+        linhas_novo = sobras_novo.get((pagina, norma, padrao))
+        if linhas_novo:
+            linha_trocada.append((pagina, norma, padrao, linha,
+                                  linhas_novo.pop(0)))
+        else:
+            restou_legado.append((pagina, linha, norma, padrao))
+    restou_novo = sorted(
+        (pagina, linha, norma, padrao)
+        for (pagina, norma, padrao), linhas in sobras_novo.items()
+        for linha in linhas
+    )
+    return Diferencas(restou_legado, restou_novo, linha_trocada)
+
+
+def _comparar_tempo(tempo_legado, tempo_novo):
+    """
+    :return: Texto com quantas vezes o motor novo é mais rápido ou mais
+    lento que o legado (vazio se não dá pra dizer).
+    """
+    if tempo_legado <= 0 or tempo_novo <= 0:
+        return ""
+    if tempo_novo <= tempo_legado:
+        return f" ({tempo_legado / tempo_novo:.1f}x mais rápido)"
+    return f" ({tempo_novo / tempo_legado:.1f}x mais lento)"
+
+
+class Sombra:
+    """
+    Roda os dois motores arquivo a arquivo e acumula tempos e diferenças.
+    """
+
+    def __init__(self, motor, nome_motor):
+        """
+        :param motor: O motor alternativo (ver carregar_motor).
+        :param nome_motor: Nome dele, pro relatório.
+        """
+        self.motor = motor
+        self.nome_motor = nome_motor
+        self.arquivos = 0
+        self.paginas = 0
+        self.achados_legado = 0
+        self.achados_novo = 0
+        self.tempo_legado = 0.0
+        self.tempo_novo = 0.0
+        # Arquivos com diferença: (nome, Diferencas)
+        self.diferentes = []
+        # Arquivos que o motor novo não conseguiu processar: (nome, erro)
+        self.falhas = []
+
+    def comparar_paginas(self, nome_arquivo, paginas):
+        """
+        Roda os dois motores nas páginas de um arquivo e compara.
+
+        :param nome_arquivo: Nome do arquivo, pro relatório.
+        :param paginas: Lista com o texto de cada página.
+        :return: Objeto Diferencas (None se o motor novo deu erro).
+        """
+        self.arquivos += 1
+        self.paginas += len(paginas)
+
+        inicio = time.perf_counter()
+        legado = motor_legado(paginas)
+        self.tempo_legado += time.perf_counter() - inicio
+        self.achados_legado += len(legado)
+
+        inicio = time.perf_counter()
+        try:
+            novo = list(self.motor(paginas))
+        except Exception as e:
+            log.debug("Motor %s falhou em %s", self.nome_motor, nome_arquivo,
+                      exc_info=True)
+            self.falhas.append((nome_arquivo, f"{type(e).__name__}: {e}"))
+            return None
+        finally:
+            self.tempo_novo += time.perf_counter() - inicio
+        self.achados_novo += len(novo)
+
+        diferencas = comparar(legado, novo)
+        if any(diferencas):
+            self.diferentes.append((nome_arquivo, diferencas))
+        return diferencas
+
+    def resumo(self):
+        """
+        Achados e tempo de cada motor e o total de diferenças.
+
+        :return: Lista de linhas de texto.
+        """
+        so_legado = sum(len(d.so_legado) for _, d in self.diferentes)
+        so_novo = sum(len(d.so_novo) for _, d in self.diferentes)
+        trocadas = sum(len(d.linha_trocada) for _, d in self.diferentes)
+        relatorio = [
+            f"Sombra: legado x {self.nome_motor}, {self.arquivos} "
+            f"arquivo(s), {self.paginas} página(s)",
+            f"  legado: {self.achados_legado} achado(s) em "
+            f"{self.tempo_legado:.2f} s",
+            f"  {self.nome_motor}: {self.achados_novo} achado(s) em "
+            f"{self.tempo_novo:.2f} s"
+            + _comparar_tempo(self.tempo_legado, self.tempo_novo),
+            f"  Diferenças: {so_legado} só no legado, {so_novo} só no "
+            f"{self.nome_motor}, {trocadas} com a linha trocada, em "
+            f"{len(self.diferentes)} arquivo(s); {len(self.falhas)} "
+            "arquivo(s) com erro no motor",
+        ]
+        if not self.diferentes and not self.falhas:
+            relatorio.append(f"  Nenhuma diferença: o {self.nome_motor} "
+                             "achou exatamente o que o legado achou.")
+        if so_legado:
+            relatorio.append(f"  ATENÇÃO: o {self.nome_motor} deixou passar "
+                             "achado do legado, não serve pra auditoria.")
+        if self.falhas:
+            relatorio.append(f"  ATENÇÃO: o {self.nome_motor} deu erro em "
+                             f"{len(self.falhas)} arquivo(s).")
+        return relatorio
+
+    def relatorio(self):
+        """
+        Resumo e diferenças de cada arquivo, pra gravar.
+
+        :return: Lista de linhas de texto.
+        """
+        relatorio = self.resumo()
+        for nome, erro in self.falhas:
+            relatorio.append("")
+            relatorio.append(f"Arquivo........: {nome}")
+            relatorio.append(f" - Erro no {self.nome_motor}: {erro}")
+        for nome, diferencas in self.diferentes:
+            relatorio.append("")
+            relatorio.append(f"Arquivo........: {nome}")
+            for pagina, linha, norma, padrao in diferencas.so_legado:
+                relatorio.append(
+                    f" - Só no legado: {varredura.formatar_norma(norma)} - "
+                    f"{padrao} (Página {pagina}, Linha {linha})"
+                )
+            for pagina, linha, norma, padrao in diferencas.so_novo:
+                relatorio.append(
+                    f" - Só no {self.nome_motor}: "
+                    f"{varredura.formatar_norma(norma)} - {padrao} "
+                    f"(Página {pagina}, Linha {linha})"
+                )
+            for (pagina, norma, padrao, linha_legado,
+                 linha_novo) in diferencas.linha_trocada:
+                relatorio.append(
+                    f" - Linha trocada: {varredura.formatar_norma(norma)} - "
+                    f"{padrao} (Página {pagina}, Linha {linha_legado} no "
+                    f"legado, {linha_novo} no {self.nome_motor})"
+                )
+        return relatorio
+
+
+def parse_arguments(argv=None):
+    """
+    Argumentos do modo sombra pela linha de comando.
+
+    - diretorio (str): Diretório com os PDFs
+    - motor (str): Motor alternativo, um dos MOTORES ou modulo:funcao
+    - recursivo (bool): Desce nos subdiretórios
+    - sem_cache, cache_dir, cache_limite_mb: cache de texto
+    - tempo_limite, memoria_limite_mb: limites da extração
+
+    Uso na linha de comando:
+    python sombra.py [--motor MOTOR] [-r] [--sem-cache] [--cache-dir DIR]
+                     [--cache-limite-mb MB] [--tempo-limite SEG]
+                     [--memoria-limite-mb MB] diretorio
+    """
+    parser = argparse.ArgumentParser(
+        description="Modo sombra: busca de sempre x motor alternativo"
+    )
+    parser.add_argument("diretorio", help="Diretório com os PDFs")
+    parser.add_argument(
+        "--motor", default="memo",
+        help=f"Motor alternativo: {', '.join(MOTORES)} ou modulo:funcao "
+             "(padrão memo)"
+    )
+    parser.add_argument("-r", "--recursivo", action="store_true",
+                        help="Processar também os subdiretórios")
+    parser.add_argument("--sem-cache", action="store_true",
+                        help="Não usar o cache de texto extraído")
+    parser.add_argument("--cache-dir", default=cache_texto.DIRETORIO_PADRAO,
+                        help="Diretório do cache de texto")
+    parser.add_argument("--cache-limite-mb", type=float,
+                        default=cache_texto.LIMITE_PADRAO_MB,
+                        help="Tamanho máximo do cache de texto (MB)")
+    parser.add_argument("--tempo-limite", type=float, default=900,
+                        help="Tempo máximo de extração por arquivo (s)")
+    parser.add_argument("--memoria-limite-mb", type=float, default=4096,
+                        help="Memória máxima da extração (MB)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_arguments(argv)
+    log_execucao.configurar_log(console=sys.stderr)
+    try:
+        motor = carregar_motor(args.motor)
+    except ValueError as e:
+        log.error("%s", e)
+        return 1
+    # Os achados de cada linha não vão pro log, só as diferenças no fim
+    logging.getLogger("detetive.varredura").setLevel(logging.WARNING)
+
+    cache = None
+    if not args.sem_cache:
+        cache = cache_texto.CacheTexto(args.cache_dir, args.cache_limite_mb)
+    extrator = None
+    if args.tempo_limite or args.memoria_limite_mb:
+        extrator = extracao.ExtratorIsolado(args.tempo_limite,
+                                            args.memoria_limite_mb)
+    sombra = Sombra(motor, args.motor)
+    arquivos = varredura.listar_pdfs(args.diretorio, args.recursivo)
+    try:
+        for numero, (nome, caminho) in enumerate(arquivos, start=1):
+            log.info("Sombra %s de %s: %s", numero, len(arquivos), nome)
+            try:
+                paginas = varredura.extrair_paginas(caminho, cache, extrator)
+            except Exception as e:
+                # Sem texto não tem o que comparar, fica de fora
+                log.warning("Sem texto de %s, fica de fora: %s", nome, e)
+                continue
+            diferencas = sombra.comparar_paginas(nome, paginas)
+            if diferencas is not None and any(diferencas):
+                log.warning("Diferença em %s: %s só no legado, %s só no %s, "
+                            "%s com a linha trocada.", nome,
+                            len(diferencas.so_legado),
+                            len(diferencas.so_novo), args.motor,
+                            len(diferencas.linha_trocada))
+    finally:
+        if extrator:
+            extrator.close()
+        if cache:
+            cache.close()
+
+    nome_relatorio = (
+        f"sombra_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+    )
+    with open(nome_relatorio, "w", encoding="utf-8") as arquivo:
+        for linha in sombra.relatorio():
+            arquivo.write(f"{linha}\n")
+    for linha in sombra.resumo():
+        print(linha)
+    print(f"Diferenças em {nome_relatorio}")
+    log_execucao.encerrar_log()
+    # Código de saída 2 se o motor novo perdeu achado, pra usar em script
+    so_legado = any(d.so_legado for _, d in sombra.diferentes)
+    return 2 if so_legado or sombra.falhas else 0
+
+
+######################## Main ################################
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -27,14 +27,18 @@ Histórico de alterações:
 - 2025 04 17 Versão 0.0.1: Implantação.
 - 2025 10 01 Versão 0.0.2: Inclui link para a especificacao da Petrobras.
 - 2025 10 22 Versão 0.0.3: Ajustes para montar pacote executavel.
+- 2026 10 19 Versão 0.0.4: Opção de gravar banco SQLite.
+- 2026 10 19 Versão 0.0.4: Opção de gravar planilha Excel.
+- 2026 10 19 Versão 0.0.4: Opção de pesquisar subpastas.
+- 2026 10 19 Versão 0.0.4: Opção de busca em tabelas (janela de linhas).
+- 2026 10 19 Versão 0.0.4: Ajuda sobre o filtro e a busca da janela de execução.
+- 2026 10 19 Versão 0.0.4: Opção de atualizar o índice de texto.
+- 2026 10 19 Versão 0.0.4: Ajuda do som atualizada (aviso em segundo plano).
+- 2026 10 19 Versão 0.0.4: Botão pra abrir a tabela de resultados de uma execução.
+- 2026 10 19 Versão 0.0.4: Interface carregada só no __main__ (processo de extração não carrega).
 """
 
-import splash_screen
-import procura_B8
-
-import tkinter 
-from tkinter import filedialog, messagebox, Button, Entry, Checkbutton
-
+import multiprocessing
 import os, shutil
 import sys
 
@@ -76,7 +80,7 @@ def main_window():
     global root  # grande solucao de contorno 
     root = tkinter.Tk()   
     root.title("Investigador de B8")
-    root.geometry("400x230")  
+    root.geometry("450x260")  
 
     # Adiciona o protocolo para interceptar o fechamento da janela, vai 
     # que o usuario clica no X ou manda um Alt + F4
@@ -102,6 +106,17 @@ def main_window():
                 args.append("-d")
             if sound_var.get():
                 args.append("-s")
+            if recursivo_var.get():
+                args.append("-r")
+            if tabela_var.get():
+                # Norma e padrão em até 3 linhas seguidas
+                args.extend(["-j", "3"])
+            if sqlite_var.get():
+                args.append("--sqlite")
+            if xlsx_var.get():
+                args.append("--xlsx")
+            if indice_var.get():
+                args.append("--indice")
             args_str = " ".join(args)
 
             # Desabilitar apenas widgets que suportam a propriedade 'state'
@@ -119,6 +134,16 @@ def main_window():
         else:
             messagebox.showwarning("Presta atenção!", "Selecione uma pasta com os pdfs a serem analisados.")
 
+    def open_results():
+        """ Abre a tabela de resultados de uma execução já feita. """
+        caminho = filedialog.askopenfilename(
+            title="Resultado de uma execução",
+            filetypes=[("Resultados", "resultado_*.jsonl"),
+                       ("Todos", "*.*")],
+        )
+        if caminho:
+            grade_resultados.abrir_grade(root, caminho)
+
     # Libera a memoria e recursos
     def exit_program():
         root.destroy()
@@ -136,14 +161,32 @@ def main_window():
 
 Esse programa executa uma busca em todos os arquivos 'pdf' de um diretório à procura de itens proibidos.
 
-Uma janela para acompanhamento da execução é aberta e caso seja fechada o programa é encerrado. Evite rolar as paginas 
-porque o negócio é sensivel, pode ficar sem responder, mas nao ta travado nao, depois ele volta!
+Uma janela para acompanhamento da execução é aberta e caso seja fechada o programa é encerrado. Ela mostra só as
+últimas 5000 linhas, o histórico completo fica no arquivo de log. Marcando 'Só achados e erros' a janela mostra só
+o que interessa, e o campo 'Buscar no log' procura no arquivo de log inteiro (apague o texto pra voltar ao andamento).
 
-Ao final do processamento sao gerados 3 arquivos (log, texto e tabela), analise-os com sabedoria.
+Se um pdf travar a leitura (mais de 15 minutos ou mais de 4 GB de memória) ele é abandonado e aparece na
+tabela como TIMEOUT ou OOM, com as páginas que deu pra ler. Esse tem que ser conferido na mão.
 
-Pode-se optar por ligar debug e som. 
-    - Checando em Debug incluira informações adicionais durante o processamento.
-    - Habilitar som faz com que um bip seja emitido a cada item proibido encontrado.
+Ao final do processamento sao gerados 3 arquivos (log, texto e tabela), analise-os com sabedoria.
+Tambem é gerado um 'resultado_<data_hora>.jsonl', um registro por arquivo e por achado, pra quem quiser
+processar os resultados em outras ferramentas.
+No fim da execução o botão 'Ver resultados' abre os achados numa tabela: clique no título da coluna pra
+ordenar, digite pra filtrar por arquivo, norma ou padrão, ou marque 'Só SIM' e 'Só não pesquisáveis'.
+O botão 'Resultados...' aqui da tela principal abre a tabela de uma execução antiga (o '.jsonl' dela).
+
+Pode-se optar por ligar debug, som, subpastas, tabelas, SQLite, Excel e índice. 
+    - Checando em Debug as informações adicionais do processamento sao gravadas em 'log_debug_<data_hora>.txt'.
+    - Habilitar som faz a janela piscar (e apitar, no Windows) quando aparece item proibido, sem parar a
+      busca. Um monte de achados seguidos vira um aviso só, no máximo um a cada 2 segundos.
+    - Checando em Subpastas os diretórios dentro da pasta escolhida tambem sao pesquisados.
+      Cópias idênticas do mesmo pdf sao analisadas uma vez só e o relatório aponta pro original.
+    - Checando em Tabelas a norma e o padrão sao procurados em até 3 linhas seguidas, pra pegar tabela
+      com "ASTM A193" no cabeçalho e o "B8" na linha de baixo. O relatório informa as duas linhas.
+    - Checando em SQLite os resultados tambem sao gravados num banco 'resultado_<data_hora>.sqlite'.
+    - Checando em Excel é gerada uma planilha 'resultado_<data_hora>.xlsx', melhor que abrir o csv no Excel.
+    - Checando em Índice o texto de cada pdf entra no índice de texto, pra depois perguntar "onde aparece
+      A320 L7M?" sem processar tudo de novo: python indice.py "A320 L7M"
        
 As tipagens abaixo, por serem suscetíveis à corrosão sob tensão não são permitidos:
 
@@ -173,6 +216,11 @@ ou download direto aqui:
     folder_var = tkinter.StringVar()
     debug_var = tkinter.BooleanVar()
     sound_var = tkinter.BooleanVar()
+    recursivo_var = tkinter.BooleanVar()
+    tabela_var = tkinter.BooleanVar()
+    sqlite_var = tkinter.BooleanVar()
+    xlsx_var = tkinter.BooleanVar()
+    indice_var = tkinter.BooleanVar()
 
     # Frame principal
     main_frame = tkinter.Frame(root)
@@ -198,17 +246,33 @@ ou download direto aqui:
 
     # Checkboxes
     check_frame = tkinter.Frame(main_frame)
-    check_frame.pack(fill='x', pady=10)
+    check_frame.pack(fill='x', pady=(10, 0))
     debug_check = tkinter.Checkbutton(check_frame, text="Debug", variable=debug_var)
     debug_check.pack(side='left', expand=True)
     sound_check = tkinter.Checkbutton(check_frame, text="Som", variable=sound_var)
     sound_check.pack(side='left', expand=True)
+    recursivo_check = tkinter.Checkbutton(check_frame, text="Subpastas", variable=recursivo_var)
+    recursivo_check.pack(side='left', expand=True)
+    tabela_check = tkinter.Checkbutton(check_frame, text="Tabelas", variable=tabela_var)
+    tabela_check.pack(side='left', expand=True)
+
+    # Checkboxes das saídas adicionais
+    saidas_frame = tkinter.Frame(main_frame)
+    saidas_frame.pack(fill='x', pady=(0, 10))
+    sqlite_check = tkinter.Checkbutton(saidas_frame, text="SQLite", variable=sqlite_var)
+    sqlite_check.pack(side='left', expand=True)
+    xlsx_check = tkinter.Checkbutton(saidas_frame, text="Excel", variable=xlsx_var)
+    xlsx_check.pack(side='left', expand=True)
+    indice_check = tkinter.Checkbutton(saidas_frame, text="Índice", variable=indice_var)
+    indice_check.pack(side='left', expand=True)
 
     # Botão Processar centralizado
     process_button_frame = tkinter.Frame(main_frame)
     process_button_frame.pack(pady=(5, 0))  # Reduzi o espaçamento acima para subir o botão
     continue_button = tkinter.Button(process_button_frame, text="Processar", command=continue_program)
-    continue_button.pack()
+    continue_button.pack(side='left')
+    results_button = tkinter.Button(process_button_frame, text="Resultados...", command=open_results)
+    results_button.pack(side='left', padx=(10, 0))
 
     # Botão Sair alinhado totalmente à direita
     exit_button_frame = tkinter.Frame(main_frame)
@@ -223,6 +287,19 @@ ou download direto aqui:
     root.mainloop()
 
 if __name__ == "__main__":
+    # Precisa pro executavel do PyInstaller conseguir criar o processo de
+    # extração (ver extracao.py)
+    multiprocessing.freeze_support()
+
+    # A interface e o resto só carregam aqui: o processo de extração (spawn)
+    # roda este módulo de novo como __mp_main__ e não passa por este if
+    import splash_screen
+    import procura_B8
+    import grade_resultados
+
+    import tkinter
+    from tkinter import filedialog, messagebox, Button, Entry, Checkbutton
+
     # Mostra logo do IEEI por 3 segundos antes de abrir a janela principal.
     splash_screen.show_splash(duration=3000)
 
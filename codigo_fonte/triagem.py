@@ -0,0 +1,222 @@
+"""
+triagem.py
+
+Descrição:
+Triagem rápida dos PDFs antes da extração. Até aqui só se descobria que um
+documento era digitalizado (só imagem) depois de chamar o extract_text em
+todas as páginas e não vir nada, e que um arquivo estava quebrado ou com
+senha depois de abrir e tentar extrair tudo.
+
+A triagem lê só o trailer, a tabela xref e os recursos de cada página
+(tem fonte? só imagem? nada?), sem tocar no conteúdo das páginas, que é onde
+o PyPDF2 gasta o tempo. Com isso:
+- página sem fonte nenhuma não tem texto pra extrair: a extração pula;
+- página só com imagem vai pra lista de OCR ou validação manual;
+- arquivo ilegível ou com senha falha na hora, sem ocupar extrator;
+- o progresso e a previsão de término saem por página, não por arquivo.
+
+Orientações:
+- classificar(caminho, dados) devolve uma Triagem. Na dúvida (recurso que
+  não dá pra ler, referência quebrada) a página é tratada como se tivesse
+  fonte e a extração decide, a triagem nunca esconde texto.
+- A triagem roda na etapa de leitura da esteira (ver esteira.py), sobre os
+  bytes que ela já leu: o arquivo não é aberto duas vezes (em rede lenta
+  faz diferença) e a triagem de um arquivo anda junto com a extração e a
+  busca dos anteriores.
+- A extração recebe as páginas a pular (ver extracao.iterar_paginas), que
+  vêm como "", igual ao extract_text de uma página sem fonte.
+- Progresso conta as páginas feitas e estima quanto falta pela média até
+  ali. O total cresce à medida que a esteira faz a triagem dos arquivos
+  (os que ainda não passaram entram pela média de páginas por arquivo).
+
+Sobre a saída:
+- Não gera arquivos.
+
+Histórico de alterações:
+- 2026 10 19 Versão 0.0.4: Implantação.
+- 2026 10 19 Versão 0.0.4: Triagem dos bytes já lidos, na esteira.
+"""
+
+import collections
+import io
+import logging
+import time
+
+log = logging.getLogger("detetive.triagem")
+
+# Até quantos níveis de formulário (XObject /Form dentro de outro) procurar
+# fonte
+PROFUNDIDADE_FORMULARIOS = 8
+
+# Resultado da triagem de um arquivo.
+# - total_paginas: páginas do PDF
+# - sem_fonte: índices (a partir de 0) das páginas sem fonte nenhuma, onde
+#   não tem texto pra extrair
+# - so_imagem: índices das páginas sem fonte que têm imagem (digitalizadas,
+#   pra OCR ou validação manual)
+# - criptografado: se o PDF é criptografado (sem senha de abertura, senão
+#   vem com erro)
+# - erro: motivo, se o arquivo não dá pra ler; None se deu
+# - tempo_s: tempo gasto na triagem
+Triagem = collections.namedtuple(
+    "Triagem",
+    ["total_paginas", "sem_fonte", "so_imagem", "criptografado", "erro",
+     "tempo_s"],
+)
+
+
+class ArquivoIlegivel(Exception):
+    """
+    A triagem não conseguiu ler o arquivo (quebrado, com senha...).
+    """
+
+
+def _objeto(valor):
+    return valor.get_object() if hasattr(valor, "get_object") else valor
+
+
+def _conteudo_recursos(recursos, profundidade=0):
+    """
+    Procura fonte e imagem nos recursos de uma página (e nos formulários
+    que ela usa).
+
+    :param recursos: Dicionário /Resources (ou None).
+    :param profundidade: Nível de formulário, pra não rodar pra sempre.
+    :return: 'Tuple' (tem fonte, tem imagem).
+    """
+    recursos = _objeto(recursos)
+    if not recursos:
+        return False, False
+    if _objeto(recursos.get("/Font")):
+        return True, False
+    tem_imagem = False
+    xobjetos = _objeto(recursos.get("/XObject")) or {}
+    for nome in xobjetos:
+        xobjeto = _objeto(xobjetos[nome])
+        subtipo = xobjeto.get("/Subtype")
+        if subtipo == "/Image":
+            tem_imagem = True
+        elif subtipo == "/Form":
+            if profundidade >= PROFUNDIDADE_FORMULARIOS:
+                # Fundo demais, deixa a extração ver
+                return True, tem_imagem
+            fonte, imagem = _conteudo_recursos(xobjeto.get("/Resources"),
+                                               profundidade + 1)
+            if fonte:
+                return True, tem_imagem
+            tem_imagem = tem_imagem or imagem
+    return False, tem_imagem
+
+
+def classificar(caminho_completo, dados=None):
+    """
+    Faz a triagem de um PDF, lendo só a estrutura.
+
+    :param caminho_completo: Caminho do arquivo PDF.
+    :param dados: Conteúdo do arquivo, se já foi lido (esteira.py), ou None
+    pra ler do caminho.
+    :return: Objeto Triagem.
+    """
+    import PyPDF2
+
+    inicio = time.perf_counter()
+    sem_fonte = []
+    so_imagem = []
+    criptografado = False
+    try:
+        with (io.BytesIO(dados) if dados is not None
+              else open(caminho_completo, "rb")) as arquivo:
+            leitor = PyPDF2.PdfReader(arquivo)
+            criptografado = leitor.is_encrypted
+            # O PyPDF2 já tenta a senha vazia (PDF só com restrição de
+            # impressão, cópia...). Não abriu, precisa de senha mesmo.
+            if (criptografado and leitor.decrypt("")
+                    == PyPDF2.PasswordType.NOT_DECRYPTED):
+                raise ArquivoIlegivel("Protegido por senha.")
+            total_paginas = len(leitor.pages)
+            for numero, pagina in enumerate(leitor.pages):
+                try:
+                    fonte, imagem = _conteudo_recursos(
+                        pagina.get("/Resources")
+                    )
+                except Exception:
+                    # Na dúvida a extração decide
+                    log.debug("Recursos da página %s ilegíveis.", numero + 1,
+                              exc_info=True)
+                    continue
+                if not fonte:
+                    sem_fonte.append(numero)
+                    if imagem:
+                        so_imagem.append(numero)
+    except ArquivoIlegivel as e:
+        return Triagem(0, (), (), criptografado, str(e),
+                       time.perf_counter() - inicio)
+    except Exception as e:
+        # Mesma mensagem que a extração daria
+        log.debug("Triagem de %s falhou.", caminho_completo, exc_info=True)
+        return Triagem(0, (), (), criptografado, f"{type(e).__name__}: {e}",
+                       time.perf_counter() - inicio)
+    return Triagem(total_paginas, tuple(sem_fonte), tuple(so_imagem),
+                   criptografado, None, time.perf_counter() - inicio)
+
+
+def resumo(triagens):
+    """
+    Resumo da triagem de vários arquivos, pra exibir.
+
+    :param triagens: Dicionário caminho -> Triagem.
+    :return: Lista de linhas de texto.
+    """
+    lidas = [t for t in triagens.values() if t.erro is None]
+    return [
+        f"Triagem: {len(triagens)} arquivo(s) em "
+        f"{sum(t.tempo_s for t in triagens.values()):.1f} s, "
+        f"{sum(t.total_paginas for t in lidas)} páginas, "
+        f"{sum(len(t.sem_fonte) for t in lidas)} sem texto pra extrair "
+        f"({sum(len(t.so_imagem) for t in lidas)} só com imagem), "
+        f"{len(triagens) - len(lidas)} arquivo(s) ilegível(is)",
+    ]
+
+
+def _formatar_tempo(segundos):
+    minutos, segundos = divmod(int(segundos), 60)
+    horas, minutos = divmod(minutos, 60)
+    if horas:
+        return f"{horas}h{minutos:02d}min"
+    return f"{minutos}min{segundos:02d}s"
+
+
+class Progresso:
+    """
+    Progresso da varredura por página, com previsão de término.
+    """
+
+    def __init__(self, total_paginas):
+        """
+        :param total_paginas: Páginas de todos os arquivos a processar (o
+        que se sabe até agora, ver avancar).
+        """
+        self.total_paginas = total_paginas
+        self.feitas = 0
+        self._inicio = time.monotonic()
+
+    def avancar(self, paginas, total_paginas=None):
+        """
+        Mais um arquivo pronto.
+
+        :param paginas: Páginas do arquivo.
+        :param total_paginas: Nova previsão do total de páginas, se mudou
+        (a triagem anda junto com a varredura).
+        :return: Linha de texto com o progresso.
+        """
+        if total_paginas is not None:
+            self.total_paginas = total_paginas
+        self.feitas += paginas
+        total = max(self.total_paginas, self.feitas, 1)
+        decorrido = time.monotonic() - self._inicio
+        linha = (f"Progresso: {self.feitas} de {total} páginas "
+                 f"({100 * self.feitas / total:.0f}%)")
+        if self.feitas and self.feitas < total:
+            restante = decorrido / self.feitas * (total - self.feitas)
+            linha += f", termina em ~{_formatar_tempo(restante)}"
+        return linha
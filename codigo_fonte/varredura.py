@@ -0,0 +1,1007 @@
+"""
+varredura.py
+
+Descrição:
+O miolo da busca do Detetive B8, sem nada de interface gráfica: as regras
+(normas e padrões proibidos), a busca no texto das páginas, a extração com
+cache e a análise de um PDF inteiro.
+Antes isso morava no Procura_B8.py, junto com a janela do Tk, o winsound e
+as variáveis globais do main, e quem quisesse usar a busca (modo serviço,
+outros sistemas) tinha que carregar a interface junto.
+
+Orientações:
+- Nada aqui depende de variável global ajustada pelo main. O que muda de
+  uma execução pra outra (janela, cache, extrator, índice, aviso a cada
+  achado) entra como parâmetro.
+- Pode ser usado por várias threads ao mesmo tempo: as regras são só
+  leitura, cada análise tem as suas variáveis. Cache e índice têm trava
+  própria; extrator é um por thread.
+- Linha repetida (carimbo, notas gerais) é buscada uma vez só por
+  execução se quem chama passar uma MemoLinhas (memo=...).
+- As regras ficam num Perfil. O de sempre (PERFIL_PADRAO) é a lista de
+  parafusos; outras especificações vêm de JSON (carregar_perfil) e
+  pesquisar_perfis roda todas no mesmo texto, extraído uma vez só.
+- O Procura_B8.py (janela), o servico.py e o detetive.py (API pra outros
+  programas) usam daqui.
+
+Sobre a saída:
+- Não gera arquivos.
+
+Histórico de alterações:
+- 2026 10 19 Versão 0.0.4: Implantação, separado do Procura_B8.py.
+- 2026 10 19 Versão 0.0.4: Memória (LRU) das linhas repetidas, MemoLinhas.
+- 2026 10 19 Versão 0.0.4: analisar_extraido e extração de conteúdo já lido (esteira).
+- 2026 10 19 Versão 0.0.4: Extração pulando as páginas sem fonte (triagem).
+- 2026 10 19 Versão 0.0.4: Perfis de regras (várias especificações numa passada).
+- 2026 10 19 Versão 0.0.4: Padrão "B8 " virou "B8" (relatório e CSV mostram "B8").
+"""
+
+import collections
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+
+import duplicados
+import extracao
+import metricas
+import normalizacao
+
+# Log do módulo (ver log_execucao.py). Debug só vai pro arquivo log_debug.
+log = logging.getLogger("detetive.varredura")
+
+# Memória máxima da memória de linhas (MemoLinhas), em MB
+LIMITE_MEMO_MB = 32
+# Custo aproximado de cada entrada além do texto (nó do dicionário ordenado,
+# tuplas do resultado) e de cada par (norma, padrão) guardado
+CUSTO_ENTRADA_MEMO = 200
+CUSTO_PAR_MEMO = 64
+
+# Cada item proibido encontrado: o padrão, a página e a linha. Quando a norma
+# está numa linha vizinha (busca em janela, tabelas), linha_norma diz onde.
+# Continua sendo uma tupla, quem usa padrao[0], padrao[1], padrao[2] segue
+# funcionando.
+Achado = collections.namedtuple(
+    "Achado", ["padrao", "pagina", "linha", "linha_norma"], defaults=[None]
+)
+
+#
+#  Especificacao "REQUIREMENTS FOR BOLTING MATERIALS" disponivel em:
+#
+#  https://canalfornecedor.petrobras.com.br/en/regras-de-contratacao/catalogo-de-padronizacao
+#  
+#  FPSO -> Own EEP - Basic Project All Electric 225kbpd / Own EEP - Basic Project for Revitalization -> Static Equipment 
+#
+#  Download direto aqui:
+#  https://webserver-petrobrasecossistemaint-prod1.lfr.cloud/documents/10591749/32979894/I-ET-3010.00-1200-251-P4X-001_F.pdf?download=true
+#
+
+# Definição dos materiais proibidos => norma:padrao
+normas = {
+    "A193": ["B8", "B8N", "B8T", "B8LN", "B8SH"],
+    "A453": ["660"],
+    "A564": ["630", "631", "635", "17-4PH", "17-7PH", "17-6PH"],
+    "F593": ["F593A", "F593B", "F593C", "F593D", "1", "3", "4",
+              "5", "6", "7"],
+    "AISI": ["303", "304", "321"],
+    "3506": ["A1", "A2", "A3", "C1", "C3", "C4", "F1"],
+    "4017": ["A1", "A2", "A3"],
+    "A540": ["630", "631", "635"],
+}
+# Pra dar um confere => norma nem sera usada, só o 'padrao'
+strings_especificas = {
+    "A193": ["B8", "B8N", "B8T", "B8LN", "B8SH"],
+    "A564": ["17-4PH", "17-7PH", "17-6PH", "S17400", "S17600", "S17700"],
+    "F593": ["F593A", "F593B", "F593C", "F593D"],
+}
+
+
+# As regras compiladas uma vez só, rodam no texto canônico
+def _compilar(codigo):
+    return re.compile(normalizacao.regra_canonica(codigo))
+
+
+def _peneira(codigos):
+    """
+    Uma busca só pra descartar a linha que não tem nada (quase todas).
+
+    :param codigos: Códigos (normas, padrões) que interessam.
+    :return: Expressão regular que acha qualquer um deles. Sem código
+    nenhum, não acha nada.
+    """
+    codigos = list(codigos)
+    if not codigos:
+        return re.compile("(?!)")
+    return re.compile(
+        "|".join(normalizacao.regra_canonica(codigo) for codigo in codigos)
+    )
+
+
+class Perfil:
+    """
+    Uma lista de materiais proibidos (normas, padrões e a repescagem) com as
+    regras compiladas. O padrão é a lista de parafusos da
+    I-ET-3010.00-1200-251-P4X-001 (PERFIL_PADRAO, os dicionários 'normas' e
+    'strings_especificas' acima); outras especificações (juntas, materiais
+    de um cliente) vêm de arquivo JSON, ver carregar_perfil.
+
+    Só leitura depois de criado, pode ser usado por várias threads.
+    """
+
+    def __init__(self, nome, normas, strings_especificas=None, padrao=False):
+        """
+        :param nome: Nome do perfil, vai pro log, relatório e saídas.
+        :param normas: Dicionário {norma: [padrao, ...]}.
+        :param strings_especificas: Dicionário {norma: [string, ...]} da
+        repescagem, ou None.
+        :param padrao: Se True é o perfil de sempre, que sai no log sem a
+        marca do perfil.
+        """
+        self.nome = nome
+        self.normas = {norma: list(padroes)
+                       for norma, padroes in normas.items()}
+        self.strings_especificas = {
+            norma: list(strings)
+            for norma, strings in (strings_especificas or {}).items()
+        }
+        self.regras_normas = {
+            norma: _compilar(norma) for norma in self.normas
+        }
+        self.regras_padroes = {
+            padrao: _compilar(padrao)
+            for padroes in self.normas.values() for padrao in padroes
+        }
+        self.regras_especificas = [
+            (norma, string, _compilar(string))
+            for norma, strings in self.strings_especificas.items()
+            for string in strings
+        ]
+        # Pra cada padrão, as normas que proíbem ele (busca em janela)
+        self.normas_do_padrao = {}
+        for norma, padroes in self.normas.items():
+            for padrao in padroes:
+                self.normas_do_padrao.setdefault(padrao, []).append(norma)
+        self.peneira_normas = _peneira(self.normas)
+        self.peneira_especificas = _peneira(
+            string for _, string, _ in self.regras_especificas
+        )
+        # O perfil de sempre não leva marca no log nem na memória de
+        # linhas, fica tudo igual a quando só existia ele
+        self.rotulo = "" if padrao else f"[{nome}] "
+        self.chave_memo = "" if padrao else f"{nome}\0"
+
+    def __repr__(self):
+        return f"Perfil({self.nome!r})"
+
+
+PERFIL_PADRAO = Perfil("parafusos", normas, strings_especificas, padrao=True)
+
+
+def carregar_perfil(caminho):
+    """
+    Lê um perfil de um arquivo JSON:
+
+        {"nome": "juntas_cliente",
+         "normas": {"B16.20": ["SPW", "RTJ"]},
+         "strings_especificas": {"B16.20": ["SPW-CG"]}}
+
+    'strings_especificas' (a repescagem) é opcional. Os códigos são escritos
+    como no documento, a forma canônica (traço, espaço, maiúsculas) é
+    resolvida aqui.
+
+    :param caminho: Caminho do arquivo JSON.
+    :return: Objeto Perfil.
+    :raises ValueError: Se o arquivo não tem o formato de um perfil.
+    """
+    with open(caminho, encoding="utf-8") as arquivo:
+        dados = json.load(arquivo)
+    if not isinstance(dados, dict):
+        raise ValueError(f"{caminho}: o perfil tem que ser um objeto JSON.")
+    nome = dados.get("nome") or os.path.splitext(
+        os.path.basename(caminho))[0]
+    listas = {}
+    for campo in ("normas", "strings_especificas"):
+        valor = dados.get(campo, {})
+        if not isinstance(valor, dict) or not all(
+            isinstance(codigos, list)
+            and all(isinstance(codigo, str) and codigo.strip()
+                    for codigo in codigos)
+            for codigos in valor.values()
+        ):
+            raise ValueError(f"{caminho}: '{campo}' tem que ser "
+                             "{norma: [código, ...]}.")
+        listas[campo] = valor
+    if not listas["normas"] and not listas["strings_especificas"]:
+        raise ValueError(f"{caminho}: perfil sem norma nenhuma.")
+    return Perfil(str(nome), listas["normas"],
+                  listas["strings_especificas"])
+
+
+def montar_perfis(caminhos):
+    """
+    Lista de perfis de uma varredura: o padrão (parafusos) e os dos
+    arquivos.
+
+    :param caminhos: Caminhos dos arquivos JSON dos perfis extras.
+    :return: Lista de objetos Perfil, o padrão primeiro.
+    :raises ValueError: Se um arquivo não é perfil ou se dois perfis têm o
+    mesmo nome.
+    """
+    perfis = [PERFIL_PADRAO]
+    for caminho in caminhos:
+        perfil = carregar_perfil(caminho)
+        if any(perfil.nome == outro.nome for outro in perfis):
+            raise ValueError(f"{caminho}: já tem um perfil chamado "
+                             f"'{perfil.nome}'.")
+        perfis.append(perfil)
+    return perfis
+
+
+def formatar_norma(norma):
+    """
+    Devolve a norma do jeito que vai pros relatórios, prefixando "ASTM" nas
+    normas da ASTM.
+
+    :param norma: A norma como está no dicionário 'normas'.
+    :return: A norma formatada.
+    """
+    if norma in ["A193", "A453", "A564", "F593", "A540"]:
+        return f"ASTM {norma}"
+    # Caso contrário, usa a norma como está
+    return norma
+
+
+def formatar_linha_norma(achado):
+    """
+    Complemento do relatório pra achado com a norma em outra linha.
+
+    :param achado: Tupla (padrao, pagina, linha[, linha_norma]).
+    :return: ", norma na linha N" ou "" se a norma está na mesma linha.
+    """
+    if len(achado) > 3 and achado[3]:
+        return f", norma na linha {achado[3]}"
+    return ""
+
+
+def buscar_parafusos(texto, page_num, linha_num, perfil=PERFIL_PADRAO):
+    """
+    Busca por normas e padrões específicos em um texto e retorna os resultados 
+    encontrados.
+
+    :param texto: O texto onde a busca será realizada, na forma canônica
+    (ver normalizacao.py).
+    :param page_num: O número da página onde o texto está localizado.
+    :param linha_num: O número da linha onde o texto está localizado.
+    :param perfil: Objeto Perfil com as regras (padrão: a lista de
+    parafusos).
+    :return: Um dicionário com as normas encontradas e seus respectivos
+      padrões, páginas e linhas.
+    """
+    # Dicionário para armazenar os resultados da busca
+    resultados = {}
+    # Nem sinal de norma, nem perde tempo
+    if not perfil.peneira_normas.search(texto):
+        return resultados
+
+    # Roda tudo, tem que procurar se nao nao acha!
+    for norma, padroes in perfil.normas.items():
+        # Verifica se a norma está presente no texto
+        if perfil.regras_normas[norma].search(texto):
+            for padrao in padroes:
+                # Verifica se o padrão está presente no texto
+                if perfil.regras_padroes[padrao].search(texto):
+                    # Se não estiver nos resultados, adiciona
+                    if norma not in resultados:
+                        resultados[norma] = []
+                    # Adiciona o padrão, número da página e número da linha
+                    #  aos resultados
+                    resultados[norma].append(Achado(padrao, page_num,
+                                                    linha_num))
+    return resultados  # Retorna o dicionário de resultados
+
+
+def buscar_parafusos_janela(linhas, page_num, janela, resultados_existentes,
+                            perfil=PERFIL_PADRAO):
+    """
+    Busca combinações norma + padrão em linhas vizinhas da mesma página.
+    Em tabela de parafusos é comum "ASTM A193" estar no cabeçalho ou na
+    linha de cima e o "B8" na linha de baixo, e a busca linha a linha não
+    pega.
+
+    A página é percorrida uma vez só. Pra cada linha anota em que linha cada
+    norma e cada padrão apareceu por último; quando aparece uma norma ou um
+    padrão, basta olhar se o par dele apareceu há menos de 'janela' linhas.
+    Combinações na mesma linha ficam com a buscar_parafusos.
+
+    :param linhas: Lista com as linhas da página, na forma canônica.
+    :param page_num: O número da página.
+    :param janela: Quantas linhas seguidas formam a janela (2 = a linha e a
+    de cima).
+    :param resultados_existentes: Dicionário com resultados já existentes
+    para evitar duplicatas.
+    :param perfil: Objeto Perfil com as regras.
+    :return: Um dicionário com as normas encontradas e seus respectivos
+    achados, com a linha do padrão e a linha da norma.
+    """
+    resultados = {}
+    # O que ja foi achado nessa pagina, pra nao repetir
+    ja_achados = {
+        (norma, achado[0], achado[2])
+        for norma, achados in resultados_existentes.items()
+        for achado in achados
+        if achado[1] == page_num
+    }
+    # Pra cada padrão, as normas que proíbem ele
+    normas_do_padrao = perfil.normas_do_padrao
+
+    # Última linha em que cada norma e cada padrão apareceu
+    ultima_norma = {}
+    ultimo_padrao = {}
+
+    for linha_num, linha in enumerate(linhas, start=1):
+        # Cada linha é pesquisada uma vez só
+        normas_linha = [
+            norma for norma in perfil.normas
+            if perfil.regras_normas[norma].search(linha)
+        ]
+        padroes_linha = [
+            padrao for padrao in normas_do_padrao
+            if perfil.regras_padroes[padrao].search(linha)
+        ]
+
+        # (norma, padrao, linha do padrao, linha da norma)
+        pares = []
+        # Norma nessa linha, padrão numa linha de cima
+        for norma in normas_linha:
+            for padrao in perfil.normas[norma]:
+                linha_padrao = ultimo_padrao.get(padrao)
+                if linha_padrao and linha_num - linha_padrao < janela:
+                    pares.append((norma, padrao, linha_padrao, linha_num))
+        # Padrão nessa linha, norma numa linha de cima
+        for padrao in padroes_linha:
+            for norma in normas_do_padrao[padrao]:
+                linha_norma = ultima_norma.get(norma)
+                if linha_norma and linha_num - linha_norma < janela:
+                    pares.append((norma, padrao, linha_num, linha_norma))
+
+        for norma, padrao, linha_padrao, linha_norma in pares:
+            if (norma, padrao, linha_padrao) in ja_achados:
+                continue
+            ja_achados.add((norma, padrao, linha_padrao))
+            if norma not in resultados:
+                resultados[norma] = []
+            resultados[norma].append(
+                Achado(padrao, page_num, linha_padrao, linha_norma)
+            )
+            log.info(
+                "%s**Achei um proibido entre linhas!** Página %s, Linha %s: "
+                "%s (linha %s) - %s", perfil.rotulo,
+                page_num, linha_padrao, norma, linha_norma, padrao,
+            )
+
+        # Só agora atualiza, a linha corrente não pode parear com ela mesma
+        for norma in normas_linha:
+            ultima_norma[norma] = linha_num
+        for padrao in padroes_linha:
+            ultimo_padrao[padrao] = linha_num
+
+    return resultados
+
+
+def _logar_perdido(norma, string, page_num, linha_num, texto, rotulo=""):
+    log.info(
+        "%s** Localizado proibido !** Norma: %s, Padrão: %s, "
+        "Página: %s, Linha: %s", rotulo, norma, string, page_num, linha_num,
+    )
+    log.info("**Conteudo da linha** %s", texto)
+
+
+def buscar_parafusos_perdidos(texto, page_num, linha_num, 
+                              resultados_existentes, texto_original=None,
+                              perfil=PERFIL_PADRAO):
+    """
+    Busca por strings específicas em um texto e retorna os resultados 
+    encontrados, evitando duplicatas.
+    Deve ser sempre executada após a execucao da buscar_parafusos
+    :param texto: O texto onde a busca será realizada, na forma canônica
+    (ver normalizacao.py).
+    :param page_num: O número da página onde o texto está localizado.
+    :param linha_num: O número da linha onde o texto está localizado.
+    :param resultados_existentes: Dicionário com resultados já existentes 
+    para evitar duplicatas.
+    :param texto_original: A linha como estava no PDF, pro log. None usa o
+    próprio texto.
+    :param perfil: Objeto Perfil com as regras.
+    :return: Um dicionário com as normas encontradas e suas respectivas 
+    strings, páginas e linhas.
+    """
+    # Dicionário para armazenar os resultados da busca
+    resultados = {}
+    # Conjunto para rastrear combinações já adicionadas
+    combinacoes_ja_adicionadas = set()
+    # Nada parecido na linha, tchau
+    if not perfil.peneira_especificas.search(texto):
+        return resultados
+
+    for norma, string, regra in perfil.regras_especificas:
+        # A regra já aceita espaço ou traço antes do sufixo ("B8 N", ver
+        # normalizacao.regra_canonica)
+        # Verifica se a string está presente no texto
+        if regra.search(texto):
+            duplicado = False
+            # Verifica se a string já foi encontrada nos resultados 
+            # existentes
+            for norma_existente, padroes in resultados_existentes.items():
+                for padrao in padroes:
+                    if (
+                        string == padrao[0]
+                        and page_num == padrao[1]
+                        and linha_num == padrao[2]
+                    ):
+                        log.debug(
+                            "Opa, aqui eu já tinha achado... Padrão: %s,"
+                            " Página: %s, Linha: %s",
+                            padrao[0], padrao[1], padrao[2],
+                        )
+                        duplicado = True
+                        break
+                if duplicado:
+                    break
+            # Se a string não for duplicada, adiciona aos resultados
+            if not duplicado:
+                if norma not in resultados:
+                    resultados[norma] = []
+                resultados[norma].append(Achado(string, page_num,
+                                                linha_num))
+                combinacoes_ja_adicionadas.add((string, page_num, 
+                                                linha_num))
+                _logar_perdido(norma, string, page_num, linha_num,
+                               texto_original or texto, perfil.rotulo)
+    return resultados  # Retorna o dicionário de resultados
+
+
+def listar_pdfs(diretorio, recursivo=False):
+    """
+    Lista os arquivos PDF do diretório.
+
+    :param diretorio: Caminho do diretório onde os arquivos PDF estão
+    localizados.
+    :param recursivo: Se True, desce também nos subdiretórios.
+    :return: Lista de tuplas (nome_arquivo, caminho_completo). Na busca
+    recursiva o nome é o caminho relativo ao diretório, pra não confundir
+    'emitidos/x.pdf' com 'recebidos/x.pdf'.
+    """
+    if not recursivo:
+        return [
+            (nome_arquivo,
+             os.path.normpath(os.path.join(diretorio, nome_arquivo)))
+            for nome_arquivo in os.listdir(diretorio)
+            if nome_arquivo.lower().endswith(".pdf")
+        ]
+
+    arquivos_pdf = []
+    for raiz, subdiretorios, arquivos in os.walk(diretorio):
+        # Ordena pra execução ser sempre na mesma ordem
+        subdiretorios.sort()
+        for nome_arquivo in sorted(arquivos):
+            if nome_arquivo.lower().endswith(".pdf"):
+                caminho_completo = os.path.normpath(
+                    os.path.join(raiz, nome_arquivo)
+                )
+                arquivos_pdf.append(
+                    (os.path.relpath(caminho_completo, diretorio),
+                     caminho_completo)
+                )
+    return arquivos_pdf
+
+
+def extrair_paginas(caminho_completo, cache=None, extrator=None, dados=None,
+                    hash_arquivo=None, pular=()):
+    """
+    Extrai o texto de todas as páginas de um arquivo PDF.
+
+    Se tiver cache (ver cache_texto.py) e o arquivo já tiver sido extraído
+    antes, o texto vem de lá e o PDF nem é aberto.
+
+    :param caminho_completo: Caminho do arquivo PDF.
+    :param cache: Objeto CacheTexto ou None pra extrair sempre.
+    :param extrator: Objeto extracao.ExtratorIsolado pra extrair num
+    processo vigiado, ou None pra extrair aqui mesmo.
+    :param dados: Conteúdo do arquivo, se já foi lido (esteira.py), ou None
+    pra ler do caminho.
+    :param hash_arquivo: Hash do conteúdo, se já foi calculado.
+    :param pular: Índices das páginas sem fonte (triagem.py), que vêm como
+    "" sem passar pela extração.
+    :return: Lista com o texto de cada página. Página sem texto vem como ""
+    e página que deu erro na extração vem como None.
+    :raises extracao.LimiteExcedido: Se o extrator passou do limite de tempo
+    ou memória. A exceção leva as páginas extraídas até ali.
+    """
+    if cache:
+        if hash_arquivo is None:
+            hash_arquivo = duplicados.calcular_hash(caminho_completo)
+        paginas = cache.obter(hash_arquivo, extracao.BACKEND_EXTRACAO)
+        metricas.METRICAS.contar(
+            "detetive_cache_total",
+            resultado="falta" if paginas is None else "acerto",
+        )
+        if paginas is not None:
+            log.debug("Texto de %s paginas recuperado do cache.",
+                      len(paginas))
+            return paginas
+
+    paginas = []
+    total_paginas = 0
+    if extrator:
+        mensagens = extrator.extrair(caminho_completo, dados, pular)
+    else:
+        mensagens = extracao.iterar_paginas(caminho_completo, dados, pular)
+
+    inicio = time.perf_counter()
+    try:
+        for mensagem in mensagens:
+            if mensagem[0] == "total":
+                total_paginas = mensagem[1]
+                log.debug("Arquivo possui %s paginas.", total_paginas)
+            elif mensagem[0] == "pagina":
+                log.debug("** Lendo página %s de %s **", mensagem[1] + 1,
+                          total_paginas)
+                paginas.append(mensagem[2])
+            else:
+                log.error("**Erro ao ler o PDF:** %s", mensagem[2])
+                metricas.METRICAS.contar("detetive_erros_total",
+                                         etapa="extracao")
+                # Guarda o traceback do erro, seila, vai que...
+                log.debug("%s", mensagem[3])
+                paginas.append(None)
+    except extracao.LimiteExcedido as e:
+        e.paginas = paginas
+        e.total_paginas = total_paginas
+        raise
+    metricas.METRICAS.observar("detetive_extracao_segundos",
+                               time.perf_counter() - inicio)
+
+    # Só guarda se todas as páginas foram extraídas, se deu erro em alguma
+    # tenta de novo na próxima
+    if cache and None not in paginas:
+        cache.guardar(hash_arquivo, extracao.BACKEND_EXTRACAO, paginas)
+    return paginas
+
+class MemoLinhas:
+    """
+    Memória (LRU) do que cada linha deu na busca. Desenho de engenharia
+    repete o carimbo, a tabela de revisões e as notas gerais em toda folha,
+    e cada uma dessas linhas passava pela buscar_parafusos e pela
+    buscar_parafusos_perdidos de novo, com o mesmo resultado.
+
+    Guarda texto da linha -> pares (norma, padrão) achados, sem página e
+    linha, que são colocadas na hora de usar. Linha sem nada também entra
+    (é a maioria que se repete), com um resultado vazio compartilhado.
+
+    Tem limite de memória: passou, sai a linha usada há mais tempo. Pode ser
+    compartilhada entre páginas, arquivos e threads da mesma execução.
+    """
+
+    def __init__(self, limite_mb=LIMITE_MEMO_MB):
+        """
+        :param limite_mb: Memória máxima (aproximada), em MB.
+        """
+        self.limite_bytes = int(limite_mb * 1024 * 1024)
+        self.bytes = 0
+        self.acertos = 0
+        self.faltas = 0
+        self.removidas = 0
+        self._linhas = collections.OrderedDict()
+        self._trava = threading.Lock()
+
+    def obter(self, texto):
+        """
+        :param texto: Linha, na forma canônica.
+        :return: O que foi guardado pra essa linha ou None.
+        """
+        with self._trava:
+            resultado = self._linhas.get(texto)
+            if resultado is None:
+                self.faltas += 1
+                return None
+            self._linhas.move_to_end(texto)
+            self.acertos += 1
+            return resultado
+
+    def guardar(self, texto, resultado):
+        """
+        :param texto: Linha, na forma canônica.
+        :param resultado: 'Tuple' com os pares (norma, padrao) da busca
+        normal e os da repescagem.
+        """
+        tamanho = _tamanho_entrada(texto, resultado)
+        # Linha maior que a memória inteira nem adianta guardar
+        if tamanho > self.limite_bytes:
+            return
+        with self._trava:
+            if texto in self._linhas:
+                return
+            self._linhas[texto] = resultado
+            self.bytes += tamanho
+            while self.bytes > self.limite_bytes:
+                self.bytes -= _tamanho_entrada(
+                    *self._linhas.popitem(last=False)
+                )
+                self.removidas += 1
+
+    def estatisticas(self):
+        """
+        :return: Dicionário com as estatísticas da memória de linhas.
+        """
+        with self._trava:
+            consultas = self.acertos + self.faltas
+            return {
+                "linhas": len(self._linhas),
+                "tamanho_mb": self.bytes / (1024 * 1024),
+                "limite_mb": self.limite_bytes / (1024 * 1024),
+                "acertos": self.acertos,
+                "faltas": self.faltas,
+                "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+                "removidas": self.removidas,
+            }
+
+    def relatorio(self):
+        """
+        Estatísticas formatadas pra exibir.
+
+        :return: Lista de linhas de texto.
+        """
+        est = self.estatisticas()
+        return [
+            f"Memória de linhas: {est['linhas']} linhas, "
+            f"{est['tamanho_mb']:.2f} MB de {est['limite_mb']:.0f} MB",
+            f"  {est['acertos']} acertos, {est['faltas']} faltas "
+            f"({est['taxa_acerto']:.0%}), {est['removidas']} removidas por "
+            "falta de espaço",
+        ]
+
+
+# O que fica guardado pra linha sem nada (a grande maioria), um só pra todas
+_LINHA_LIMPA = ((), ())
+
+
+def _tamanho_entrada(texto, resultado):
+    return (sys.getsizeof(texto) + CUSTO_ENTRADA_MEMO
+            + CUSTO_PAR_MEMO * (len(resultado[0]) + len(resultado[1])))
+
+
+def _buscar_linha(linha, page_num, linha_num, linha_original, memo,
+                  perfil=PERFIL_PADRAO):
+    """
+    Busca normal + repescagem numa linha, passando pela memória de linhas.
+
+    :return: 'Tuple' com os dicionários de resultados da buscar_parafusos e
+    da buscar_parafusos_perdidos, iguais aos que elas dariam.
+    """
+    if memo is None:
+        resultados_linha = buscar_parafusos(linha, page_num, linha_num,
+                                            perfil)
+        return resultados_linha, buscar_parafusos_perdidos(
+            linha, page_num, linha_num, resultados_linha, linha_original,
+            perfil,
+        )
+
+    # Cada perfil tem o seu resultado pra mesma linha
+    chave = perfil.chave_memo + linha
+    guardado = memo.obter(chave)
+    if guardado is None:
+        # A repescagem só olha os achados da mesma linha, então comparar
+        # com o resultado da própria linha dá no mesmo que com o da página
+        resultados_linha = buscar_parafusos(linha, page_num, linha_num,
+                                            perfil)
+        resultados_especificas = buscar_parafusos_perdidos(
+            linha, page_num, linha_num, resultados_linha, linha_original,
+            perfil,
+        )
+        if resultados_linha or resultados_especificas:
+            memo.guardar(chave, tuple(
+                tuple((norma, achado[0])
+                      for norma, achados in resultados.items()
+                      for achado in achados)
+                for resultados in (resultados_linha, resultados_especificas)
+            ))
+        else:
+            memo.guardar(chave, _LINHA_LIMPA)
+        return resultados_linha, resultados_especificas
+
+    # Já vista: monta os achados com a página e a linha de agora
+    resultados_linha = {}
+    for norma, padrao in guardado[0]:
+        resultados_linha.setdefault(norma, []).append(
+            Achado(padrao, page_num, linha_num)
+        )
+    resultados_especificas = {}
+    for norma, string in guardado[1]:
+        resultados_especificas.setdefault(norma, []).append(
+            Achado(string, page_num, linha_num)
+        )
+        _logar_perdido(norma, string, page_num, linha_num,
+                       linha_original or linha, perfil.rotulo)
+    return resultados_linha, resultados_especificas
+
+
+def pesquisar_paginas(paginas, janela=1, avisar=None, memo=None):
+    """
+    Procura os materiais proibidos (lista de parafusos) no texto das
+    páginas.
+
+    :param paginas: Lista com o texto de cada página, como devolvido por
+    extrair_paginas.
+    :param janela: Quantas linhas seguidas são consideradas juntas na busca
+    da norma + padrão. 1 é só a mesma linha.
+    :param avisar: Função sem argumentos chamada a cada item proibido
+    encontrado (o beep do -s), ou None.
+    :param memo: Objeto MemoLinhas pra não repetir a busca em linha já
+    vista, ou None.
+    :return: 'Tuple' com o dicionário de resultados ({norma: [(padrao,
+    pagina, linha), ...]}), a lista de páginas em branco ou não
+    pesquisáveis e se o PDF é pesquisável.
+    """
+    resultados, paginas_em_branco_ou_nao_pesquisaveis, pdf_pesquisavel = (
+        pesquisar_perfis(paginas, [PERFIL_PADRAO], janela, avisar, memo)
+    )
+    return (resultados[PERFIL_PADRAO.nome],
+            paginas_em_branco_ou_nao_pesquisaveis, pdf_pesquisavel)
+
+
+def pesquisar_perfis(paginas, perfis, janela=1, avisar=None, memo=None):
+    """
+    Procura os materiais proibidos de vários perfis (especificações) no
+    texto das páginas, numa passada só: cada página é normalizada uma vez e
+    a linha que não tem nada de nenhum perfil é descartada por uma peneira
+    só.
+
+    :param paginas: Lista com o texto de cada página, como devolvido por
+    extrair_paginas.
+    :param perfis: Lista de objetos Perfil, nomes diferentes.
+    :param janela: Quantas linhas seguidas são consideradas juntas na busca
+    da norma + padrão. 1 é só a mesma linha.
+    :param avisar: Chamado a cada item proibido encontrado, de qualquer
+    perfil, ou None.
+    :param memo: Objeto MemoLinhas ou None.
+    :return: 'Tuple' com o dicionário {nome do perfil: resultados} (cada um
+    igual ao do pesquisar_paginas), a lista de páginas em branco ou não
+    pesquisáveis e se o PDF é pesquisável.
+    """
+    # Flag para indicar se o PDF é pesquisável
+    pdf_pesquisavel = False
+    # Lista para páginas em branco ou não pesquisáveis
+    paginas_em_branco_ou_nao_pesquisaveis = []
+    # Dicionário para armazenar os resultados da busca, um por perfil
+    resultados_perfis = {perfil.nome: {} for perfil in perfis}
+    # Com um perfil só, a peneira dele já basta
+    peneira = None
+    if len(perfis) > 1:
+        peneira = _peneira_perfis(perfis)
+    # Tempo da busca, medido numa amostra das páginas da execução inteira
+    # (o cronômetro é o mesmo pra todos os arquivos)
+    cronometro = metricas.METRICAS.cronometro(
+        "detetive_busca_pagina_segundos", metricas.AMOSTRA_PAGINAS
+    )
+
+    for page_num, text in enumerate(paginas):
+        # Deu erro na extração, o erro ja foi exibido
+        if text is None:
+            continue
+        # tinha texto ? Marca que o PDF é pesquisável
+        if text:
+            with cronometro:
+                pdf_pesquisavel = True
+                # Passa a página pra forma canônica (traços, espaços,
+                # ligaduras, maiúsculas) uma vez só e divide em linhas,
+                # cada uma junto com o original pro log
+                linhas_pagina = normalizacao.normalizar(text).linhas()
+                linhas = [linha for linha, _ in linhas_pagina]
+                # Roda cada linha dessa pagina
+                for linha_num, (linha, linha_original) in enumerate(
+                    linhas_pagina, start=1
+                ):
+                    log.debug("**Linha %s:** %s", linha_num, linha_original)
+                    # Nada de perfil nenhum, próxima
+                    if peneira is not None and not peneira.search(linha):
+                        continue
+
+                    for perfil in perfis:
+                        resultados = resultados_perfis[perfil.nome]
+                        # Vamos procurar pra ver se acha alguma coisa, e ja
+                        # da um confere na repescagem, vai que passou algo
+                        resultados_paragrafo, resultados_especificas = (
+                            _buscar_linha(linha, page_num + 1, linha_num,
+                                          linha_original, memo, perfil)
+                        )
+                        for norma, padroes in resultados_paragrafo.items():
+                            for padrao in padroes:
+                                log.info(
+                                    "%s**Achei um proibido!** Página %s, "
+                                    "Linha %s: %s - %s", perfil.rotulo,
+                                    padrao[1], padrao[2], norma, padrao[0],
+                                )
+                                log.info("**Conteudo da linha** %s",
+                                         linha_original)
+                                if avisar:
+                                    avisar()
+                                if norma not in resultados:
+                                    resultados[norma] = []
+                                resultados[norma].append(padrao)
+
+                        for norma, padroes in resultados_especificas.items():
+                            if norma not in resultados:
+                                resultados[norma] = []
+                            # pulo do gato, afinal aqui é a repescagem
+                            resultados[norma].extend(padroes)
+                            if avisar:
+                                for _ in padroes:
+                                    avisar()
+
+                # Norma numa linha e padrão na outra, coisa de tabela
+                if janela > 1:
+                    for perfil in perfis:
+                        resultados = resultados_perfis[perfil.nome]
+                        resultados_janela = buscar_parafusos_janela(
+                            linhas, page_num + 1, janela, resultados, perfil
+                        )
+                        for norma, padroes in resultados_janela.items():
+                            if norma not in resultados:
+                                resultados[norma] = []
+                            resultados[norma].extend(padroes)
+                            if avisar:
+                                for _ in padroes:
+                                    avisar()
+        # Nao tinha texto na pagina
+        else:
+            paginas_em_branco_ou_nao_pesquisaveis.append(page_num + 1)
+            log.debug("** Pagina não pesquisavel ou em branco.**")
+
+    return (resultados_perfis, paginas_em_branco_ou_nao_pesquisaveis,
+            pdf_pesquisavel)
+
+
+def _peneira_perfis(perfis):
+    """
+    :return: Uma peneira que acha qualquer código de qualquer um dos
+    perfis.
+    """
+    return re.compile("|".join(
+        f"(?:{peneira.pattern})"
+        for perfil in perfis
+        for peneira in (perfil.peneira_normas, perfil.peneira_especificas)
+    ))
+
+
+def indexar_texto(indice, caminho_completo, paginas, hash_arquivo=None):
+    """
+    Atualiza o índice de texto com as páginas de um arquivo. Problema no
+    índice não atrapalha a busca, só fica o aviso.
+
+    :param indice: Objeto indice.IndiceInvertido ou None (não faz nada).
+    :param caminho_completo: Caminho do arquivo PDF.
+    :param paginas: Lista com o texto de cada página.
+    :param hash_arquivo: Hash do conteúdo, se já foi calculado.
+    """
+    # Só indexa arquivo lido inteiro, com erro tenta de novo na próxima
+    if indice is None or None in paginas:
+        return
+    try:
+        indice.indexar(caminho_completo, paginas, hash_arquivo)
+    except Exception as e:
+        log.warning("Atenção: não deu pra atualizar o índice de texto. %s",
+                    e)
+
+
+def analisar_pdf(caminho_completo, cache=None, janela=1, extrator=None,
+                 indice=None, avisar=None, memo=None):
+    """
+    Lê um arquivo PDF página a página e procura os materiais proibidos.
+
+    :param caminho_completo: Caminho do arquivo PDF.
+    :param cache: Objeto CacheTexto ou None pra extrair sempre.
+    :param janela: Quantas linhas seguidas são consideradas juntas na busca.
+    :param extrator: Objeto extracao.ExtratorIsolado ou None.
+    :param indice: Objeto indice.IndiceInvertido que recebe o texto do
+    arquivo, ou None.
+    :param avisar: Chamada a cada item proibido encontrado, ou None.
+    :param memo: Objeto MemoLinhas ou None.
+    :return: 'Tuple' com o dicionário de resultados ({norma: [(padrao,
+    pagina, linha), ...]}), a lista de páginas em branco ou não
+    pesquisáveis, o total de páginas e se o PDF é pesquisável.
+    """
+    paginas = extrair_paginas(caminho_completo, cache, extrator)
+    indexar_texto(indice, caminho_completo, paginas)
+    resultados, paginas_em_branco_ou_nao_pesquisaveis, pdf_pesquisavel = (
+        pesquisar_paginas(paginas, janela, avisar, memo)
+    )
+    return (resultados, paginas_em_branco_ou_nao_pesquisaveis, len(paginas),
+            pdf_pesquisavel)
+
+
+def analisar_extraido(caminho_completo, extraido, janela=1, indice=None,
+                      avisar=None, memo=None, hash_arquivo=None, perfis=None):
+    """
+    Pesquisa o que saiu da extração de um PDF. Se a extração passou do
+    limite de tempo ou de memória pesquisa pelo menos as páginas que deu pra
+    ler.
+
+    :param caminho_completo: Caminho do arquivo PDF.
+    :param extraido: Lista com o texto das páginas (extrair_paginas) ou a
+    exceção extracao.LimiteExcedido, com as páginas lidas até o limite.
+    :param janela: Quantas linhas seguidas são consideradas juntas na busca.
+    :param indice: Objeto indice.IndiceInvertido ou None.
+    :param avisar: Chamada a cada item proibido encontrado, ou None.
+    :param memo: Objeto MemoLinhas ou None.
+    :param hash_arquivo: Hash do conteúdo, se já foi calculado (índice).
+    :param perfis: Lista de objetos Perfil pra pesquisar todos de uma vez,
+    ou None pra só a lista de parafusos.
+    :return: 'Tuple' igual ao do analisar_pdf_com_limite. Com 'perfis', os
+    resultados vêm por perfil: {nome do perfil: resultados}.
+    """
+    def pesquisar(paginas):
+        if perfis is None:
+            return pesquisar_paginas(paginas, janela, avisar, memo)
+        return pesquisar_perfis(paginas, perfis, janela, avisar, memo)
+
+    if not isinstance(extraido, extracao.LimiteExcedido):
+        indexar_texto(indice, caminho_completo, extraido, hash_arquivo)
+        resultados, paginas_em_branco_ou_nao_pesquisaveis, pdf_pesquisavel = (
+            pesquisar(extraido)
+        )
+        return (resultados, paginas_em_branco_ou_nao_pesquisaveis,
+                len(extraido), pdf_pesquisavel, None)
+
+    # Travou na extração, pesquisa pelo menos o que deu pra ler e segue
+    # o baile
+    e = extraido
+    log.warning(
+        "**Processamento interrompido (%s):** %s Lidas %s de %s "
+        "paginas.", e.motivo, e, len(e.paginas), e.total_paginas,
+    )
+    resultados, paginas_em_branco_ou_nao_pesquisaveis, pdf_pesquisavel = (
+        pesquisar(e.paginas)
+    )
+    return (resultados, paginas_em_branco_ou_nao_pesquisaveis,
+            e.total_paginas, pdf_pesquisavel, (e.motivo, len(e.paginas)))
+
+
+def analisar_pdf_com_limite(caminho_completo, cache=None, janela=1,
+                            extrator=None, indice=None, avisar=None,
+                            memo=None):
+    """
+    Igual ao analisar_pdf, mas se a extração passar do limite de tempo ou de
+    memória pesquisa pelo menos as páginas que deu pra ler.
+
+    :param caminho_completo: Caminho do arquivo PDF.
+    :param cache: Objeto CacheTexto ou None pra extrair sempre.
+    :param janela: Quantas linhas seguidas são consideradas juntas na busca.
+    :param extrator: Objeto extracao.ExtratorIsolado ou None.
+    :param indice: Objeto indice.IndiceInvertido ou None.
+    :param avisar: Chamada a cada item proibido encontrado, ou None.
+    :param memo: Objeto MemoLinhas ou None.
+    :return: 'Tuple' com os mesmos itens do analisar_pdf e mais a
+    interrupção: (motivo, paginas lidas) ou None se leu tudo.
+    """
+    try:
+        extraido = extrair_paginas(caminho_completo, cache, extrator)
+    except extracao.LimiteExcedido as e:
+        extraido = e
+    return analisar_extraido(caminho_completo, extraido, janela, indice,
+                             avisar, memo)
+
+
+def status_arquivo(resultados, interrupcao):
+    """
+    Status do arquivo pras planilhas e saídas estruturadas.
+
+    :param resultados: Dicionário de resultados da busca.
+    :param interrupcao: (motivo, paginas lidas) ou None.
+    :return: "SIM", "NAO" ou o motivo da interrupção ("TIMEOUT", "OOM").
+    """
+    if interrupcao:
+        return interrupcao[0]
+    return "SIM" if resultados else "NAO"